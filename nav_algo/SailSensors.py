@@ -1,10 +1,17 @@
 from smbus2 import SMBus, i2c_msg
 from Adafruit_ADS1x15 import ADS1x15 as ADS
+import numpy as np
 import serial
+import struct
+import threading
+import time
 
 IMU_ADDRESS = 0x77
 ADC_ADDRESS = 0x48
 
+# an IMU frame is three big endian floats: the euler angles in radians
+IMU_FRAME = struct.Struct('>3f')
+
 
 class I2CDevice:
     """This class is used to create a new instance of an I2C sensor module for communication.
@@ -149,6 +156,9 @@ class SailIMU(I2CDevice):
     SailIMU implements a class used to connect the component to it's proper
     communication protocol. This class also implements functions to return raw data and
     turn on/off the sensors.
+
+    Attributes:
+        stream (IMUStream): The bulk reading thread, or None if not streaming.
     """
     imuCommands = {
         "readAccelerometerRaw": 0x42,
@@ -161,21 +171,184 @@ class SailIMU(I2CDevice):
         Initializes the sensor object, default for i2cBusIndex is 1 because the raspberry pi only has 1 bus
         """
         super().__init__(deviceAddress, i2cBusIndex)
+        # the commands never change, so both writes are built once
+        self._commands = (
+            i2c_msg.write(deviceAddress, [
+                SailIMU.imuCommands["readAccelerometerRaw"],
+                SailIMU.imuCommands["readOrientationEuler"]
+            ]),
+            i2c_msg.write(deviceAddress,
+                          [SailIMU.imuCommands["readCompassRaw"]]),
+        )
+        self._frame = bytearray(IMU_FRAME.size)
+        self.stream = None
         return
 
     def i2c_read_imu(self):
         """
         Reads the IMU and returns a list of 12 bytes representing euler angles.
         """
-        msg = [
-            SailIMU.imuCommands["readAccelerometerRaw"],
-            SailIMU.imuCommands["readOrientationEuler"]
-        ]
-        self.i2cWr(msg)
-        msg = [SailIMU.imuCommands["readCompassRaw"]]
-        self.i2cWr(msg)
-        data = self.readBlockData(12)
-        return data
+        # the IMU expects each command as its own transaction (with a stop
+        # after it), not as repeated starts of one combined transaction
+        for command in self._commands:
+            self.i2cBus.i2c_rdwr(command)
+        return self.readBlockData(IMU_FRAME.size)
+
+    def readFrame(self):
+        """Reads the IMU and copies the frame into a reusable frame buffer.
+
+        The bus read itself still returns a new list, but callers get the
+        same bytearray every time, which the ring buffer copies from.
+
+        Returns:
+            bytearray: The 12 byte frame, overwritten by the next read.
+        """
+        self._frame[:] = self.i2c_read_imu()
+        return self._frame
+
+    def readEulerAngles(self):
+        """Reads the IMU and decodes the frame.
+
+        Returns:
+            (float, float, float): The raw euler angles (in radians).
+        """
+        return IMU_FRAME.unpack_from(self.readFrame())
+
+    def startStream(self, rate=100.0, size=1024, bus_lock=None):
+        """Starts reading IMU frames into a ring buffer in the background.
+
+        Args:
+            rate (float): (Optional) How often to read the IMU (in Hz).
+            size (int): (Optional) How many frames the ring buffer holds.
+            bus_lock (threading.Lock): (Optional) Held while reading, e.g. to share the I2C bus.
+
+        Returns:
+            IMURingBuffer: The buffer the frames are written to.
+        """
+        self.stopStream()
+        self.stream = IMUStream(self, IMURingBuffer(size), rate, bus_lock)
+        self.stream.start()
+        return self.stream.buffer
+
+    def stopStream(self):
+        """Stops the background reading started by startStream."""
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream = None
+        return
+
+
+class IMURingBuffer:
+    """A preallocated ring buffer of raw IMU frames.
+
+    Frames are stored undecoded, so appending a frame is a single copy into
+    the buffer. They are decoded in bulk (with a big endian float view of the
+    buffer) only when they are read. There is one writer: a reader that runs
+    concurrently sees every frame except the one being written.
+
+    Args:
+        size (int): The number of frames the buffer holds.
+
+    Raises:
+        ValueError: If size is less than 2.
+
+    Attributes:
+        frames (numpy.ndarray): The raw frames, shape (size, 12).
+        timestamps (numpy.ndarray): When each frame was read (time.monotonic()).
+        count (int): The number of frames appended so far.
+    """
+    def __init__(self, size):
+        if size < 2:
+            raise ValueError('The ring buffer needs at least two frames.')
+        self.size = size
+        self.frames = np.zeros((size, IMU_FRAME.size), dtype=np.uint8)
+        self.timestamps = np.zeros(size)
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.size - 1)
+
+    def append(self, frame, timestamp):
+        """Copies a frame into the buffer, overwriting the oldest one if full.
+
+        Args:
+            frame (bytes-like): The 12 byte frame.
+            timestamp (float): When the frame was read.
+        """
+        i = self.count % self.size
+        self.frames[i] = np.frombuffer(frame, dtype=np.uint8)
+        self.timestamps[i] = timestamp
+        # publish the frame only after it has been written
+        self.count += 1
+
+    def latest(self, n=None):
+        """Decodes the most recent frames.
+
+        Args:
+            n (int): (Optional) The number of frames, all of them if not given.
+
+        Returns:
+            (numpy.ndarray, numpy.ndarray): The timestamps, shape (n,), and the
+            euler angles (in degrees), shape (n, 3), oldest first.
+        """
+        count = self.count
+        available = min(count, self.size - 1)
+        n = available if n is None else min(n, available)
+        indices = np.arange(count - n, count) % self.size
+        timestamps = self.timestamps[indices]
+        angles = np.degrees(self.frames[indices].view('>f4').astype(float))
+        return timestamps, angles
+
+
+class IMUStream(threading.Thread):
+    """Reads IMU frames at a fixed rate into an IMURingBuffer.
+
+    Args:
+        imu (SailIMU): The IMU to read.
+        buffer (IMURingBuffer): The buffer to write the frames to.
+        rate (float): How often to read the IMU (in Hz).
+        bus_lock (threading.Lock): (Optional) Held while reading.
+
+    Attributes:
+        errors (int): The number of reads that raised an exception.
+    """
+    def __init__(self, imu, buffer, rate, bus_lock=None):
+        super().__init__(name='IMUStream', daemon=True)
+        self.imu = imu
+        self.buffer = buffer
+        self.period = 1.0 / rate
+        self.bus_lock = bus_lock
+        self.errors = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Reads the IMU until stop() is called."""
+        next_time = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                if self.bus_lock is not None:
+                    with self.bus_lock:
+                        frame = self.imu.readFrame()
+                else:
+                    frame = self.imu.readFrame()
+            except Exception:
+                # a failed read only skips this frame
+                self.errors += 1
+            else:
+                self.buffer.append(frame, time.monotonic())
+
+            next_time += self.period
+            delay = next_time - time.monotonic()
+            if delay < -self.period:
+                next_time = time.monotonic()
+            elif delay > 0:
+                self._stop_event.wait(delay)
+
+    def stop(self):
+        """Stops reading."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
 
 
 class SailEncoder:
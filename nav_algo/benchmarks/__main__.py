@@ -0,0 +1,9 @@
+import nav_algo.benchmarks.vector_benchmark as vector_benchmark
+
+
+def main():
+    vector_benchmark.run()
+
+
+if __name__ == "__main__":
+    main()
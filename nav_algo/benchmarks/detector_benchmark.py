@@ -0,0 +1,214 @@
+import argparse
+import os
+import time
+import cv2
+from nav_algo.computer_vision.detectors.boatDetector import BoatDetector
+from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
+from nav_algo.computer_vision.detectors.HorizonDetector import HorizonDetector
+from nav_algo.computer_vision.detectors.horizonBandDetector import HorizonBandDetector
+from nav_algo.computer_vision.detectors.pipeline import DetectorGraph
+from nav_algo.detection import DetectionService
+
+IMAGE_EXTENSIONS = ('.bmp', '.jpeg', '.jpg', '.png', '.ppm', '.tif', '.tiff')
+
+
+def legacyProcess(frame):
+    """The buoy pipeline as it ran before BuoyDetector kept its buffers.
+
+    Every stage allocates its output and the frame is converted to RGB
+    before thresholding. Only kept here as the baseline for the benchmark.
+    """
+    out = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    out = cv2.inRange(out, (100, 100, 0), (255.0, 200, 100))
+    out = cv2.erode(out,
+                    None, (-1, -1),
+                    iterations=1,
+                    borderType=cv2.BORDER_CONSTANT,
+                    borderValue=-1)
+    out = cv2.blur(out, (43, 43))
+    out = cv2.dilate(out,
+                     None, (-1, -1),
+                     iterations=7,
+                     borderType=cv2.BORDER_CONSTANT,
+                     borderValue=-1)
+    contours, hierarchy = cv2.findContours(out,
+                                           mode=cv2.RETR_LIST,
+                                           method=cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+
+def loadFrames(directory, max_dimension=700):
+    """Loads the recorded frames in a directory, scaled like the camera feed.
+
+    Args:
+        directory (str): The directory of images, read in name order.
+        max_dimension (int): (Optional) The size of the longest frame axis.
+
+    Returns:
+        list: The BGR frames as numpy.ndarray.
+
+    """
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        frame = cv2.imread(os.path.join(directory, name))
+        if frame is None:
+            continue
+        scale = max_dimension / max(frame.shape)
+        frames.append(cv2.resize(frame, None, fx=scale, fy=scale))
+    return frames
+
+
+def _fps(process, frames, repeat):
+    """Returns the best frames per second of process over the frames."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for frame in frames:
+            process(frame)
+        best = min(best, time.perf_counter() - start)
+    return len(frames) / best
+
+
+def _workerFps(frames, workers, count):
+    """Returns the frames per second of a DetectionService with workers."""
+    service = DetectionService(frames[0].shape, workers)
+    try:
+        total = 0
+        for warm_up, number in ((True, 2 * workers), (False, count)):
+            start = time.perf_counter()
+            submitted = 0
+            while submitted < number:
+                if service.submit(frames[submitted % len(frames)]):
+                    submitted += 1
+                else:
+                    time.sleep(0.001)  # every worker is busy
+            total += number
+            while service.completed + service.errors < total:
+                time.sleep(0.001)
+        return count / (time.perf_counter() - start)
+    finally:
+        service.close()
+
+
+def runWorkers(directory, max_workers=4, count=200):
+    """Measures the detection throughput of 1 to max_workers processes.
+
+    Every frame goes through the buoy, boat and horizon detectors, first on
+    this process and then in a DetectionService with each number of workers.
+
+    Args:
+        directory (str): The directory of recorded frames.
+        max_workers (int): (Optional) The largest number of workers.
+        count (int): (Optional) The number of frames timed per case.
+
+    """
+    frames = loadFrames(directory)
+    if not frames:
+        raise ValueError("no frames found in {}".format(directory))
+
+    graph = DetectorGraph([BuoyDetector(), BoatDetector()])
+    horizon = HorizonDetector()
+
+    def inProcess(frame):
+        graph.process(frame)
+        horizon.process(frame)
+
+    print("Detection service (buoy, boat and horizon, {} frames)".format(
+        count))
+    print("{:<28}{:>10}{:>10}".format("workers", "fps", "speedup"))
+    baseline = _fps(inProcess, frames[:count], 1)
+    print("{:<28}{:>10.1f}{:>9.2f}x".format("in process", baseline, 1.0))
+    for workers in range(1, max_workers + 1):
+        fps = _workerFps(frames, workers, count)
+        print("{:<28}{:>10.1f}{:>9.2f}x".format(workers, fps,
+                                                fps / baseline))
+
+
+def run(directory, repeat=3):
+    """Measures the buoy detector frame rate over a directory of frames.
+
+    The legacy pipeline and a new BuoyDetector per frame (what the camera
+    test scripts used to do) are compared with one persistent detector.
+    Then the buoy and boat detectors run one after the other are compared
+    with a DetectorGraph that shares their common stages, and with a
+    HorizonBandDetector that only runs them around the horizon.
+
+    Args:
+        directory (str): The directory of recorded frames.
+        repeat (int): (Optional) How many passes are timed, the best is kept.
+
+    """
+    frames = loadFrames(directory)
+    if not frames:
+        raise ValueError("no frames found in {}".format(directory))
+
+    detector = BuoyDetector()
+    cases = [
+        ('legacy pipeline', legacyProcess),
+        ('new detector per frame', lambda frame: BuoyDetector().process(frame)),
+        ('persistent detector', detector.process),
+    ]
+    height, width = frames[0].shape[:2]
+    print("BuoyDetector benchmark ({} frames of {}x{})".format(
+        len(frames), width, height))
+    print("{:<28}{:>10}{:>10}".format("pipeline", "fps", "speedup"))
+    _report(cases, frames, repeat)
+
+    buoy = BuoyDetector()
+    boat = BoatDetector()
+    graph = DetectorGraph([buoy, boat])
+
+    def separately(frame):
+        buoy.process(frame)
+        boat.process(frame)
+
+    print()
+    print("Buoy and boat detectors ({} stages shared)".format(
+        len(buoy.stages()) + len(boat.stages()) - graph.node_count))
+    print("{:<28}{:>10}{:>10}".format("pipeline", "fps", "speedup"))
+    _report([('separately', separately), ('detector graph', graph.process)],
+            frames, repeat)
+
+    band = HorizonBandDetector([BuoyDetector(), BoatDetector()])
+    pixels = 0
+    for frame in frames:
+        band.process(frame)
+        pixels += band.pixels
+
+    print()
+    print("Horizon band ({:.1%} of the pixels searched)".format(
+        pixels / float(len(frames) * height * width)))
+    print("{:<28}{:>10}{:>10}".format("pipeline", "fps", "speedup"))
+    _report([('full frame', graph.process), ('horizon band', band.process)],
+            frames, repeat)
+
+
+def _report(cases, frames, repeat):
+    """Prints the frame rate of each case relative to the first."""
+    baseline = None
+    for name, process in cases:
+        fps = _fps(process, frames, repeat)
+        baseline = baseline or fps
+        print("{:<28}{:>10.1f}{:>9.2f}x".format(name, fps, fps / baseline))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the detector frame rates.")
+    parser.add_argument('directory', help="directory of recorded frames")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers',
+                        type=int,
+                        default=4,
+                        help="compare 1 to this many detection workers")
+    args = parser.parse_args()
+    run(args.directory, args.repeat)
+    if args.workers > 0:
+        print()
+        runWorkers(args.directory, args.workers)
+
+
+if __name__ == "__main__":
+    main()
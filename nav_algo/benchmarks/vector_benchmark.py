@@ -0,0 +1,111 @@
+import timeit
+import numpy as np
+import nav_algo.coordinates as coord
+
+
+class LegacyVector:
+    """The dict based, NumPy scalar Vector that coord.Vector replaced.
+
+    Only kept here as the baseline for the benchmark.
+    """
+    def __init__(self,
+                 coord_sys=None,
+                 latitude=None,
+                 longitude=None,
+                 angle=None,
+                 x=None,
+                 y=None):
+        if (coord_sys is not None) and (latitude
+                                        is not None) and (longitude
+                                                          is not None):
+            self.coordinate_system = coord_sys
+            self.latitude = latitude
+            self.longitude = longitude
+
+            shifted_long = longitude - coord_sys.LONG_OFFSET
+            shifted_lat = latitude - coord_sys.LAT_OFFSET
+            deg_to_rad = np.pi / 180.0
+
+            self.x = coord_sys.EARTH_RADIUS * np.cos(
+                coord_sys.LAT_OFFSET * deg_to_rad) * deg_to_rad * shifted_long
+            self.y = coord_sys.EARTH_RADIUS * deg_to_rad * shifted_lat
+
+        elif angle is not None:
+            self.x = np.cos(angle * (np.pi / 180.0))
+            self.y = np.sin(angle * (np.pi / 180.0))
+
+        elif (x is not None) and (y is not None):
+            self.x = x
+            self.y = y
+
+    def xyDist(self, other):
+        return np.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
+
+    def vectorSubtract(self, other):
+        return LegacyVector(x=self.x - other.x, y=self.y - other.y)
+
+    def magnitude(self):
+        return np.sqrt(self.x**2 + self.y**2)
+
+    def angle(self):
+        return (np.arctan2(self.y, self.x) * (180.0 / np.pi)) % 360
+
+    def scale(self, scaleFactor):
+        return LegacyVector(x=self.x * scaleFactor, y=self.y * scaleFactor)
+
+    def midpoint(self, other):
+        dx = (self.x - other.x) / 2.0
+        dy = (self.y - other.y) / 2.0
+        return LegacyVector(x=self.x - dx, y=self.y - dy)
+
+
+def _cases(cls, fast):
+    """Builds the timed statements for one vector implementation."""
+    coord_sys = coord.CoordinateSystem(42.444241, -76.481933)
+    a = cls(x=3.0, y=4.0)
+    b = cls(x=-1.5, y=2.5)
+    cases = [
+        ('construct from x/y', lambda: cls(x=1.0, y=2.0)),
+        ('construct from lat/lon',
+         lambda: cls(coord_sys, 42.446016, -76.484713)),
+        ('construct from angle', lambda: cls(angle=30.0)),
+        ('xyDist', lambda: a.xyDist(b)),
+        ('vectorSubtract', lambda: a.vectorSubtract(b)),
+        ('magnitude', lambda: a.magnitude()),
+        ('angle', lambda: a.angle()),
+        ('midpoint', lambda: a.midpoint(b)),
+        ('velocity update (subtract + scale)',
+         lambda: a.vectorSubtract(b).scale(0.5)),
+    ]
+    if fast:
+        # the same operations through the fast paths
+        cases[0] = ('construct from x/y', lambda: cls.fromXY(1.0, 2.0))
+        cases[1] = ('construct from lat/lon',
+                    lambda: cls.fromLatLon(coord_sys, 42.446016, -76.484713))
+        cases[2] = ('construct from angle', lambda: cls.fromPolar(30.0))
+        cases[-1] = ('velocity update (subtract + scale)',
+                     lambda: (a - b).iscale(0.5))
+    return cases
+
+
+def run(number=100000):
+    """Times the common Vector operations against the legacy implementation.
+
+    Args:
+        number (int): (Optional) How many times each operation is run.
+
+    """
+    print("Vector microbenchmark ({} calls per operation)".format(number))
+    print("{:<36}{:>12}{:>12}{:>10}".format("operation", "legacy us",
+                                            "slots us", "speedup"))
+    legacy = _cases(LegacyVector, False)
+    current = _cases(coord.Vector, True)
+    for (name, old), (_, new) in zip(legacy, current):
+        old_time = min(timeit.repeat(old, number=number, repeat=3)) / number
+        new_time = min(timeit.repeat(new, number=number, repeat=3)) / number
+        print("{:<36}{:>12.3f}{:>12.3f}{:>9.1f}x".format(
+            name, old_time * 1e6, new_time * 1e6, old_time / new_time))
+
+
+if __name__ == "__main__":
+    run()
@@ -1,5 +1,7 @@
+import nav_algo.instrumentation as instrumentation
 import nav_algo.servo as servo
 import nav_algo.sensors as sens
+import nav_algo.sensor_scheduler as sched
 import nav_algo.coordinates as coord
 import nav_algo.navigation_utilities as util
 import numpy as np
@@ -7,9 +9,19 @@ import numpy as np
 
 class BoatController:
 
-    def __init__(self, coordinate_system=None):
+    def __init__(self,
+                 coordinate_system=None,
+                 background_gps=False,
+                 scheduled_sensors=False):
         self.coordinate_system = coordinate_system
-        self.sensors = sens.sensorData(coordinate_system)
+        self.sensors = sens.sensorData(coordinate_system,
+                                       background_gps=background_gps)
+
+        # sample the sensors on worker threads instead of in updateSensors
+        self.sensor_scheduler = None
+        if scheduled_sensors:
+            self.sensor_scheduler = sched.SensorScheduler(self.sensors)
+            self.sensor_scheduler.start()
 
         # servo angles
         self.servos = servo.Servo()
@@ -20,7 +32,29 @@ class BoatController:
         return self.sensors.position
 
     def updateSensors(self):
-        self.sensors.readAll()
+        if self.sensor_scheduler is not None:
+            # never blocks, the workers have already read the sensors
+            self.sensor_scheduler.apply()
+        else:
+            self.sensors.readAll()
+
+    def sensorStats(self):
+        """Returns the sampling statistics of every sensor.
+
+        Returns:
+            dict of str: SensorStats: The statistics of each sensor, or None
+                if the sensors are not scheduled.
+
+        """
+        if self.sensor_scheduler is None:
+            return None
+        return self.sensor_scheduler.stats()
+
+    def close(self):
+        """Stops any sensor threads and closes the sensor ports."""
+        if self.sensor_scheduler is not None:
+            self.sensor_scheduler.stop()
+        self.sensors.close()
 
     def getServoAngles(self, intended_angle: float):
         # TODO check logic for all of this, I'm 99% sure it's wrong - CM
@@ -28,6 +62,7 @@ class BoatController:
         yaw = self.sensors.yaw
         return util.getServoAnglesImpl(abs_wind_dir, yaw, intended_angle)
 
+    @instrumentation.timed('BoatController.setServos')
     def setServos(self, intended_angle: float):
         self.sail_angle, self.tail_angle = self.getServoAngles(intended_angle)
 
@@ -1,42 +1,187 @@
-from nav_algo.computer_vision.detectors.buoyDetector.buoyDetector import BuoyDetector
+from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
 from nav_algo.computer_vision.detectors.boatDetector import BoatDetector
-import cv2
+from nav_algo.computer_vision.detectors.horizonBandDetector import HorizonBandDetector
+from nav_algo.computer_vision.detectors.pipeline import DetectorGraph
+from nav_algo.computer_vision.detectors.utils import get_coords
+from nav_algo.capture import CaptureThread
+from nav_algo.detection import DetectionService
+import nav_algo.coordinates as coord
+import nav_algo.instrumentation as instrumentation
+import numpy as np
 from picamera.array import PiRGBArray
 from picamera import PiCamera
 
 
-class Camera:
-    def __init__(self):
+class PiCameraSource:
+    """Streams BGR frames from the Pi camera through its video port.
+
+    A single capture_continuous generator keeps the video port running for
+    the lifetime of the source, instead of setting up a capture per frame.
+
+    Args:
+        resolution (tuple): (Optional) The (width, height) of the frames.
+        framerate (int): (Optional) The camera frame rate.
+
+    Attributes:
+        shape (tuple): The (height, width, channels) of the frames.
+
+    """
+    def __init__(self, resolution=(640, 480), framerate=32):
         self.camera = PiCamera()
-        self.camera.resolution = (640, 480)
-        self.camera.framerate = 32
+        self.camera.resolution = resolution
+        self.camera.framerate = framerate
+        self.shape = (resolution[1], resolution[0], 3)
+        self.raw = PiRGBArray(self.camera, size=resolution)
+        self.frames = self.camera.capture_continuous(self.raw,
+                                                     format="bgr",
+                                                     use_video_port=True)
+
+    def read(self, out):
+        """Copies the next frame of the stream into out."""
+        frame = next(self.frames)
+        np.copyto(out, frame.array)
+        self.raw.truncate(0)
+        return True
+
+    def close(self):
+        """Stops the stream and releases the camera."""
+        self.frames.close()
+        self.camera.close()
+
+
+class Camera:
+    """Detects buoys and boats in the newest frame of a background capture.
+
+    The detectors either run on the caller's thread in read(), or, with
+    workers, in a DetectionService that processes every frame it can keep
+    up with, in which case read() never waits but ignores detections of
+    frames older than max_age.
+
+    Args:
+        source (object): (Optional) The frame source, the Pi camera if not
+            given (see nav_algo.capture).
+        workers (int): (Optional) The number of detection worker processes,
+            none to detect in read().
+        roi (bool): (Optional) Only searches a band around the horizon (see
+            HorizonBandDetector).
+        attitude (function): (Optional) Returns the (pitch, roll) of the boat
+            in degrees, which moves the band between horizon estimates.
+        max_age (float): (Optional) With workers, the age (in seconds) of the
+            oldest frame whose detections read() still returns.
+
+    Attributes:
+        capture (CaptureThread): Keeps the camera streaming.
+        frame (Frame): The frame the last read() ran the detectors on.
+        service (DetectionService): The detection workers, or None.
+        detections (Detections): With workers, the detections the last
+            read() used.
+
+    """
+    def __init__(self,
+                 source=None,
+                 workers=0,
+                 roi=False,
+                 attitude=None,
+                 max_age=1.0):
+        if source is None:
+            source = PiCameraSource()
+        self.capture = CaptureThread(source, max_dimension=700)
+        self.frame = None
+
+        height, width = self.capture.shape[:2]
+        self.buoyDetector = BuoyDetector(height, width)
+        self.boatDetector = BoatDetector(height, width)
+        # the detectors of the workers read the attitude themselves
+        self.attitude = attitude if roi else None
+        # the stages both detectors have in common run once per frame
+        if roi:
+            self.detectors = HorizonBandDetector(
+                [self.buoyDetector, self.boatDetector], height, width)
+        else:
+            self.detectors = DetectorGraph(
+                [self.buoyDetector, self.boatDetector], height, width)
+
+        self.service = None
+        self.detections = None
+        self.max_age = max_age
+        if workers:
+            self.service = DetectionService(self.capture.shape,
+                                            workers,
+                                            detectors=('buoy', 'boat'),
+                                            roi=roi)
+
+        self.capture.start()
+        if self.service is not None:
+            self.service.follow(self.capture, attitude)
+
+    def read(self, direction, curr_x, curr_y, timeout=1.0):
+        """Finds the largest buoy and boat in the newest frame.
+
+        Without workers, only waits for the camera if the newest frame was
+        already read. With workers, returns the newest detections at once,
+        unless their frame was captured more than max_age seconds ago.
+
+        Args:
+            direction (float): The heading of the boat.
+            curr_x (float): The x coordinate of the boat.
+            curr_y (float): The y coordinate of the boat.
+            timeout (float): (Optional) The maximum time to wait for a frame.
 
-        self.buoyDetector = BuoyDetector()
-        self.boatDetector = BoatDetector()
+        Returns:
+            (Vector, Vector): The buoy and boat positions, each None if it
+                was not found (both None if the detections are too old).
 
-        self.rawCapture = PiRGBArray(self.camera, size=(640, 480))
+        Raises:
+            RuntimeError: If the camera has not sent a frame yet.
 
-    def read(self, direction, curr_x, curr_y):
-        for frame in self.camera.capture_continuous(self.rawCapture,
-                                                    format="bgr",
-                                                    use_video_port=True):
+        """
+        if self.service is not None:
+            detections = self.service.latest
+            # the workers may have fallen behind or stopped
+            if (detections is None or self.capture.monotonic() -
+                    detections.timestamp > self.max_age):
+                return None, None
+            self.detections = detections
+            return (self._locate(self.detections.buoy, direction, curr_x,
+                                 curr_y),
+                    self._locate(self.detections.boat, direction, curr_x,
+                                 curr_y))
 
-            frame = frame.array
-            max_dimension = max(frame.shape)
-            scale = 700 / max_dimension
-            frame = cv2.resize(frame, None, fx=scale, fy=scale)
+        self.frame = self.capture.waitForFrame(self.frame, timeout)
+        if self.frame is None:
+            raise RuntimeError('No frame from the camera.')
 
-            self.buoyDetector.process(frame)
-            self.boatDetector.process(frame)
+        with instrumentation.timer('Camera.detect'):
+            if self.attitude is not None:
+                self.detectors.process(self.frame.image, *self.attitude())
+            else:
+                self.detectors.process(self.frame.image)
 
-            buoyCoordsTuple = self.buoyDetector.get_buoy_coords(
-                direction, curr_x, curr_y)
-            boatCoordsTuple = self.boatDetector.get_boat_coords(
-                direction, curr_x, curr_y)
+        buoyCoords = None
+        if self.buoyDetector.filter_contours_output:
+            x, y = self.buoyDetector.get_buoy_coords(direction, curr_x,
+                                                     curr_y)
+            buoyCoords = coord.Vector(x=x, y=y)
+        boatCoords = None
+        if self.boatDetector.filter_contours_output:
+            x, y = self.boatDetector.get_boat_coords(direction, curr_x,
+                                                     curr_y)
+            boatCoords = coord.Vector(x=x, y=y)
 
-            self.rawCapture.truncate(0)
+        return buoyCoords, boatCoords
 
-            buoyCoords = coord.Vector(x=buoyCoordsTuple[0], y=buoyCoordsTuple[1])
-            boatCoords = coord.Vector(x=boatCoordsTuple[0], y=boatCoordsTuple[1])
+    @staticmethod
+    def _locate(sighting, direction, curr_x, curr_y):
+        """Returns the position of a Sighting, or None."""
+        if sighting is None:
+            return None
+        x, y = get_coords(sighting.distance, sighting.offset, direction,
+                          curr_x, curr_y)
+        return coord.Vector(x=x, y=y)
 
-            return buoyCoords, boatCoords
+    def close(self):
+        """Stops the detection workers, the capture and the camera."""
+        if self.service is not None:
+            self.service.close()
+        self.capture.stop()
+        self.capture.source.close()
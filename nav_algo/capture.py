@@ -0,0 +1,235 @@
+"""
+Background frame capture for the computer vision.
+
+A CaptureThread keeps a camera streaming into a small ring of preallocated
+frame buffers, so the detection loop never waits on the camera. Only the
+newest frame matters for collision avoidance: a consumer gets it with its
+capture time, and frames that nobody read before a newer one arrived are
+dropped.
+
+A frame source has a shape (height, width, 3) and a read(out) method, which
+writes the next BGR frame into the array out and returns False once there
+are no more frames. VideoSource reads video files (or a webcam), so the
+capture can be run without the Pi camera.
+"""
+from collections import namedtuple
+import threading
+import time
+import cv2
+import numpy as np
+
+Frame = namedtuple('Frame', ['timestamp', 'index', 'image'])
+Frame.__doc__ = """A captured frame.
+
+The timestamp is the clock time (in seconds) at which the frame was read and
+index counts the frames captured so far. The image is a buffer of the
+capture ring, which stays valid until the consumer asks for the next frame.
+"""
+
+
+class VideoSource:
+    """Reads frames from a video file, an image sequence or a webcam.
+
+    Args:
+        path (str or int): Anything cv2.VideoCapture opens, e.g. a video
+            file, an image sequence like 'frames/%03d.png' or a device index.
+        fps (float): (Optional) Plays the frames back at this rate, like a
+            camera would, instead of as fast as they can be decoded.
+        loop (bool): (Optional) Starts over at the end of the file.
+        clock (object): (Optional) Provides monotonic() and sleep(seconds),
+            the time module if not given.
+
+    Attributes:
+        shape (tuple): The (height, width, channels) of the frames.
+
+    Raises:
+        IOError: If the source can not be opened.
+
+    """
+    def __init__(self, path, fps=None, loop=False, clock=None):
+        self.path = path
+        self.period = 1.0 / fps if fps else None
+        self.loop = loop
+        self.clock = clock if clock is not None else time
+        self.capture = cv2.VideoCapture(path)
+        ok, first = self.capture.read()
+        if not ok:
+            raise IOError("can not read frames from {}".format(path))
+        self.shape = first.shape
+        self._first = first
+        self._next_time = None
+
+    def read(self, out):
+        """Reads the next frame into out.
+
+        Args:
+            out (numpy.ndarray): A uint8 array of the source shape.
+
+        Returns:
+            bool: False at the end of the source.
+
+        """
+        if self.period is not None:
+            now = self.clock.monotonic()
+            if self._next_time is None:
+                self._next_time = now
+            elif self._next_time > now:
+                self.clock.sleep(self._next_time - now)
+            self._next_time += self.period
+
+        if self._first is not None:
+            out[...] = self._first
+            self._first = None
+            return True
+        ok, image = self.capture.read(out)
+        if not ok and self.loop:
+            self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, image = self.capture.read(out)
+        if ok and image is not out:
+            out[...] = image
+        return ok
+
+    def close(self):
+        """Releases the file or device."""
+        self.capture.release()
+
+
+class CaptureThread(threading.Thread):
+    """Captures frames in a background thread into a ring of buffers.
+
+    The newest frame is published by swapping buffer indices, never by
+    copying. With at least three buffers there is always one that is neither
+    the newest frame nor the one the consumer is working on, which the next
+    frame is captured into. There should be one consumer.
+
+    Args:
+        source (object): The frame source (see VideoSource).
+        buffers (int): (Optional) The number of frame buffers, at least 3.
+        max_dimension (int): (Optional) Scales the frames so their longest
+            side has this many pixels, on the capture thread.
+        clock (object): (Optional) Provides monotonic(), for the timestamps.
+
+    Attributes:
+        shape (tuple): The (height, width, channels) of the published frames.
+        frames (int): The number of frames captured.
+        dropped (int): The number of frames replaced before they were read.
+        errors (int): The number of reads that raised an exception.
+        finished (bool): Whether the source ran out of frames.
+
+    Raises:
+        ValueError: If there are fewer than three buffers.
+
+    """
+    def __init__(self, source, buffers=3, max_dimension=None, clock=None):
+        super().__init__(name='CaptureThread', daemon=True)
+        if buffers < 3:
+            raise ValueError("the capture needs at least 3 buffers")
+        self.source = source
+        self.monotonic = (clock.monotonic
+                          if clock is not None else time.monotonic)
+
+        height, width = source.shape[:2]
+        self._raw = None
+        if max_dimension is not None:
+            scale = max_dimension / max(height, width)
+            self._raw = np.empty(source.shape, np.uint8)
+            height, width = round(height * scale), round(width * scale)
+        self.shape = (height, width) + tuple(source.shape[2:])
+        self._buffers = [np.empty(self.shape, np.uint8) for _ in range(buffers)]
+
+        self.frames = 0
+        self.dropped = 0
+        self.errors = 0
+        self.finished = False
+        self._latest = None  # the newest Frame
+        self._latest_slot = None
+        self._held_slot = None  # the slot the consumer is working on
+        self._read = True  # whether the newest frame was taken
+        self._new_frame = threading.Condition()
+        self._stop_event = threading.Event()
+
+    def _freeSlot(self):
+        with self._new_frame:
+            busy = (self._latest_slot, self._held_slot)
+        for slot in range(len(self._buffers)):
+            if slot not in busy:
+                return slot
+
+    def run(self):
+        """Captures frames until stop() is called or the source ends."""
+        while not self._stop_event.is_set():
+            slot = self._freeSlot()
+            buffer = self._buffers[slot]
+            try:
+                if self._raw is None:
+                    ok = self.source.read(buffer)
+                else:
+                    ok = self.source.read(self._raw)
+                    if ok:
+                        cv2.resize(self._raw, (self.shape[1], self.shape[0]),
+                                   dst=buffer,
+                                   interpolation=cv2.INTER_AREA)
+            except Exception:
+                # a failed read only skips this frame
+                self.errors += 1
+                self._stop_event.wait(0.01)
+                continue
+            if not ok:
+                break
+            timestamp = self.monotonic()
+
+            with self._new_frame:
+                if not self._read:
+                    self.dropped += 1
+                self.frames += 1
+                self._latest = Frame(timestamp, self.frames, buffer)
+                self._latest_slot = slot
+                self._read = False
+                self._new_frame.notify_all()
+
+        with self._new_frame:
+            self.finished = True
+            self._new_frame.notify_all()
+
+    def _take(self):
+        """Hands the newest frame to the consumer."""
+        self._held_slot = self._latest_slot
+        self._read = True
+        return self._latest
+
+    def latest(self):
+        """Returns the newest frame without waiting.
+
+        The frame returned before is released, so its image must no longer
+        be used.
+
+        Returns:
+            Frame: The newest frame, or None before the first frame.
+
+        """
+        with self._new_frame:
+            return self._take()
+
+    def waitForFrame(self, previous=None, timeout=None):
+        """Waits until there is a frame newer than 'previous'.
+
+        Args:
+            previous (Frame): (Optional) The last frame the caller has seen.
+            timeout (float): (Optional) The maximum time to wait (in seconds).
+
+        Returns:
+            Frame: The newest frame, which is still 'previous' on timeout or
+                at the end of the source.
+
+        """
+        with self._new_frame:
+            self._new_frame.wait_for(
+                lambda: self._latest is not previous or self.finished,
+                timeout)
+            return self._take()
+
+    def stop(self):
+        """Stops capturing."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -8,9 +8,13 @@ class HorizonDetector:
     BlurType = Enum('BlurType',
                     'Box_Blur Gaussian_Blur Median_Filter Bilateral_Filter')
 
-    def __init__(self):
+    def __init__(self, min_length=175.0):
         """
         Initializes all values to presets or None if need to be set
+
+        Args:
+            min_length (float): (Optional) The length of the shortest line
+                kept, in pixels.
         """
         self.__blur_type = HorizonDetector.BlurType.Box_Blur
         self.__blur_radius = 3.30188679245283
@@ -22,7 +26,7 @@ class HorizonDetector:
         self.find_lines_output = None
 
         self.__filter_lines_lines = self.find_lines_output
-        self.__filter_lines_min_length = 175.0
+        self.__filter_lines_min_length = min_length
         self.__filter_lines_angle = [0, 199.572192513369]
 
         self.filter_lines_output = None
@@ -83,6 +87,13 @@ class HorizonDetector:
             return math.degrees(
                 math.atan2(self.y2 - self.y1, self.x2 - self.x1))
 
+        def y_at(self, x):
+            """Returns the height of the (extended) line at column x."""
+            if self.x2 == self.x1:
+                return (self.y1 + self.y2) / 2.0
+            slope = (self.y2 - self.y1) / (self.x2 - self.x1)
+            return self.y1 + slope * (x - self.x1)
+
     @staticmethod
     def __find_lines(input):
         """Finds all line segments in an image.
@@ -98,13 +109,10 @@ class HorizonDetector:
             tmp = cv2.cvtColor(input, cv2.COLOR_BGR2GRAY)
             lines = detector.detect(tmp)
         output = []
-        if len(lines) != 0:
-            for i in range(1, len(lines[0])):
-                tmp = HorizonDetector.Line(lines[0][i, 0][0], lines[0][i,
-                                                                       0][1],
-                                           lines[0][i, 0][2], lines[0][i,
-                                                                       0][3])
-                output.append(tmp)
+        if lines[0] is not None:
+            # one (x1, y1, x2, y2) row per line, (N, 1, 4) in OpenCV 4
+            for x1, y1, x2, y2 in lines[0].reshape(-1, 4):
+                output.append(HorizonDetector.Line(x1, y1, x2, y2))
         return output
 
     @staticmethod
@@ -125,3 +133,13 @@ class HorizonDetector:
                             and line.angle() + 180.0 <= angle[1])):
                     outputs.append(line)
         return outputs
+
+    def find_horizon(self):
+        """Returns the longest line found, which is taken as the horizon.
+
+        Returns:
+            Line: The longest filtered line, or None if there is none.
+        """
+        if not self.filter_lines_output:
+            return None
+        return max(self.filter_lines_output, key=HorizonDetector.Line.length)
@@ -2,6 +2,7 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join('..', '')))
 
 import cv2
+import numpy as np
 from enum import Enum
 from utils import find_distances, get_coords, find_distance_largest_contour
 
@@ -12,6 +13,11 @@ class BuoyDetector:
     and an outline of the buoys. It returns the coordinates of the largest buoy 
     found.
 
+    One detector should be kept for the whole video stream. The intermediate
+    images are written into buffers that are allocated once, sized to the
+    frame, and reused by every call to process. A frame of a different size
+    reallocates them.
+
     Args:
         img_height: the height of the camera output.
         img_width: the width of the camera output.
@@ -75,8 +81,20 @@ class BuoyDetector:
 
         self.filter_contours_output = None
 
+        self.__allocate(img_height, img_width)
+
+    def __allocate(self, height, width):
+        """Allocates the intermediate images for frames of the given size."""
+        self.rgb_threshold_output = np.empty((height, width), np.uint8)
+        self.cv_erode_output = np.empty((height, width), np.uint8)
+        self.blur_output = np.empty((height, width), np.uint8)
+        self.cv_dilate_output = np.empty((height, width), np.uint8)
+
     def process(self, source0):
         """Runs the pipeline and sets all outputs to new values."""
+        if source0.shape[:2] != self.rgb_threshold_output.shape:
+            self.__allocate(source0.shape[0], source0.shape[1])
+
         # Step RGB_Threshold0:
         self.__rgb_threshold_input = source0
         (self.rgb_threshold_output) = self.__rgb_threshold(
@@ -84,6 +102,7 @@ class BuoyDetector:
             self.__rgb_threshold_red,
             self.__rgb_threshold_green,
             self.__rgb_threshold_blue,
+            self.rgb_threshold_output,
         )
 
         # Step CV_erode0:
@@ -95,12 +114,13 @@ class BuoyDetector:
             self.__cv_erode_iterations,
             self.__cv_erode_bordertype,
             self.__cv_erode_bordervalue,
+            self.cv_erode_output,
         )
 
         # Step Blur0:
         self.__blur_input = self.cv_erode_output
         (self.blur_output) = self.__blur(self.__blur_input, self.__blur_type,
-                                         self.__blur_radius)
+                                         self.__blur_radius, self.blur_output)
 
         # Step CV_dilate0:
         self.__cv_dilate_src = self.blur_output
@@ -111,6 +131,7 @@ class BuoyDetector:
             self.__cv_dilate_iterations,
             self.__cv_dilate_bordertype,
             self.__cv_dilate_bordervalue,
+            self.cv_dilate_output,
         )
 
         # Step Find_Contours0:
@@ -136,24 +157,34 @@ class BuoyDetector:
         )
 
     @staticmethod
-    def __rgb_threshold(input, red, green, blue):
+    def __rgb_threshold(input, red, green, blue, dst=None):
         """Segment an image based on color ranges.
 
+        The bounds are given in BGR order, so the frame is thresholded without
+        converting it to RGB first.
+
         Args:
             input (numpy.ndarray): A BGR numpy.ndarray.
             red (list): A list of two numbers the are the min and max red.
             green (list): A list of two numbers the are the min and max green.
             blue (list): A list of two numbers the are the min and max blue.
+            dst (numpy.ndarray): (Optional) The array the output is written to.
 
         Returns:
             numpy.ndarray: A black and white numpy.ndarray.
         """
-        out = cv2.cvtColor(input, cv2.COLOR_BGR2RGB)
-        return cv2.inRange(out, (red[0], green[0], blue[0]),
-                           (red[1], green[1], blue[1]))
+        return cv2.inRange(input, (blue[0], green[0], red[0]),
+                           (blue[1], green[1], red[1]),
+                           dst=dst)
 
     @staticmethod
-    def __cv_erode(src, kernel, anchor, iterations, border_type, border_value):
+    def __cv_erode(src,
+                   kernel,
+                   anchor,
+                   iterations,
+                   border_type,
+                   border_value,
+                   dst=None):
         """Expands area of lower value in an image.
 
         Args:
@@ -162,6 +193,7 @@ class BuoyDetector:
            iterations (int): the number of times to erode.
            border_type (Enum): Opencv enum that represents a border type.
            border_value (int): value to be used for a constant border.
+           dst (numpy.ndarray): (Optional) The array the output is written to.
 
         Returns:
             numpy.ndarray: A numpy.ndarray after erosion.
@@ -169,39 +201,52 @@ class BuoyDetector:
         return cv2.erode(
             src,
             kernel,
-            anchor,
+            dst=dst,
+            anchor=anchor,
             iterations=(int)(iterations + 0.5),
             borderType=border_type,
             borderValue=border_value,
         )
 
     @staticmethod
-    def __blur(src, type, radius):
+    def __blur(src, type, radius, dst=None):
         """Softens an image using one of several filters.
 
         Args:
             src (numpy.ndarray): The source mat.
             type (int): The blurType to perform represented as an int.
             radius (float): The radius for the blur as a float.
+            dst (numpy.ndarray): (Optional) The array the output is written to.
 
         Returns:
             numpy.ndarray: A numpy.ndarray that has been blurred.
         """
         if type is BuoyDetector.BlurType.Box_Blur:
             ksize = int(2 * round(radius) + 1)
-            return cv2.blur(src, (ksize, ksize))
+            return cv2.blur(src, (ksize, ksize), dst=dst)
         elif type is BuoyDetector.BlurType.Gaussian_Blur:
             ksize = int(6 * round(radius) + 1)
-            return cv2.GaussianBlur(src, (ksize, ksize), round(radius))
+            return cv2.GaussianBlur(src, (ksize, ksize),
+                                    round(radius),
+                                    dst=dst)
         elif type is BuoyDetector.BlurType.Median_Filter:
             ksize = int(2 * round(radius) + 1)
-            return cv2.medianBlur(src, ksize)
+            return cv2.medianBlur(src, ksize, dst=dst)
         else:
-            return cv2.bilateralFilter(src, -1, round(radius), round(radius))
+            return cv2.bilateralFilter(src,
+                                       -1,
+                                       round(radius),
+                                       round(radius),
+                                       dst=dst)
 
     @staticmethod
-    def __cv_dilate(src, kernel, anchor, iterations, border_type,
-                    border_value):
+    def __cv_dilate(src,
+                    kernel,
+                    anchor,
+                    iterations,
+                    border_type,
+                    border_value,
+                    dst=None):
         """Expands area of higher value in an image.
 
         Args:
@@ -210,6 +255,7 @@ class BuoyDetector:
            iterations (int): the number of times to dilate.
            border_type (Enum): Opencv enum that represents a border type.
            border_value (int): value to be used for a constant border.
+           dst (numpy.ndarray): (Optional) The array the output is written to.
 
         Returns:
             numpy.ndarray: A numpy.ndarray after dilation.
@@ -217,7 +263,8 @@ class BuoyDetector:
         return cv2.dilate(
             src,
             kernel,
-            anchor,
+            dst=dst,
+            anchor=anchor,
             iterations=(int)(iterations + 0.5),
             borderType=border_type,
             borderValue=border_value,
@@ -14,6 +14,7 @@ def start():
     camera.resolution = (640, 480)
     camera.framerate = 32
     rawCapture = PiRGBArray(camera, size=(640, 480))
+    bd = BuoyDetector()
 
     time.sleep(2.0)
 
@@ -22,11 +23,11 @@ def start():
     for frame in camera.capture_continuous(rawCapture,
                                            format="bgr",
                                            use_video_port=True):
-        run(frame,rawCapture)
+        run(frame, rawCapture, bd)
 
 
-def run(frame,rawCapture):
-    """Creates a detector object that proesses camera feed."""
+def run(frame, rawCapture, bd):
+    """Processes one frame of the camera feed with the detector bd."""
     
     frame = frame.array
 
@@ -34,7 +35,6 @@ def run(frame,rawCapture):
     scale = 700 / max_dimension
     frame = cv2.resize(frame, None, fx=scale, fy=scale)
 
-    bd = BuoyDetector()
     bd.process(frame)
 
     contours = bd.find_contours_output
@@ -1,4 +1,4 @@
-from buoyDetector import BuoyDetector
+from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
 import cv2
 import numpy as np
 import time
@@ -6,8 +6,9 @@ import time
 
 def main():
     """Sets initial values of the camera, then begins loop for running the 
-    detector, which creates a detector object that proesses camera feed."""
+    detector, which reuses one detector object to process the camera feed."""
     vid = cv2.VideoCapture(0)
+    bd = BuoyDetector()
 
     print("Press q to quit.")
     while (True):
@@ -16,7 +17,6 @@ def main():
         max_dimension = max(frame.shape)
         scale = 700 / max_dimension
         frame = cv2.resize(frame, None, fx=scale, fy=scale)
-        bd = BuoyDetector()
         bd.process(frame)
 
         contours = bd.find_contours_output
@@ -0,0 +1,195 @@
+import math
+import cv2
+import numpy as np
+from nav_algo.computer_vision.detectors.HorizonDetector import HorizonDetector
+from nav_algo.computer_vision.detectors.pipeline import DetectorGraph
+from nav_algo.computer_vision.detectors.utils import FOCAL_LENGTH, SENSOR_HEIGHT
+
+
+class HorizonBandDetector:
+    """Runs detectors only on a band of the frame around the horizon.
+
+    Buoys and boats float on the horizon, so the sky above it and the hull
+    below it are never searched. The horizon is estimated on a downscaled
+    frame every 'refresh' frames. In between, the cached estimate is moved
+    by the change in pitch and turned by the change in roll since it was
+    made. Pitch is positive bow up and roll positive to starboard, both in
+    degrees.
+
+    Detection is coarse to fine. The color threshold (the first stage of
+    every detector) runs on the downscaled band first. If nothing in the
+    band has the right color, the detectors are not run at all. Otherwise
+    the full detector pipelines only run on the columns around the coarse
+    candidates. The contours are moved back to frame coordinates, so the
+    distances of the detectors do not change. The intermediate masks keep
+    the size of the searched region, and are views of buffers of the whole
+    frame that every region reuses.
+
+    Without a horizon estimate (e.g. in fog), the whole frame is searched
+    until the next estimate.
+
+    Args:
+        detectors (list): Detectors with a stages() method (see
+            pipeline.DetectorGraph).
+        img_height (int): (Optional) The height of the frames.
+        img_width (int): (Optional) The width of the frames.
+        band (float): (Optional) The height of the band, as a fraction of the
+            frame height.
+        scale (float): (Optional) The scale of the horizon estimate and the
+            coarse pass.
+        refresh (int): (Optional) How many frames a horizon estimate is used.
+        margin (int): (Optional) The pixels searched on each side of the
+            coarse candidates, at least the reach of the blur and dilation.
+        max_tilt (float): (Optional) The largest horizon angle accepted from
+            the line detector, in degrees.
+
+    Attributes:
+        horizon (tuple): The (angle, height) of the horizon in the last frame,
+            in degrees and pixels from the top at the center column, or None.
+        region (tuple): The (top, bottom, left, right) of the region the
+            detectors ran on in the last frame, or None if they did not run.
+        pixels (int): The number of pixels the detectors ran on in the last
+            frame.
+        estimates (int): The number of horizon estimates made.
+
+    """
+    def __init__(self,
+                 detectors,
+                 img_height=480,
+                 img_width=640,
+                 band=0.3,
+                 scale=0.25,
+                 refresh=10,
+                 margin=64,
+                 max_tilt=30.0):
+        self.detectors = list(detectors)
+        self.img_height = img_height
+        self.img_width = img_width
+        self.band = band
+        self.scale = scale
+        self.refresh = refresh
+        self.margin = margin
+        self.max_tilt = max_tilt
+
+        self.horizon = None
+        self.region = None
+        self.pixels = 0
+        self.estimates = 0
+
+        self.__thresholds = [d.stages()[0] for d in self.detectors]
+        self.__horizon_detector = HorizonDetector(min_length=175.0 * scale)
+        self.__estimate = None  # (angle, height, pitch, roll)
+        self.__age = refresh  # the first frame is estimated
+        self.__graph = DetectorGraph(self.detectors, img_height, img_width)
+
+    def process(self, frame, pitch=None, roll=None):
+        """Runs the detectors on the band around the horizon of a frame.
+
+        Args:
+            frame (numpy.ndarray): A BGR image.
+            pitch (float): (Optional) The pitch of the boat, in degrees.
+            roll (float): (Optional) The roll of the boat, in degrees.
+
+        """
+        height, width = frame.shape[:2]
+        self.img_height, self.img_width = height, width
+        pitch = pitch or 0.0
+        roll = roll or 0.0
+
+        if self.__age >= self.refresh:
+            self.__estimateHorizon(frame, pitch, roll)
+        self.__age += 1
+
+        if self.__estimate is None:
+            self.horizon = None
+            top, bottom = 0, height
+        else:
+            self.horizon = self.__predict(pitch, roll)
+            angle, center = self.horizon
+            # the band covers the tilt of the horizon across the frame
+            rows = self.band * height + width * abs(
+                math.tan(math.radians(angle)))
+            rows = min(height, int(math.ceil(rows)))
+            top = int(round(center - rows / 2))
+            top = min(max(top, 0), height - rows)
+            bottom = top + rows
+        band = frame[top:bottom]
+
+        columns = self.__candidates(band)
+        if columns is None:
+            self.region = None
+            self.pixels = 0
+            for detector in self.detectors:
+                detector.find_contours_output = []
+                detector.filter_contours_output = []
+            return
+
+        left, right = columns
+        left = max(0, int(left / self.scale) - self.margin)
+        right = min(width, int(math.ceil(right / self.scale)) + self.margin)
+
+        region = band[:, left:right]
+        self.region = (top, bottom, left, right)
+        self.pixels = region.shape[0] * region.shape[1]
+        self.__graph.processRegion(region)
+
+        offset = np.array([left, top], np.int32)
+        shifted = {}
+        for detector in self.detectors:
+            for name in ('find_contours_output', 'filter_contours_output'):
+                contours = getattr(detector, name)
+                if id(contours) not in shifted:
+                    shifted[id(contours)] = [c + offset for c in contours]
+                setattr(detector, name, shifted[id(contours)])
+
+    def __estimateHorizon(self, frame, pitch, roll):
+        """Finds the horizon on the downscaled frame."""
+        self.__age = 0
+        self.estimates += 1
+        small = cv2.resize(frame,
+                           None,
+                           fx=self.scale,
+                           fy=self.scale,
+                           interpolation=cv2.INTER_AREA)
+        self.__horizon_detector.process(small)
+        lines = [
+            line for line in self.__horizon_detector.filter_lines_output
+            if abs(self.__level(line.angle())) <= self.max_tilt
+        ]
+        if not lines:
+            self.__estimate = None
+            return
+        line = max(lines, key=HorizonDetector.Line.length)
+        center = float(line.y_at(small.shape[1] / 2)) / self.scale
+        self.__estimate = (self.__level(line.angle()), center, pitch, roll)
+
+    def __predict(self, pitch, roll):
+        """Moves the cached horizon by the attitude change since it was found."""
+        angle, center, estimate_pitch, estimate_roll = self.__estimate
+        focal_length = FOCAL_LENGTH / SENSOR_HEIGHT * self.img_height
+        center += focal_length * math.tan(math.radians(pitch -
+                                                       estimate_pitch))
+        angle -= roll - estimate_roll
+        return angle, center
+
+    def __candidates(self, band):
+        """Returns the (left, right) columns of the downscaled band that
+        pass a color threshold, or None."""
+        small = cv2.resize(band,
+                           None,
+                           fx=self.scale,
+                           fy=self.scale,
+                           interpolation=cv2.INTER_AREA)
+        found = None
+        for stage in self.__thresholds:
+            mask = stage.function(small, *stage.params)
+            found = mask if found is None else cv2.bitwise_or(found, mask)
+        columns = np.flatnonzero(found.any(axis=0))
+        if columns.size == 0:
+            return None
+        return columns[0], columns[-1] + 1
+
+    @staticmethod
+    def __level(angle):
+        """Returns a line angle in [-90, 90) degrees, 0 being level."""
+        return (angle + 90.0) % 180.0 - 90.0
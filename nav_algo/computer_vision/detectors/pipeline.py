@@ -0,0 +1,310 @@
+"""
+Shared stages of the GRIP detector pipelines and a graph that runs them.
+
+A detector declares its pipeline as a list of Stages. A DetectorGraph merges
+the pipelines of several detectors into a tree, so a prefix of stages with
+the same functions and parameters is computed once per frame for all of
+them, and the pipelines only fork at the first stage whose parameters
+differ. Every result is stored on each detector that shares it, in the
+attribute named by the stage, as if the detector had run on its own.
+"""
+from collections import namedtuple
+from enum import Enum
+import cv2
+import numpy as np
+
+BlurType = Enum('BlurType',
+                'Box_Blur Gaussian_Blur Median_Filter Bilateral_Filter')
+
+Stage = namedtuple('Stage', ['output', 'function', 'params', 'mask'])
+Stage.__new__.__defaults__ = (False, )
+Stage.__doc__ = """One step of a detector pipeline.
+
+function is called with the output of the previous stage (the frame for the
+first one) followed by params, which must be hashable. output is the name of
+the detector attribute the result is stored in. The result of a mask stage
+is an 8-bit image the size of the frame, written into a buffer (passed as
+dst) that is reused for every frame.
+"""
+
+
+def rgb_threshold(input, red, green, blue, dst=None):
+    """Segment an image based on color ranges.
+
+    The bounds are given in BGR order, so the frame is thresholded without
+    converting it to RGB first.
+
+    Args:
+        input (numpy.ndarray): A BGR numpy.ndarray.
+        red (list): A list of two numbers the are the min and max red.
+        green (list): A list of two numbers the are the min and max green.
+        blue (list): A list of two numbers the are the min and max blue.
+        dst (numpy.ndarray): (Optional) The array the output is written to.
+
+    Returns:
+        numpy.ndarray: A black and white numpy.ndarray.
+    """
+    return cv2.inRange(input, (blue[0], green[0], red[0]),
+                       (blue[1], green[1], red[1]),
+                       dst=dst)
+
+
+def cv_erode(src,
+             kernel,
+             anchor,
+             iterations,
+             border_type,
+             border_value,
+             dst=None):
+    """Expands area of lower value in an image.
+
+    Args:
+       src (numpy.ndarray): A numpy.ndarray.
+       kernel (numpy.ndarray): The kernel for erosion. A numpy.ndarray.
+       iterations (int): the number of times to erode.
+       border_type (Enum): Opencv enum that represents a border type.
+       border_value (int): value to be used for a constant border.
+       dst (numpy.ndarray): (Optional) The array the output is written to.
+
+    Returns:
+        numpy.ndarray: A numpy.ndarray after erosion.
+    """
+    return cv2.erode(src,
+                     kernel,
+                     dst=dst,
+                     anchor=anchor,
+                     iterations=(int)(iterations + 0.5),
+                     borderType=border_type,
+                     borderValue=border_value)
+
+
+def blur(src, type, radius, dst=None):
+    """Softens an image using one of several filters.
+
+    Args:
+        src (numpy.ndarray): The source mat.
+        type (int): The blurType to perform represented as an int.
+        radius (float): The radius for the blur as a float.
+        dst (numpy.ndarray): (Optional) The array the output is written to.
+
+    Returns:
+        numpy.ndarray: A numpy.ndarray that has been blurred.
+    """
+    if (type is BlurType.Box_Blur):
+        ksize = int(2 * round(radius) + 1)
+        return cv2.blur(src, (ksize, ksize), dst=dst)
+    elif (type is BlurType.Gaussian_Blur):
+        ksize = int(6 * round(radius) + 1)
+        return cv2.GaussianBlur(src, (ksize, ksize), round(radius), dst=dst)
+    elif (type is BlurType.Median_Filter):
+        ksize = int(2 * round(radius) + 1)
+        return cv2.medianBlur(src, ksize, dst=dst)
+    else:
+        return cv2.bilateralFilter(src,
+                                   -1,
+                                   round(radius),
+                                   round(radius),
+                                   dst=dst)
+
+
+def cv_dilate(src,
+              kernel,
+              anchor,
+              iterations,
+              border_type,
+              border_value,
+              dst=None):
+    """Expands area of higher value in an image.
+
+    Args:
+       src (numpy.ndarray): A numpy.ndarray.
+       kernel (numpy.ndarray): The kernel for dilation. A numpy.ndarray.
+       iterations (int): the number of times to dilate.
+       border_type (Enum): Opencv enum that represents a border type.
+       border_value (int): value to be used for a constant border.
+       dst (numpy.ndarray): (Optional) The array the output is written to.
+
+    Returns:
+        numpy.ndarray: A numpy.ndarray after dilation.
+    """
+    return cv2.dilate(src,
+                      kernel,
+                      dst=dst,
+                      anchor=anchor,
+                      iterations=(int)(iterations + 0.5),
+                      borderType=border_type,
+                      borderValue=border_value)
+
+
+def find_contours(input, external_only):
+    """Finds the contours of the shapes in a binary image.
+
+    Args:
+        input (numpy.ndarray): A numpy.ndarray.
+        external_only (bool): A boolean. If true only external contours are
+        found.
+
+    Returns:
+        list: A list of numpy.ndarray where each one represents a contour.
+    """
+    if (external_only):
+        mode = cv2.RETR_EXTERNAL
+    else:
+        mode = cv2.RETR_LIST
+    method = cv2.CHAIN_APPROX_SIMPLE
+    contours, hierarchy = cv2.findContours(input, mode=mode, method=method)
+    return contours
+
+
+def filter_contours(input_contours, min_area, min_perimeter, min_width,
+                    max_width, min_height, max_height, solidity,
+                    max_vertex_count, min_vertex_count, min_ratio, max_ratio):
+    """Filters out contours that do not meet certain criteria.
+
+    Args:
+        input_contours (list): Contours as a list of numpy.ndarray.
+        min_area (float): The minimum area of a contour that will be kept.
+        min_perimeter (float): The minimum perimeter of a contour that will
+        be kept.
+        min_width (float): Minimum width of a contour.
+        max_width (float): MaxWidth maximum width.
+        min_height (float): Minimum height.
+        max_height (float): Maximimum height.
+        solidity (list): The minimum and maximum solidity of a contour.
+        min_vertex_count (int): Minimum vertex Count of the contours.
+        max_vertex_count (int): Maximum vertex Count.
+        min_ratio (float): Minimum ratio of width to height.
+        max_ratio (float): Maximum ratio of width to height.
+
+    Returns:
+        list: Contours as a list of numpy.ndarray.
+    """
+    output = []
+    for contour in input_contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if (w < min_width or w > max_width):
+            continue
+        if (h < min_height or h > max_height):
+            continue
+        area = cv2.contourArea(contour)
+        if (area < min_area):
+            continue
+        if (cv2.arcLength(contour, True) < min_perimeter):
+            continue
+        hull = cv2.convexHull(contour)
+        solid = 100 * area / cv2.contourArea(hull)
+        if (solid < solidity[0] or solid > solidity[1]):
+            continue
+        if (len(contour) < min_vertex_count
+                or len(contour) > max_vertex_count):
+            continue
+        ratio = (float)(w) / h
+        if (ratio < min_ratio or ratio > max_ratio):
+            continue
+        output.append(contour)
+    return output
+
+
+class _Node:
+    """A stage of the graph, shared by every detector in detectors."""
+    def __init__(self, stage):
+        self.stage = stage
+        self.detectors = []
+        self.children = {}
+        self.buffer = None
+        self.output = None
+
+
+class DetectorGraph:
+    """Runs the pipelines of several detectors, sharing their common stages.
+
+    Args:
+        detectors (list): Objects with a stages() method that returns their
+            pipeline as a list of Stages.
+        img_height (int): (Optional) The frame height the mask buffers are
+            first allocated for.
+        img_width (int): (Optional) The frame width the mask buffers are
+            first allocated for.
+
+    Attributes:
+        detectors (list): The detectors, in the given order.
+        node_count (int): The number of stages run per frame.
+
+    """
+    def __init__(self, detectors, img_height=480, img_width=640):
+        self.detectors = list(detectors)
+        self.__roots = {}
+        self.__nodes = []
+        for detector in self.detectors:
+            children = self.__roots
+            for stage in detector.stages():
+                key = (stage.function, stage.params)
+                node = children.get(key)
+                if node is None:
+                    node = _Node(stage)
+                    children[key] = node
+                    self.__nodes.append(node)
+                node.detectors.append(detector)
+                children = node.children
+        self.node_count = len(self.__nodes)
+
+        self.__shape = None
+        self.allocate(img_height, img_width)
+
+    def allocate(self, height, width):
+        """Allocates the mask buffers for frames of the given size."""
+        self.__shape = (height, width)
+        for node in self.__nodes:
+            if node.stage.mask:
+                node.buffer = np.empty((height, width), np.uint8)
+                node.output = node.buffer
+                for detector in node.detectors:
+                    setattr(detector, node.stage.output, node.output)
+
+    def process(self, frame):
+        """Runs every detector pipeline on a frame.
+
+        Args:
+            frame (numpy.ndarray): A BGR image.
+
+        """
+        if frame.shape[:2] != self.__shape:
+            self.allocate(frame.shape[0], frame.shape[1])
+        self.__run(frame)
+
+    def processRegion(self, region):
+        """Runs every detector pipeline on a region of a frame.
+
+        The masks are written into the top left corner of the buffers, so
+        regions of any size share the buffers of the whole frame, and the
+        mask attributes of the detectors are views of the size of the
+        region. The buffers only grow for a region larger than them.
+
+        Args:
+            region (numpy.ndarray): A BGR image (e.g. a view of a frame).
+
+        """
+        height, width = region.shape[:2]
+        if height > self.__shape[0] or width > self.__shape[1]:
+            self.allocate(max(height, self.__shape[0]),
+                          max(width, self.__shape[1]))
+        self.__run(region)
+
+    def __run(self, frame):
+        """Runs the stages on a frame that fits in the buffers."""
+        height, width = frame.shape[:2]
+        pending = [(node, frame) for node in self.__roots.values()]
+        while pending:
+            node, input = pending.pop()
+            stage = node.stage
+            if stage.mask:
+                dst = node.buffer
+                if dst.shape != (height, width):
+                    dst = dst[:height, :width]
+                node.output = stage.function(input, *stage.params, dst=dst)
+            else:
+                node.output = stage.function(input, *stage.params)
+            for detector in node.detectors:
+                setattr(detector, stage.output, node.output)
+            pending.extend(
+                (child, node.output) for child in node.children.values())
@@ -0,0 +1,262 @@
+from collections import namedtuple
+import bisect
+import threading
+import time
+
+StageStats = namedtuple(
+    'StageStats',
+    ['name', 'rate', 'runs', 'mean', 'max', 'overruns', 'histogram'])
+StageStats.__doc__ = """The run times (in seconds) of a control loop stage.
+
+Attributes:
+    name (str): The name of the stage.
+    rate (float): How often the stage is scheduled (in Hz).
+    runs (int): The number of times the stage ran.
+    mean (float): The mean run time.
+    max (float): The longest run time.
+    overruns (int): The number of times an asynchronous stage was still
+        running when it was due again (so that run was skipped).
+    histogram (list of (float, int)): The number of runs that took at most
+        each bin's upper bound (the last bound is infinite).
+"""
+
+LoopStats = namedtuple(
+    'LoopStats', ['rate', 'target_rate', 'ticks', 'deadline_misses', 'stages'])
+LoopStats.__doc__ = """The achieved rate and deadline misses of a control loop and its stages."""
+
+
+class TimingHistogram:
+    """A histogram of durations with fixed, roughly logarithmic bins.
+
+    Args:
+        bounds (list of float): (Optional) The upper bounds of the bins (in seconds).
+
+    """
+    BOUNDS = [
+        0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1,
+        0.2, 0.5, 1.0
+    ]
+
+    def __init__(self, bounds=None):
+        self.bounds = list(bounds if bounds is not None else
+                           TimingHistogram.BOUNDS) + [float('inf')]
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration):
+        """Adds a duration (in seconds) to the histogram."""
+        self.counts[bisect.bisect_left(self.bounds, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def mean(self):
+        """Returns the mean duration, or 0 if there are none."""
+        return self.total / self.count if self.count > 0 else 0.0
+
+    def bins(self):
+        """Returns the (upper bound, count) of every bin."""
+        return list(zip(self.bounds, self.counts))
+
+
+class Stage:
+    """A step of the control loop (e.g. sensing, planning or actuation).
+
+    Synchronous stages run on the control loop thread. Asynchronous stages
+    run on their own worker thread, so a slow stage (e.g. I/O) never delays
+    the stages after it: when it is due and the previous run has not
+    finished, the run is skipped and counted as an overrun.
+
+    Args:
+        name (str): The name of the stage.
+        function (callable): Runs the stage (takes no arguments).
+        every (int): Run the stage every 'every' ticks of the loop.
+        asynchronous (bool): (Optional) Run the stage on a worker thread.
+
+    """
+    def __init__(self, name, function, every, asynchronous=False):
+        self.name = name
+        self.function = function
+        self.every = every
+        self.asynchronous = asynchronous
+        self.histogram = TimingHistogram()
+        self.overruns = 0
+        self.error = None
+        self._pending = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stopped = False
+        self._worker = None
+        if asynchronous:
+            self._worker = threading.Thread(target=self._work,
+                                            name='Stage-' + name,
+                                            daemon=True)
+            self._worker.start()
+
+    def run(self):
+        """Runs the stage now, or hands it to its worker thread."""
+        if not self.asynchronous:
+            self._timed()
+        elif not self._idle.is_set():
+            self.overruns += 1
+        else:
+            self._idle.clear()
+            self._pending.set()
+
+    def _timed(self):
+        start = time.perf_counter()
+        self.function()
+        self.histogram.add(time.perf_counter() - start)
+
+    def _work(self):
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            if self._stopped:
+                break
+            try:
+                self._timed()
+            except Exception as e:
+                # re-raised on the control loop thread
+                self.error = e
+            self._idle.set()
+
+    def stop(self, timeout=None):
+        """Waits for the current run (if any) and stops the worker thread."""
+        if self._worker is not None:
+            self._idle.wait(timeout)
+            self._stopped = True
+            self._pending.set()
+            self._worker.join(timeout)
+
+    def stats(self, loop_rate):
+        """Returns the timing statistics of the stage.
+
+        Args:
+            loop_rate (float): The rate of the control loop (in Hz).
+
+        Returns:
+            StageStats: The statistics.
+
+        """
+        h = self.histogram
+        return StageStats(self.name, loop_rate / self.every, h.count,
+                          h.mean(), h.max, self.overruns, h.bins())
+
+
+class ControlLoop:
+    """Runs stages at fixed rates on a fixed period loop.
+
+    Ticks are scheduled on absolute deadlines (start + n * period), so the
+    time taken by the stages does not make the period drift. A tick that
+    ends after the next deadline is a deadline miss: the missed ticks are
+    skipped instead of run back to back.
+
+    Args:
+        rate (float): The rate of the loop (in Hz).
+        clock (object): (Optional) Provides monotonic() and sleep(seconds),
+            e.g. a Simulation to run faster than real time. The real clock
+            if not given.
+
+    Attributes:
+        period (float): The period of the loop (in seconds).
+        stages (list of Stage): The stages, in the order they run each tick.
+        ticks (int): The number of ticks run.
+        deadline_misses (int): The number of ticks that overran the period.
+
+    """
+    def __init__(self, rate, clock=None):
+        self.rate = rate
+        self.clock = clock
+        self.period = 1.0 / rate
+        self.stages = []
+        self.ticks = 0
+        self.deadline_misses = 0
+        self._start_time = None
+        self._stop_event = threading.Event()
+
+    def addStage(self, name, function, rate=None, asynchronous=False):
+        """Adds a stage that runs after the existing ones.
+
+        Args:
+            name (str): The name of the stage.
+            function (callable): Runs the stage (takes no arguments).
+            rate (float): (Optional) How often to run the stage (in Hz),
+                rounded to a whole number of ticks. Every tick if not given.
+            asynchronous (bool): (Optional) Run the stage on a worker thread.
+
+        Returns:
+            Stage: The new stage.
+
+        """
+        every = 1
+        if rate is not None:
+            every = max(1, int(round(self.rate / rate)))
+        stage = Stage(name, function, every, asynchronous)
+        self.stages.append(stage)
+        return stage
+
+    def tick(self):
+        """Runs the stages that are due this tick."""
+        for stage in self.stages:
+            if stage.error is not None:
+                error, stage.error = stage.error, None
+                raise error
+            if self.ticks % stage.every == 0:
+                stage.run()
+        self.ticks += 1
+
+    def run(self, condition=lambda: True):
+        """Runs the loop until stop() is called or 'condition' is False.
+
+        The condition is checked before every tick. The asynchronous stages
+        are stopped when the loop ends.
+
+        Args:
+            condition (callable): (Optional) Returns whether to keep running.
+
+        """
+        self._stop_event.clear()
+        monotonic = time.monotonic
+        sleep = self._stop_event.wait
+        if self.clock is not None:
+            monotonic = self.clock.monotonic
+            sleep = self.clock.sleep
+        self._start_time = monotonic()
+        next_time = self._start_time
+        try:
+            while not self._stop_event.is_set() and condition():
+                self.tick()
+                next_time += self.period
+                delay = next_time - monotonic()
+                if delay < 0:
+                    self.deadline_misses += 1
+                    # skip the ticks we missed
+                    next_time += self.period * int(-delay // self.period)
+                else:
+                    sleep(delay)
+        finally:
+            for stage in self.stages:
+                stage.stop(self.period)
+
+    def stop(self):
+        """Stops the loop after the current tick."""
+        self._stop_event.set()
+
+    def stats(self):
+        """Returns the achieved rate, deadline misses and stage timings.
+
+        Returns:
+            LoopStats: The statistics.
+
+        """
+        rate = 0.0
+        if self._start_time is not None and self.ticks > 1:
+            now = (self.clock.monotonic()
+                   if self.clock is not None else time.monotonic())
+            rate = self.ticks / (now - self._start_time)
+        return LoopStats(rate, self.rate, self.ticks, self.deadline_misses,
+                         [stage.stats(self.rate) for stage in self.stages])
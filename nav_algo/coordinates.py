@@ -1,3 +1,4 @@
+import math
 import numpy as np
 
 
@@ -7,20 +8,150 @@ class CoordinateSystem:
     An object of type CoordinateSystem can be used to initialize a vector inside 
     of a coordinate system with origin at LAT_OFFSET and LONG_OFFSET.
 
+    Positions are mapped to local x (east) and y (north) meters with one of
+    two projections. EQUIRECTANGULAR (the default) treats the Earth as a
+    sphere and is accurate to a few centimeters over a typical course, but the
+    error grows with the square of the distance from the origin.
+    TRANSVERSE_MERCATOR uses the WGS84 ellipsoid (the UTM formulas, with the
+    central meridian through the origin) and stays accurate to well below a
+    meter for courses several kilometers across.
+
     Args:
         latitude (float): The latitude of the origin of the system.
         longitude (float): The longitude of the origin of the system.
+        projection (str): (Optional) EQUIRECTANGULAR or TRANSVERSE_MERCATOR.
+
+    Raises:
+        ValueError: If the projection is unknown.
 
     Attributes:
         LAT_OFFSET (float): The latitude of the origin of the system.
         LONG_OFFSET (float): The longitude of the origin of the system.
         EARTH_RADIUS (float): The radius of the Earth (in meters).
+        projection (str): The projection between latitude/longitude and x/y.
 
     """
-    def __init__(self, latititude: float, longitude: float):
+    EQUIRECTANGULAR = 'equirectangular'
+    TRANSVERSE_MERCATOR = 'transverse_mercator'
+
+    # WGS84 ellipsoid
+    SEMI_MAJOR_AXIS = 6378137.0
+    FLATTENING = 1 / 298.257223563
+
+    def __init__(self,
+                 latititude: float,
+                 longitude: float,
+                 projection: str = EQUIRECTANGULAR):
+        if projection not in (CoordinateSystem.EQUIRECTANGULAR,
+                              CoordinateSystem.TRANSVERSE_MERCATOR):
+            raise ValueError('Unknown projection: {}'.format(projection))
+
         self.LAT_OFFSET = latititude
         self.LONG_OFFSET = longitude
         self.EARTH_RADIUS = 6371000.0
+        self.projection = projection
+
+        # meters per degree of longitude and latitude at the origin, so the
+        # equirectangular projection never recomputes the cosine term
+        deg_to_rad = math.pi / 180.0
+        self.x_scale = self.EARTH_RADIUS * math.cos(
+            latititude * deg_to_rad) * deg_to_rad
+        self.y_scale = self.EARTH_RADIUS * deg_to_rad
+
+        if projection == CoordinateSystem.TRANSVERSE_MERCATOR:
+            self._e2 = self.FLATTENING * (2 - self.FLATTENING)
+            self._ep2 = self._e2 / (1 - self._e2)
+            self._origin_arc = self._meridianArc(np.radians(latititude))
+
+    def project(self, latitudes, longitudes):
+        """Converts latitudes and longitudes to positions in the system.
+
+        Args:
+            latitudes (float or array of float): The latitudes of the positions.
+            longitudes (float or array of float): The longitudes of the positions.
+
+        Returns:
+            numpy.ndarray: The x components of the positions.
+            numpy.ndarray: The y components of the positions.
+
+        """
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        if self.projection == CoordinateSystem.EQUIRECTANGULAR:
+            return ((longitudes - self.LONG_OFFSET) * self.x_scale,
+                    (latitudes - self.LAT_OFFSET) * self.y_scale)
+
+        # Snyder, Map Projections: A Working Manual, eqs. 8-9 to 8-13
+        a, e2, ep2 = self.SEMI_MAJOR_AXIS, self._e2, self._ep2
+        lat = np.radians(latitudes)
+        sin_lat, cos_lat, tan_lat = np.sin(lat), np.cos(lat), np.tan(lat)
+        n = a / np.sqrt(1 - e2 * sin_lat**2)
+        t = tan_lat**2
+        c = ep2 * cos_lat**2
+        A = np.radians(longitudes - self.LONG_OFFSET) * cos_lat
+
+        xs = n * (A + (1 - t + c) * A**3 / 6 +
+                  (5 - 18 * t + t**2 + 72 * c - 58 * ep2) * A**5 / 120)
+        ys = (self._meridianArc(lat) - self._origin_arc + n * tan_lat *
+              (A**2 / 2 + (5 - t + 9 * c + 4 * c**2) * A**4 / 24 +
+               (61 - 58 * t + t**2 + 600 * c - 330 * ep2) * A**6 / 720))
+        return xs, ys
+
+    def unproject(self, xs, ys):
+        """Converts positions in the system to latitudes and longitudes.
+
+        This is the inverse of project.
+
+        Args:
+            xs (float or array of float): The x components of the positions.
+            ys (float or array of float): The y components of the positions.
+
+        Returns:
+            numpy.ndarray: The latitudes of the positions.
+            numpy.ndarray: The longitudes of the positions.
+
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        if self.projection == CoordinateSystem.EQUIRECTANGULAR:
+            return (ys / self.y_scale + self.LAT_OFFSET,
+                    xs / self.x_scale + self.LONG_OFFSET)
+
+        # Snyder, Map Projections: A Working Manual, eqs. 8-17 to 8-25
+        a, e2, ep2 = self.SEMI_MAJOR_AXIS, self._e2, self._ep2
+        mu = (self._origin_arc + ys) / (a * (1 - e2 / 4 - 3 * e2**2 / 64 -
+                                             5 * e2**3 / 256))
+        e1 = (1 - math.sqrt(1 - e2)) / (1 + math.sqrt(1 - e2))
+        lat1 = (mu + (3 * e1 / 2 - 27 * e1**3 / 32) * np.sin(2 * mu) +
+                (21 * e1**2 / 16 - 55 * e1**4 / 32) * np.sin(4 * mu) +
+                (151 * e1**3 / 96) * np.sin(6 * mu) +
+                (1097 * e1**4 / 512) * np.sin(8 * mu))
+
+        sin_lat1, cos_lat1, tan_lat1 = np.sin(lat1), np.cos(lat1), np.tan(lat1)
+        c1 = ep2 * cos_lat1**2
+        t1 = tan_lat1**2
+        n1 = a / np.sqrt(1 - e2 * sin_lat1**2)
+        r1 = a * (1 - e2) / (1 - e2 * sin_lat1**2)**1.5
+        d = xs / n1
+
+        lat = lat1 - (n1 * tan_lat1 / r1) * (
+            d**2 / 2 -
+            (5 + 3 * t1 + 10 * c1 - 4 * c1**2 - 9 * ep2) * d**4 / 24 +
+            (61 + 90 * t1 + 298 * c1 + 45 * t1**2 - 252 * ep2 - 3 * c1**2) *
+            d**6 / 720)
+        long = (d - (1 + 2 * t1 + c1) * d**3 / 6 +
+                (5 - 2 * c1 + 28 * t1 - 3 * c1**2 + 8 * ep2 + 24 * t1**2) *
+                d**5 / 120) / cos_lat1
+        return np.degrees(lat), np.degrees(long) + self.LONG_OFFSET
+
+    def _meridianArc(self, lat):
+        """Calculates the distance along the meridian from the equator to a latitude (in radians)."""
+        a, e2 = self.SEMI_MAJOR_AXIS, self._e2
+        return a * ((1 - e2 / 4 - 3 * e2**2 / 64 - 5 * e2**3 / 256) * lat -
+                    (3 * e2 / 8 + 3 * e2**2 / 32 + 45 * e2**3 / 1024) *
+                    np.sin(2 * lat) +
+                    (15 * e2**2 / 256 + 45 * e2**3 / 1024) * np.sin(4 * lat) -
+                    (35 * e2**3 / 3072) * np.sin(6 * lat))
 
 
 class Vector:
@@ -29,7 +160,13 @@ class Vector:
     To construct a position vector, pass in a CoordinateSystem and a latitude
     and longitude. To specify only the x and y components, pass in x and y.
     Alternatively, to construct a unit vector with a given angle, 
-    pass in an angle.
+    pass in an angle. The fromXY, fromPolar and fromLatLon constructors skip
+    the keyword dispatch and should be preferred in hot code.
+
+    Vectors use __slots__ and plain floats, support the usual arithmetic
+    operators (+, -, * and / by a scalar, unary -), and have in-place
+    variants (iadd, isub, iscale) that update the vector without allocating
+    a new one.
 
     Args:
         coord_sys (CoordinateSystem): (Optional) The coordinate system in which the vector lies.
@@ -47,6 +184,8 @@ class Vector:
         longitude (float): (Optional) The longitude of the position.
 
     """
+    __slots__ = ('x', 'y', 'coordinate_system', 'latitude', 'longitude')
+
     def __init__(self,
                  coord_sys=None,
                  latitude=None,
@@ -57,26 +196,109 @@ class Vector:
         if (coord_sys is not None) and (latitude
                                         is not None) and (longitude
                                                           is not None):
-            self.coordinate_system = coord_sys
-            self.latitude = latitude
-            self.longitude = longitude
-
-            shifted_long = longitude - coord_sys.LONG_OFFSET
-            shifted_lat = latitude - coord_sys.LAT_OFFSET
-            deg_to_rad = np.pi / 180.0
-
-            self.x = coord_sys.EARTH_RADIUS * np.cos(
-                coord_sys.LAT_OFFSET * deg_to_rad) * deg_to_rad * shifted_long
-            self.y = coord_sys.EARTH_RADIUS * deg_to_rad * shifted_lat
+            self._setLatLon(coord_sys, latitude, longitude)
 
         elif angle is not None:
-            self.x = np.cos(degToRad(angle))
-            self.y = np.sin(degToRad(angle))
+            rad = math.radians(angle)
+            self.x = math.cos(rad)
+            self.y = math.sin(rad)
 
         elif (x is not None) and (y is not None):
             self.x = x
             self.y = y
 
+    @classmethod
+    def fromXY(cls, x, y):
+        """Constructs a vector from its x and y components.
+
+        Args:
+            x (float): The x component of the vector.
+            y (float): The y component of the vector.
+
+        Returns:
+            Vector: The vector (x, y).
+
+        """
+        v = cls.__new__(cls)
+        v.x = x
+        v.y = y
+        return v
+
+    @classmethod
+    def fromPolar(cls, angle, magnitude=1.0):
+        """Constructs a vector from its angle and magnitude.
+
+        Args:
+            angle (float): The angle between the vector and the x-axis (in degrees).
+            magnitude (float): (Optional) The magnitude of the vector, 1 by default.
+
+        Returns:
+            Vector: The vector with the given angle and magnitude.
+
+        """
+        rad = math.radians(angle)
+        return cls.fromXY(magnitude * math.cos(rad), magnitude * math.sin(rad))
+
+    @classmethod
+    def fromLatLon(cls, coord_sys, latitude, longitude):
+        """Constructs a position vector from a latitude and longitude.
+
+        Args:
+            coord_sys (CoordinateSystem): The coordinate system in which the vector lies.
+            latitude (float): The latitude of the position.
+            longitude (float): The longitude of the position.
+
+        Returns:
+            Vector: The position in the coordinate system.
+
+        """
+        v = cls.__new__(cls)
+        v._setLatLon(coord_sys, latitude, longitude)
+        return v
+
+    def _setLatLon(self, coord_sys, latitude, longitude):
+        """Sets the position from a latitude and longitude."""
+        self.coordinate_system = coord_sys
+        self.latitude = latitude
+        self.longitude = longitude
+
+        if coord_sys.projection == CoordinateSystem.EQUIRECTANGULAR:
+            self.x = coord_sys.x_scale * (longitude - coord_sys.LONG_OFFSET)
+            self.y = coord_sys.y_scale * (latitude - coord_sys.LAT_OFFSET)
+        else:
+            x, y = coord_sys.project(latitude, longitude)
+            self.x = float(x)
+            self.y = float(y)
+
+    def __repr__(self):
+        return 'Vector(x={}, y={})'.format(self.x, self.y)
+
+    def __add__(self, other):
+        return Vector.fromXY(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return Vector.fromXY(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, scaleFactor):
+        return Vector.fromXY(self.x * scaleFactor, self.y * scaleFactor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, divisor):
+        return Vector.fromXY(self.x / divisor, self.y / divisor)
+
+    def __neg__(self):
+        return Vector.fromXY(-self.x, -self.y)
+
+    def __iadd__(self, other):
+        return self.iadd(other)
+
+    def __isub__(self, other):
+        return self.isub(other)
+
+    def __imul__(self, scaleFactor):
+        return self.iscale(scaleFactor)
+
     def xyDist(self, other):
         """Calculates the distance between two positions.
 
@@ -87,7 +309,7 @@ class Vector:
             float: The distance between 'self' and 'other'.
 
         """
-        return np.sqrt((self.x - other.x)**2 + (self.y - other.y)**2)
+        return math.hypot(self.x - other.x, self.y - other.y)
 
     def vectorSubtract(self, other):
         """Calculates the vector difference between two vectors.
@@ -99,7 +321,35 @@ class Vector:
             Vector: The vector difference between 'self' and 'other'.
 
         """
-        return Vector(x=self.x - other.x, y=self.y - other.y)
+        return Vector.fromXY(self.x - other.x, self.y - other.y)
+
+    def iadd(self, other):
+        """Adds another vector to this vector in place.
+
+        Args:
+            other (Vector): The vector to add to 'self'.
+
+        Returns:
+            Vector: 'self', after the update.
+
+        """
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def isub(self, other):
+        """Subtracts another vector from this vector in place.
+
+        Args:
+            other (Vector): The vector to subtract from 'self'.
+
+        Returns:
+            Vector: 'self', after the update.
+
+        """
+        self.x -= other.x
+        self.y -= other.y
+        return self
 
     def dot(self, other):
         """Calculates the dot product of two vectors.
@@ -120,7 +370,7 @@ class Vector:
             float: The magnitude of the vector.
 
         """
-        return np.sqrt(self.x**2 + self.y**2)
+        return math.hypot(self.x, self.y)
 
     def angle(self):
         """Calculates the anglular distance between the vector and the x-axis.
@@ -131,20 +381,46 @@ class Vector:
             float: The angle between the vector and North.
 
         """
-        return rangeAngle(radToDeg(np.arctan2(self.y, self.x)))
+        return math.degrees(math.atan2(self.y, self.x)) % 360
 
     def scale(self, scaleFactor):
-        return Vector(x=self.x * scaleFactor, y=self.y * scaleFactor)
+        """Scales a vector.
+
+        Args:
+            scaleFactor (float): The factor to multiply both components by.
+
+        Returns:
+            Vector: The scaled vector.
+
+        """
+        return Vector.fromXY(self.x * scaleFactor, self.y * scaleFactor)
+
+    def iscale(self, scaleFactor):
+        """Scales this vector in place.
+
+        Args:
+            scaleFactor (float): The factor to multiply both components by.
+
+        Returns:
+            Vector: 'self', after the update.
+
+        """
+        self.x *= scaleFactor
+        self.y *= scaleFactor
+        return self
 
     def toUnitVector(self):
         """Converts a vector to a unit vector.
 
+        Raises:
+            ZeroDivisionError: If the vector has zero magnitude.
+
         Returns:
             Vector: A unit vector representation of the input vector.
 
         """
-        mag = self.magnitude()
-        return Vector(x=self.x / mag, y=self.y / mag)
+        mag = math.hypot(self.x, self.y)
+        return Vector.fromXY(self.x / mag, self.y / mag)
 
     def inverse(self):
         """Constructs the inverse of a vector.
@@ -153,7 +429,7 @@ class Vector:
             Vector: The inverse of the original vector.
         
         """
-        return Vector(x=-1.0 * self.x, y=-1.0 * self.y)
+        return Vector.fromXY(-1.0 * self.x, -1.0 * self.y)
 
     def midpoint(self, other):
         """Calculates the midpoint between two positions.
@@ -168,7 +444,7 @@ class Vector:
         dx = (self.x - other.x) / 2.0
         dy = (self.y - other.y) / 2.0
 
-        return Vector(x=self.x - dx, y=self.y - dy)
+        return Vector.fromXY(self.x - dx, self.y - dy)
 
     def angleBetween(self, other):
         """Calculates the angle between two vectors
@@ -183,7 +459,8 @@ class Vector:
         """
         top = self.dot(other)
         bot = self.magnitude() * other.magnitude()
-        return radToDeg(np.arccos(top / bot))
+        # rounding can push the cosine slightly outside of [-1, 1]
+        return math.degrees(math.acos(max(-1.0, min(1.0, top / bot))))
 
     @staticmethod
     def zeroVector():
@@ -193,7 +470,212 @@ class Vector:
             Vector: A vector with zero magnitude.
         
         """
-        return Vector(x=0.0, y=0.0)
+        return Vector.fromXY(0.0, 0.0)
+
+
+class Route:
+    """An ordered list of waypoints stored as contiguous x and y arrays.
+
+    A Route behaves like a list of position Vectors that only holds the
+    waypoints which have not been reached yet: len(), indexing, iteration and
+    pop(0) all start at the cursor. Popping the first waypoint only advances
+    the cursor, and slicing returns a Route that shares the coordinate arrays,
+    so neither copies the route.
+
+    Args:
+        xs (list of float): (Optional) The x components of the waypoints.
+        ys (list of float): (Optional) The y components of the waypoints.
+
+    Raises:
+        ValueError: If xs and ys have different lengths.
+
+    Attributes:
+        xs (numpy.ndarray): The x components of every waypoint (including reached ones).
+        ys (numpy.ndarray): The y components of every waypoint (including reached ones).
+        cursor (int): The index of the first waypoint that has not been reached.
+
+    """
+    def __init__(self, xs=(), ys=()):
+        self.xs = np.asarray(xs, dtype=float).ravel()
+        self.ys = np.asarray(ys, dtype=float).ravel()
+        if self.xs.size != self.ys.size:
+            raise ValueError('A route needs as many x as y components.')
+        self.cursor = 0
+
+    @staticmethod
+    def fromVectors(vectors):
+        """Constructs a route from position vectors.
+
+        Args:
+            vectors (list of Vector): The waypoints in order.
+
+        Returns:
+            Route: The route through the waypoints.
+
+        """
+        return Route([v.x for v in vectors], [v.y for v in vectors])
+
+    @staticmethod
+    def fromLatLon(coord_sys, latitudes, longitudes):
+        """Constructs a route from waypoint latitudes and longitudes.
+
+        All of the waypoints are converted in a single array operation.
+
+        Args:
+            coord_sys (CoordinateSystem): The coordinate system in which the route lies.
+            latitudes (list of float): The latitudes of the waypoints.
+            longitudes (list of float): The longitudes of the waypoints.
+
+        Returns:
+            Route: The route through the waypoints.
+
+        """
+        return Route(*coord_sys.project(latitudes, longitudes))
+
+    def toLatLon(self, coord_sys):
+        """Converts the remaining waypoints to latitudes and longitudes.
+
+        Args:
+            coord_sys (CoordinateSystem): The coordinate system in which the route lies.
+
+        Returns:
+            numpy.ndarray: The latitudes of the remaining waypoints.
+            numpy.ndarray: The longitudes of the remaining waypoints.
+
+        """
+        return coord_sys.unproject(*self.remaining())
+
+    def __len__(self):
+        return self.xs.size - self.cursor
+
+    def __iter__(self):
+        for x, y in zip(self.xs[self.cursor:].tolist(),
+                        self.ys[self.cursor:].tolist()):
+            yield Vector.fromXY(x, y)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Route(self.xs[self.cursor:][index],
+                         self.ys[self.cursor:][index])
+        i = self._index(index)
+        return Vector.fromXY(float(self.xs[i]), float(self.ys[i]))
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+    def pop(self, index=0):
+        """Removes a waypoint from the route.
+
+        Removing the first remaining waypoint is O(1), any other waypoint
+        requires a copy of the coordinate arrays (like a list).
+
+        Args:
+            index (int): (Optional) The index of the waypoint among the remaining ones.
+
+        Raises:
+            IndexError: If the index is out of range.
+
+        Returns:
+            Vector: The removed waypoint.
+
+        """
+        waypoint = self[index]
+        i = self._index(index)
+        if i == self.cursor:
+            self.cursor += 1
+        else:
+            self.xs = np.delete(self.xs, i)
+            self.ys = np.delete(self.ys, i)
+        return waypoint
+
+    def insert(self, index, waypoint):
+        """Inserts a waypoint before the waypoint at index (like a list).
+
+        Args:
+            index (int): The index among the remaining waypoints.
+            waypoint (Vector): The waypoint to insert.
+
+        """
+        i = self.cursor + min(max(index, 0), len(self))
+        self.xs = np.insert(self.xs, i, waypoint.x)
+        self.ys = np.insert(self.ys, i, waypoint.y)
+
+    def advance(self):
+        """Marks the current waypoint as reached.
+
+        Returns:
+            Vector: The new current waypoint, or None at the end of the route.
+
+        """
+        if len(self) > 0:
+            self.cursor += 1
+        return self.current()
+
+    def current(self):
+        """Returns the first waypoint that has not been reached.
+
+        Returns:
+            Vector: The current waypoint, or None at the end of the route.
+
+        """
+        if len(self) == 0:
+            return None
+        return self[0]
+
+    def rewind(self):
+        """Marks every waypoint of the route as not reached (e.g. to run another lap)."""
+        self.cursor = 0
+
+    def remaining(self):
+        """Returns the coordinates of the remaining waypoints.
+
+        Returns:
+            numpy.ndarray: The x components of the remaining waypoints (a view).
+            numpy.ndarray: The y components of the remaining waypoints (a view).
+
+        """
+        return self.xs[self.cursor:], self.ys[self.cursor:]
+
+    def distances(self, position):
+        """Calculates the distance from a position to every remaining waypoint.
+
+        Args:
+            position (Vector): The position to measure from.
+
+        Returns:
+            numpy.ndarray: The distance to each remaining waypoint.
+
+        """
+        xs, ys = self.remaining()
+        return np.hypot(xs - position.x, ys - position.y)
+
+    def copy(self):
+        """Copies the remaining waypoints into a new route.
+
+        Returns:
+            Route: A route with its own coordinate arrays.
+
+        """
+        xs, ys = self.remaining()
+        return Route(xs.copy(), ys.copy())
+
+    def toVectors(self):
+        """Converts the remaining waypoints to position vectors.
+
+        Returns:
+            list of Vector: The remaining waypoints.
+
+        """
+        return list(self)
+
+    def _index(self, index):
+        """Converts an index among the remaining waypoints to an array index."""
+        n = len(self)
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError('Route index out of range.')
+        return self.cursor + index
 
 
 def degToRad(angle):
@@ -0,0 +1,314 @@
+"""
+Computer vision in worker processes.
+
+The detectors are pure Python and OpenCV work that would otherwise run on
+the navigation thread and compete with it for the GIL. A DetectionService
+runs them in a pool of worker processes instead, one frame per worker at a
+time, so the pool uses as many cores as it has workers.
+
+Frames are not pickled. They are copied into slots of shared memory, and
+only the slot number goes through the task queue. Each worker sends back a
+small Detections record per frame, stamped with the time and index of the
+frame, and the slot is reused once the record has arrived. submit() never
+waits: when every slot is taken the frame is dropped, because a newer one
+will be along soon. The newest detections are published by a single
+attribute assignment, so the navigation loop can read them at any time.
+"""
+from collections import namedtuple
+import multiprocessing
+from multiprocessing import shared_memory
+import threading
+import time
+import numpy as np
+
+DETECTORS = ('buoy', 'boat', 'horizon')
+
+Sighting = namedtuple('Sighting', ['distance', 'offset', 'count'])
+Sighting.__doc__ = """The largest object a detector found in a frame.
+
+The distance (in meters) and the horizontal offset from the frame center (in
+pixels) are those of the largest of the count contours found.
+"""
+
+Horizon = namedtuple('Horizon', ['angle', 'height'])
+Horizon.__doc__ = """The horizon line in a frame.
+
+The angle of the line (in degrees, 0 is level) and its height in pixels from
+the top of the frame, at the horizontal center.
+"""
+
+Detections = namedtuple('Detections',
+                        ['timestamp', 'index', 'buoy', 'boat', 'horizon'])
+Detections.__doc__ = """What the detectors found in one frame.
+
+The timestamp and index are those the frame was submitted with. buoy and
+boat are Sightings and horizon is a Horizon, each None if nothing was found
+or the detector is not run.
+"""
+
+
+def _sighting(detector):
+    """Returns the Sighting of a processed buoy or boat detector."""
+    contours = detector.filter_contours_output
+    if not contours:
+        return None
+    distance, offset = detector.find_distance_largest_contour()
+    return Sighting(float(distance), float(offset), len(contours))
+
+
+def _horizon(detector, width):
+    """Returns the Horizon of a processed HorizonDetector."""
+    line = detector.find_horizon()
+    if line is None:
+        return None
+    angle = (line.angle() + 90.0) % 180.0 - 90.0
+    return Horizon(angle, float(line.y_at(width / 2)))
+
+
+def _work(names, shape, detectors, roi, tasks, results):
+    """The loop of a worker process."""
+    import cv2
+    from nav_algo.computer_vision.detectors.boatDetector import BoatDetector
+    from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
+    from nav_algo.computer_vision.detectors.HorizonDetector import HorizonDetector
+    from nav_algo.computer_vision.detectors.horizonBandDetector import HorizonBandDetector
+    from nav_algo.computer_vision.detectors.pipeline import DetectorGraph
+
+    # one core per worker, the pool is the parallelism
+    cv2.setNumThreads(1)
+
+    memory = []
+    frames = []
+    for name in names:
+        block = shared_memory.SharedMemory(name=name)
+        memory.append(block)
+        frames.append(np.ndarray(shape, np.uint8, buffer=block.buf))
+
+    height, width = shape[:2]
+    buoy = BuoyDetector(height, width) if 'buoy' in detectors else None
+    boat = BoatDetector(height, width) if 'boat' in detectors else None
+    objects = [d for d in (buoy, boat) if d is not None]
+    if roi:
+        # the band detector estimates the horizon itself
+        band = HorizonBandDetector(objects, height, width)
+        horizon = None
+    else:
+        graph = DetectorGraph(objects, height, width)
+        horizon = HorizonDetector() if 'horizon' in detectors else None
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        slot, timestamp, index, pitch, roll = task
+        try:
+            frame = frames[slot]
+            if roi:
+                band.process(frame, pitch, roll)
+                line = (Horizon(*band.horizon) if band.horizon
+                        and 'horizon' in detectors else None)
+            else:
+                graph.process(frame)
+                if horizon is not None:
+                    horizon.process(frame)
+                line = (_horizon(horizon, width)
+                        if horizon is not None else None)
+            record = Detections(
+                timestamp, index,
+                _sighting(buoy) if buoy is not None else None,
+                _sighting(boat) if boat is not None else None, line)
+        except Exception:
+            record = None
+        results.put((slot, record))
+
+    del frames
+    for block in memory:
+        block.close()
+
+
+class DetectionService:
+    """Runs the detectors on frames in a pool of worker processes.
+
+    The workers are started (with the spawn method, which is safe next to
+    the sensor threads) when the service is constructed, and stopped by
+    close().
+
+    Args:
+        shape (tuple): The (height, width, 3) shape of the frames.
+        workers (int): (Optional) The number of worker processes.
+        detectors (tuple): (Optional) The detectors to run, from DETECTORS.
+        slots (int): (Optional) The number of frames in shared memory, by
+            default one more than the number of workers.
+        roi (bool): (Optional) Only searches a band around the horizon for
+            buoys and boats (see HorizonBandDetector).
+
+    Attributes:
+        latest (Detections): The detections of the newest frame processed,
+            or None before the first.
+        submitted (int): The number of frames handed to the workers.
+        dropped (int): The number of frames dropped because the workers
+            were busy.
+        completed (int): The number of frames processed.
+        errors (int): The number of frames a detector failed on.
+
+    Raises:
+        ValueError: If a detector is not in DETECTORS.
+
+    """
+    def __init__(self,
+                 shape,
+                 workers=3,
+                 detectors=DETECTORS,
+                 slots=None,
+                 roi=False):
+        for detector in detectors:
+            if detector not in DETECTORS:
+                raise ValueError("unknown detector {}".format(detector))
+        self.shape = tuple(shape)
+        self.latest = None
+        self.submitted = 0
+        self.dropped = 0
+        self.completed = 0
+        self.errors = 0
+
+        if slots is None:
+            slots = workers + 1
+        size = int(np.prod(self.shape))
+        self._memory = [
+            shared_memory.SharedMemory(create=True, size=size)
+            for _ in range(slots)
+        ]
+        self._frames = [
+            np.ndarray(self.shape, np.uint8, buffer=block.buf)
+            for block in self._memory
+        ]
+        self._free = list(range(slots))
+        self._lock = threading.Lock()
+        self._new_detections = threading.Condition(self._lock)
+
+        context = multiprocessing.get_context('spawn')
+        self._tasks = context.SimpleQueue()
+        self._results = context.SimpleQueue()
+        names = [block.name for block in self._memory]
+        self._workers = [
+            context.Process(target=_work,
+                            args=(names, self.shape, tuple(detectors), roi,
+                                  self._tasks, self._results),
+                            name='DetectionWorker-{}'.format(i),
+                            daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self._collector = threading.Thread(target=self._collect,
+                                           name='DetectionCollector',
+                                           daemon=True)
+        self._collector.start()
+        self._follower = None
+        self._stop_event = threading.Event()
+
+    def submit(self, frame, timestamp=None, index=None, pitch=None, roll=None):
+        """Hands a frame to the workers, without waiting for them.
+
+        Args:
+            frame (numpy.ndarray): A BGR frame of the service shape.
+            timestamp (float): (Optional) The capture time of the frame, now
+                if not given.
+            index (int): (Optional) The frame number, the number of frames
+                submitted if not given.
+            pitch (float): (Optional) The pitch of the boat at the frame.
+            roll (float): (Optional) The roll of the boat at the frame.
+
+        Returns:
+            bool: False if the frame was dropped because the workers are busy.
+
+        """
+        with self._lock:
+            if not self._free:
+                self.dropped += 1
+                return False
+            slot = self._free.pop()
+            self.submitted += 1
+            if index is None:
+                index = self.submitted
+        if timestamp is None:
+            timestamp = time.monotonic()
+        self._frames[slot][...] = frame
+        self._tasks.put((slot, timestamp, index, pitch, roll))
+        return True
+
+    def _collect(self):
+        """Receives the detections and frees their slots."""
+        while True:
+            message = self._results.get()
+            if message is None:
+                break
+            slot, record = message
+            with self._lock:
+                self._free.append(slot)
+                if record is None:
+                    self.errors += 1
+                    continue
+                self.completed += 1
+                # the workers can finish frames out of order
+                if self.latest is None or record.index > self.latest.index:
+                    self.latest = record
+                self._new_detections.notify_all()
+
+    def waitForDetections(self, previous=None, timeout=None):
+        """Waits until there are detections newer than 'previous'.
+
+        Args:
+            previous (Detections): (Optional) The last detections the caller
+                has seen.
+            timeout (float): (Optional) The maximum time to wait (in seconds).
+
+        Returns:
+            Detections: The latest detections, which are still 'previous' on
+                timeout.
+
+        """
+        with self._new_detections:
+            self._new_detections.wait_for(lambda: self.latest is not previous,
+                                          timeout)
+            return self.latest
+
+    def follow(self, capture, attitude=None):
+        """Submits every new frame of a CaptureThread from a background thread.
+
+        Args:
+            capture (CaptureThread): The capture to take the frames from.
+            attitude (function): (Optional) Returns the (pitch, roll) of the
+                boat, read as each frame is submitted.
+
+        """
+        def run():
+            frame = None
+            while not self._stop_event.is_set() and not capture.finished:
+                newest = capture.waitForFrame(frame, timeout=0.5)
+                if newest is not frame:
+                    frame = newest
+                    pitch, roll = attitude() if attitude else (None, None)
+                    self.submit(frame.image, frame.timestamp, frame.index,
+                                pitch, roll)
+
+        self._follower = threading.Thread(target=run,
+                                          name='DetectionFollower',
+                                          daemon=True)
+        self._follower.start()
+
+    def close(self):
+        """Stops the workers and frees the shared memory."""
+        self._stop_event.set()
+        if self._follower is not None:
+            self._follower.join()
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._results.put(None)
+        self._collector.join()
+        del self._frames
+        for block in self._memory:
+            block.close()
+            block.unlink()
@@ -2,8 +2,10 @@ import matplotlib.pyplot as plt
 import sys
 
 sys.path.append("..")
-from navigation_helper import *
-import coordinates as coord
+from nav_algo.navigation_helper import *
+import nav_algo.coordinates as coord
+import nav_algo.navigation as nav
+import nav_algo.simulation as sim
 
 
 class EnduranceTest:
@@ -45,7 +47,9 @@ class EnduranceTest:
                                 latitude=42.467748,
                                 longitude=-76.504622)
 
-        self.boat = MockBoat(position)
+        self.simulation = sim.Simulation(position=(position.x, position.y))
+        self.boat = self.simulation.boat(self.coordinate_system)
+        self.boat.updateSensors()
         plt.plot(position.x, position.y, 'r+')
 
         lw = self.getLoopWaypoints()
@@ -56,17 +60,23 @@ class EnduranceTest:
         for i in range(len(xs)):
             plt.plot(xs[i], ys[i], 'x', color=colors[i], label=labels[i])
 
+        # sail one lap on a simulated boat, the navigation coordinate system
+        # is centered at the first loop waypoint
+        start = lw[0]
+        lap = sim.Simulation(position=(position.x - start.x,
+                                       position.y - start.y),
+                             gps_noise=1.0,
+                             time_limit=3600)
+        lats, longs = lw.toLatLon(self.coordinate_system)
+        nav.NavigationController(event=None,
+                                 waypoints=list(zip(lats, longs)),
+                                 simulation=lap)
+        plt.plot([p.x + start.x for p in lap.track],
+                 [p.y + start.y for p in lap.track],
+                 color='gray')
+
         plt.show()
 
     def getLoopWaypoints(self):
         lw = counterClockwiseRect(self.waypoints, self.boat, buoy_offset=20)
         return lw
-
-
-class MockBoat:
-
-    def __init__(self, position):
-        self.position = position
-
-    def getPosition(self):
-        return self.position
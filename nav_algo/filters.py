@@ -0,0 +1,167 @@
+"""
+Constant time streaming filters for noisy sensor readings.
+
+Angles are filtered on their sine and cosine components, so the filtered
+angle does not jump when the readings cross 0/360 degrees.
+"""
+import math
+
+
+def _meanAngle(sin_sum, cos_sum):
+    """Returns the angle of a sum of unit vectors in [0, 360)."""
+    angle = math.degrees(math.atan2(sin_sum, cos_sum)) % 360
+    # a tiny negative angle rounds up to 360
+    return angle if angle < 360 else 0.0
+
+
+class ExponentialFilter:
+    """An exponential moving average.
+
+    Args:
+        alpha (float): The weight of the newest reading, between 0 and 1.
+
+    Raises:
+        ValueError: If alpha is not in (0, 1].
+
+    Attributes:
+        value (float): The filtered value, or None before the first reading.
+
+    """
+    def __init__(self, alpha):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError('alpha must be in (0, 1].')
+        self.alpha = alpha
+        self.value = None
+
+    def update(self, reading):
+        """Adds a reading to the filter.
+
+        Args:
+            reading (float): The new reading.
+
+        Returns:
+            float: The filtered value.
+
+        """
+        if self.value is None:
+            self.value = reading
+        else:
+            self.value += self.alpha * (reading - self.value)
+        return self.value
+
+
+class CircularExponentialFilter:
+    """An exponential moving average of angles.
+
+    Args:
+        alpha (float): The weight of the newest reading, between 0 and 1.
+
+    Raises:
+        ValueError: If alpha is not in (0, 1].
+
+    Attributes:
+        value (float): The filtered angle in [0, 360), or None before the first reading.
+
+    """
+    def __init__(self, alpha):
+        if not 0.0 < alpha <= 1.0:
+            raise ValueError('alpha must be in (0, 1].')
+        self.alpha = alpha
+        self.value = None
+        self._cos = 0.0
+        self._sin = 0.0
+
+    def update(self, angle):
+        """Adds an angle to the filter.
+
+        Args:
+            angle (float): The new angle (in degrees).
+
+        Returns:
+            float: The filtered angle in [0, 360).
+
+        """
+        rad = math.radians(angle)
+        if self.value is None:
+            self._cos = math.cos(rad)
+            self._sin = math.sin(rad)
+        else:
+            self._cos += self.alpha * (math.cos(rad) - self._cos)
+            self._sin += self.alpha * (math.sin(rad) - self._sin)
+        self.value = _meanAngle(self._sin, self._cos)
+        return self.value
+
+
+class CircularMovingAverage:
+    """The mean of the last few angles (a fixed window circular mean).
+
+    The sines and cosines of the window are kept in a ring buffer with
+    running sums, so every update is O(1) regardless of the window size. The
+    sums are recomputed from the buffer once per pass through the ring to
+    keep rounding errors from accumulating.
+
+    Args:
+        size (int): The number of angles in the window.
+
+    Raises:
+        ValueError: If size is less than 1.
+
+    Attributes:
+        value (float): The mean angle in [0, 360), or None before the first reading.
+
+    """
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError('The window needs at least one reading.')
+        self.size = size
+        self.value = None
+        self._cos = [0.0] * size
+        self._sin = [0.0] * size
+        self._index = 0
+        self._count = 0
+        self._cos_sum = 0.0
+        self._sin_sum = 0.0
+
+    def __len__(self):
+        return self._count
+
+    def update(self, angle):
+        """Adds an angle to the window, dropping the oldest one if it is full.
+
+        Args:
+            angle (float): The new angle (in degrees).
+
+        Returns:
+            float: The mean angle of the window in [0, 360).
+
+        """
+        rad = math.radians(angle)
+        c = math.cos(rad)
+        s = math.sin(rad)
+        i = self._index
+        self._cos_sum += c - self._cos[i]
+        self._sin_sum += s - self._sin[i]
+        self._cos[i] = c
+        self._sin[i] = s
+
+        self._index = (i + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+        if self._index == 0:
+            self._cos_sum = math.fsum(self._cos)
+            self._sin_sum = math.fsum(self._sin)
+
+        self.value = _meanAngle(self._sin_sum, self._cos_sum)
+        return self.value
+
+    def strength(self):
+        """Measures how consistent the angles in the window are.
+
+        Returns:
+            float: The mean resultant length, 1 if every angle is the same
+            and close to 0 if they are spread all around the circle.
+
+        """
+        if self._count == 0:
+            return 0.0
+        return math.hypot(self._cos_sum, self._sin_sum) / self._count
@@ -0,0 +1,378 @@
+"""
+A Monte-Carlo fleet simulator for tuning the navigation strategy.
+
+A FleetSimulation sails many independent boats around the same course at
+once. Every boat state is a slot in a NumPy array, so a time step of the
+whole fleet costs a handful of array operations instead of one Python loop
+per boat. The boats follow the same model as Simulation (the tail turns the
+boat and the speed relaxes toward the polar speed) and plan with the batched
+form of the navigation algorithm, newSailingAnglesImpl, so the effect of
+e.g. the hysterisis ('beating') or the detection radius can be measured over
+thousands of runs with varied wind and start positions.
+
+sweep() runs one fleet per parameter setting on a process pool, so a sweep
+uses every core.
+
+Nothing here imports the hardware drivers.
+"""
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import nav_algo.navigation_utilities as util
+
+FleetResult = namedtuple('FleetResult',
+                         ['course_times', 'tacks', 'hits', 'misses'])
+FleetResult.__doc__ = """The outcome of every boat of a fleet.
+
+Attributes:
+    course_times (numpy.ndarray): When each boat hit the last waypoint (in
+        seconds), NaN for the boats that ran out of time.
+    tacks (numpy.ndarray): The number of times each boat put the wind on
+        its other side (tacks and gybes).
+    hits (numpy.ndarray): The number of waypoints each boat hit.
+    misses (numpy.ndarray): The number of times each boat came close to its
+        waypoint and then sailed away from it without hitting it.
+"""
+
+FleetSummary = namedtuple('FleetSummary', [
+    'boats', 'finished', 'mean_time', 'median_time', 'p90_time', 'mean_tacks',
+    'miss_rate'
+])
+FleetSummary.__doc__ = """The distribution of the outcomes of a fleet (see summarize).
+
+Attributes:
+    boats (int): The number of boats.
+    finished (float): The fraction of boats that finished the course.
+    mean_time (float): The mean course time of the finished boats (in seconds).
+    median_time (float): The median course time of the finished boats.
+    p90_time (float): The 90th percentile course time of the finished boats.
+    mean_tacks (float): The mean number of tacks per boat.
+    miss_rate (float): The fraction of waypoint approaches that were misses.
+"""
+
+
+class FleetSimulation:
+    """Sails a fleet of independent simulated boats around a course.
+
+    Each boat has its own start position, heading and wind. The wind of a
+    boat swings by 'wind_shift' degrees around its direction, with its own
+    phase. Planning (waypoint hits and the sailing angle) runs at
+    'plan_rate', like the plan stage of NavigationController.navigate, and
+    the tail is steered toward the sailing angle every step, like
+    getServoAnglesImpl.
+
+    Args:
+        waypoints (list of (float, float)): The (x, y) waypoints, in order (in meters).
+        positions (array of (float, float)): The start position of each boat.
+        headings (array of float): The start heading of each boat (in degrees).
+        wind_directions (array of float): The mean absolute wind direction of each boat.
+        wind_speeds (array of float): (Optional) The wind speed of each boat (in m/s).
+        wind_shift (float): (Optional) The amplitude of the wind swings (in degrees).
+        shift_period (float): (Optional) The period of the wind swings (in seconds).
+        shift_phases (array of float): (Optional) The phase of the wind swings of each boat (in radians).
+        polar_table (PolarTable): (Optional) The boat polar (boat speeds in m/s),
+            the default polar if not given.
+        dt (float): (Optional) The time step (in seconds).
+        plan_rate (float): (Optional) How often the boats plan (in Hz).
+        turn_rate (float): (Optional) The turn rate at full tail deflection (in degrees per second).
+        acceleration_time (float): (Optional) The time constant of the boat speed (in seconds).
+        detection_radius (float): (Optional) How close a boat needs to get to a waypoint (in meters).
+        beating (float): (Optional) The hysterisis distance of newSailingAnglesImpl.
+        delta_alpha (float): (Optional) The angle resolution of the polar sweep (in degrees).
+        time_limit (float): (Optional) When the boats that have not finished give up (in seconds).
+
+    Raises:
+        ValueError: If there are no waypoints.
+
+    Attributes:
+        boats (int): The number of boats.
+        time (float): The simulation time (in seconds).
+        x (numpy.ndarray): The x position of each boat (in meters).
+        y (numpy.ndarray): The y position of each boat (in meters).
+        heading (numpy.ndarray): The heading of each boat (in degrees).
+        speed (numpy.ndarray): The speed of each boat (in m/s).
+        waypoint (numpy.ndarray): The index of the current waypoint of each boat.
+
+    """
+    TAIL_MAX_ANGLE = 30.0
+
+    def __init__(self,
+                 waypoints,
+                 positions,
+                 headings,
+                 wind_directions,
+                 wind_speeds=5.0,
+                 wind_shift=0.0,
+                 shift_period=300.0,
+                 shift_phases=0.0,
+                 polar_table=None,
+                 dt=0.1,
+                 plan_rate=5.0,
+                 turn_rate=30.0,
+                 acceleration_time=3.0,
+                 detection_radius=5.0,
+                 beating=7.0,
+                 delta_alpha=1.0,
+                 time_limit=1800.0):
+        self.waypoints = np.asarray(waypoints, dtype=float).reshape(-1, 2)
+        if len(self.waypoints) == 0:
+            raise ValueError('The course needs at least one waypoint.')
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        self.x, self.y, self.heading, self.wind_directions, self.wind_speeds, \
+            self.shift_phases = [
+                np.array(a, dtype=float) for a in np.broadcast_arrays(
+                    positions[:, 0], positions[:, 1], headings,
+                    wind_directions, wind_speeds, shift_phases)
+            ]
+        self.boats = self.x.size
+        self.heading %= 360.0
+        self.wind_shift = wind_shift
+        self.shift_period = shift_period
+        self.polar_table = (polar_table if polar_table is not None else
+                            util.DEFAULT_POLAR)
+        self.dt = dt
+        self.plan_every = max(1, int(round(1.0 / (plan_rate * dt))))
+        self.turn_rate = turn_rate
+        self.acceleration_time = acceleration_time
+        self.detection_radius = detection_radius
+        self.beating = beating
+        self.delta_alpha = delta_alpha
+        self.time_limit = time_limit
+
+        self.time = 0.0
+        self.speed = np.zeros(self.boats)
+        self.waypoint = np.zeros(self.boats, dtype=int)
+        self.sailing_angle = self.heading.copy()
+        self.course_times = np.full(self.boats, np.nan)
+        self.tacks = np.zeros(self.boats, dtype=int)
+        self.misses = np.zeros(self.boats, dtype=int)
+        self._closest = np.full(self.boats, np.inf)
+        self._steps = 0
+
+    @classmethod
+    def random(cls,
+               waypoints,
+               boats,
+               start=(0.0, 0.0),
+               start_spread=10.0,
+               wind_direction=45.0,
+               wind_spread=45.0,
+               wind_speed=5.0,
+               wind_speed_spread=1.0,
+               seed=None,
+               **kwargs):
+        """Builds a fleet with random start positions, headings and winds.
+
+        Args:
+            waypoints (list of (float, float)): The (x, y) waypoints, in order (in meters).
+            boats (int): The number of boats.
+            start ((float, float)): (Optional) The mean start position.
+            start_spread (float): (Optional) The standard deviation of the start positions (in meters).
+            wind_direction (float): (Optional) The mean wind direction (in degrees).
+            wind_spread (float): (Optional) The wind directions are uniform within +/- this.
+            wind_speed (float): (Optional) The mean wind speed (in m/s).
+            wind_speed_spread (float): (Optional) The standard deviation of the wind speeds.
+            seed (int): (Optional) Seeds the random conditions, for reproducible fleets.
+            **kwargs: Passed on to FleetSimulation.
+
+        Returns:
+            FleetSimulation: The fleet.
+
+        """
+        rng = np.random.default_rng(seed)
+        positions = rng.normal(start, start_spread, (boats, 2))
+        headings = rng.uniform(0.0, 360.0, boats)
+        wind_directions = wind_direction + rng.uniform(-wind_spread,
+                                                       wind_spread, boats)
+        wind_speeds = np.maximum(
+            rng.normal(wind_speed, wind_speed_spread, boats), 0.0)
+        phases = rng.uniform(0.0, 2 * np.pi, boats)
+        return cls(waypoints,
+                   positions,
+                   headings,
+                   wind_directions,
+                   wind_speeds,
+                   shift_phases=phases,
+                   **kwargs)
+
+    def windAt(self, t):
+        """Returns the wind direction of every boat at a time (in degrees)."""
+        if self.wind_shift == 0.0:
+            return self.wind_directions
+        return self.wind_directions + self.wind_shift * np.sin(
+            2 * np.pi * t / self.shift_period + self.shift_phases)
+
+    def active(self):
+        """Returns which boats are still sailing the course."""
+        return self.waypoint < len(self.waypoints)
+
+    def run(self):
+        """Sails until every boat has finished or the time limit is reached.
+
+        Returns:
+            FleetResult: The outcome of every boat.
+
+        """
+        while self.time < self.time_limit - 1e-9 and np.any(self.active()):
+            self.step()
+        return self.result()
+
+    def step(self):
+        """Advances every boat by one time step."""
+        wind = self.windAt(self.time)
+        if self._steps % self.plan_every == 0:
+            self._plan(wind)
+        self._steps += 1
+
+        active = self.active()
+        before = np.sin(np.deg2rad(self.heading - wind)) >= 0.0
+
+        # steer the short way round toward the sailing angle
+        offset = (self.sailing_angle - self.heading + 180.0) % 360.0 - 180.0
+        tail = np.clip(offset, -self.TAIL_MAX_ANGLE, self.TAIL_MAX_ANGLE)
+        heading = (self.heading + self.turn_rate * self.dt * tail /
+                   self.TAIL_MAX_ANGLE) % 360.0
+        target_speed = self._polarSpeeds(heading - wind)
+        speed = self.speed + (target_speed - self.speed) * min(
+            1.0, self.dt / self.acceleration_time)
+        rad = np.deg2rad(heading)
+
+        # the boats that have finished stay where they are
+        self.heading = np.where(active, heading, self.heading)
+        self.speed = np.where(active, speed, 0.0)
+        self.x += self.speed * np.cos(rad) * self.dt
+        self.y += self.speed * np.sin(rad) * self.dt
+        after = np.sin(np.deg2rad(self.heading - wind)) >= 0.0
+        self.tacks += active & (before != after)
+        self.time += self.dt
+
+    def result(self):
+        """Returns the outcome of every boat so far.
+
+        Returns:
+            FleetResult: The outcome of every boat.
+
+        """
+        return FleetResult(self.course_times.copy(), self.tacks.copy(),
+                           self.waypoint.copy(), self.misses.copy())
+
+    def _plan(self, wind):
+        active = self.active()
+        index = np.minimum(self.waypoint, len(self.waypoints) - 1)
+        targets = self.waypoints[index]
+        distance = np.hypot(targets[:, 0] - self.x, targets[:, 1] - self.y)
+
+        # a boat that got close and is now sailing away missed the waypoint
+        self._closest = np.where(active,
+                                 np.minimum(self._closest, distance), np.inf)
+        missed = ((self._closest < 2 * self.detection_radius) &
+                  (distance > self._closest + self.detection_radius))
+        self.misses += missed
+        self._closest[missed] = np.inf
+
+        hit = active & (distance < self.detection_radius)
+        if np.any(hit):
+            self.waypoint += hit
+            self._closest[hit] = np.inf
+            finished = hit & ~self.active()
+            self.course_times[finished] = self.time
+            active = self.active()
+            index = np.minimum(self.waypoint, len(self.waypoints) - 1)
+            targets = self.waypoints[index]
+
+        if not np.any(active):
+            return
+        positions = np.column_stack((self.x[active], self.y[active]))
+        wind_speeds = None
+        if self.polar_table.wind_speeds is not None:
+            wind_speeds = self.wind_speeds[active]
+        self.sailing_angle[active] = util.newSailingAnglesImpl(
+            positions, targets[active], self.heading[active], wind[active],
+            self.delta_alpha, self.polar_table, wind_speeds, self.beating)
+
+    def _polarSpeeds(self, angles):
+        if self.polar_table.wind_speeds is None:
+            return self.polar_table.speed(angles)
+        # every boat has its own wind speed, so its own rows of the table
+        return self.polar_table.speed(angles, self.wind_speeds)
+
+
+def summarize(result):
+    """Computes the distribution of the outcomes of a fleet.
+
+    Args:
+        result (FleetResult): The outcome of every boat.
+
+    Returns:
+        FleetSummary: The summary.
+
+    """
+    boats = result.course_times.size
+    times = result.course_times[~np.isnan(result.course_times)]
+    mean_time = median_time = p90_time = float('nan')
+    if times.size > 0:
+        mean_time = float(np.mean(times))
+        median_time, p90_time = (float(t)
+                                 for t in np.percentile(times, [50, 90]))
+    approaches = int(np.sum(result.hits) + np.sum(result.misses))
+    miss_rate = (float(np.sum(result.misses)) / approaches
+                 if approaches > 0 else 0.0)
+    return FleetSummary(boats, times.size / boats if boats > 0 else 0.0,
+                        mean_time, median_time, p90_time,
+                        float(np.mean(result.tacks)) if boats > 0 else 0.0,
+                        miss_rate)
+
+
+def _runSetting(arguments):
+    waypoints, boats, seed, setting = arguments
+    return FleetSimulation.random(waypoints, boats, seed=seed,
+                                  **setting).run()
+
+
+def sweep(waypoints, settings, boats=100, seed=0, processes=None):
+    """Sails one fleet per parameter setting on a process pool.
+
+    Every setting gets the same random conditions (the same seed), so the
+    settings are compared on the same starts and winds.
+
+    Args:
+        waypoints (list of (float, float)): The (x, y) waypoints, in order (in meters).
+        settings (list of dict): The keyword arguments of FleetSimulation.random
+            for each fleet, e.g. [{'beating': 3.5}, {'beating': 7.0}].
+        boats (int): (Optional) The number of boats per fleet.
+        seed (int): (Optional) Seeds the random conditions.
+        processes (int): (Optional) The number of worker processes, one per
+            core if not given. 1 runs the fleets in this process.
+
+    Returns:
+        list of FleetResult: The outcome of each fleet, in the order of settings.
+
+    """
+    work = [(waypoints, boats, seed, setting) for setting in settings]
+    if processes == 1:
+        return [_runSetting(w) for w in work]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_runSetting, work))
+
+
+def main():
+    """Sweeps the hysterisis and the detection radius on a triangle course."""
+    waypoints = [(0.0, 100.0), (80.0, 40.0), (0.0, 0.0)]
+    settings = [{
+        'beating': beating,
+        'detection_radius': radius
+    } for radius in (3.0, 5.0) for beating in (0.0, 3.5, 7.0, 14.0)]
+    results = sweep(waypoints, settings, boats=200)
+    print("{:>8}{:>8}{:>10}{:>10}{:>10}{:>8}{:>8}".format(
+        "radius", "beating", "finished", "median s", "p90 s", "tacks",
+        "misses"))
+    for setting, result in zip(settings, results):
+        s = summarize(result)
+        print("{:>8.1f}{:>8.1f}{:>10.2f}{:>10.1f}{:>10.1f}{:>8.1f}{:>8.2f}".
+              format(setting['detection_radius'], setting['beating'],
+                     s.finished, s.median_time, s.p90_time, s.mean_tacks,
+                     s.miss_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Lightweight timing instrumentation and profiling for the navigation code.
+
+Hot paths are wrapped with the timed decorator or the timer context manager.
+Timing is off by default (set NAV_ALGO_INSTRUMENT=1 or call enable()), and
+then costs a single flag check per call. When it is on, every duration is
+written to a preallocated ring buffer per name, from which percentile
+summaries can be sent to the base station or dumped to a file.
+
+The sampling profiler records the stacks of every thread at a fixed
+interval, so it can be started from any thread (e.g. by a radio command)
+and still profiles the control loop.
+"""
+from array import array
+from collections import Counter, namedtuple
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+TimingSummary = namedtuple('TimingSummary',
+                           ['count', 'mean', 'p50', 'p90', 'p99', 'max'])
+TimingSummary.__doc__ = """Percentiles (in seconds) of the recent durations of a timer."""
+
+_enabled = os.environ.get('NAV_ALGO_INSTRUMENT', '0') not in ('', '0')
+_rings = {}
+_rings_lock = threading.Lock()
+
+
+def enable(enabled=True):
+    """Turns timing on (or off)."""
+    global _enabled
+    _enabled = enabled
+
+
+def isEnabled():
+    """Returns whether timing is on."""
+    return _enabled
+
+
+class TimingRing:
+    """A preallocated ring buffer of the most recent durations.
+
+    Args:
+        size (int): (Optional) The number of durations kept.
+
+    Attributes:
+        count (int): The number of durations added so far.
+
+    """
+    def __init__(self, size=1024):
+        self.size = size
+        self.durations = array('d', [0.0]) * size
+        self.count = 0
+
+    def add(self, duration):
+        """Adds a duration (in seconds)."""
+        self.durations[self.count % self.size] = duration
+        self.count += 1
+
+    def values(self):
+        """Returns the durations in the buffer, oldest first."""
+        n = min(self.count, self.size)
+        start = (self.count - n) % self.size
+        if start + n <= self.size:
+            return self.durations[start:start + n].tolist()
+        return (self.durations[start:] + self.durations[:start]).tolist()
+
+    def summary(self):
+        """Returns the percentiles of the durations in the buffer.
+
+        Returns:
+            TimingSummary: The summary (all zeros without any durations).
+
+        """
+        values = sorted(self.values())
+        n = len(values)
+        if n == 0:
+            return TimingSummary(self.count, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+        def percentile(p):
+            return values[min(n - 1, int(p / 100.0 * n))]
+
+        return TimingSummary(self.count,
+                             sum(values) / n, percentile(50), percentile(90),
+                             percentile(99), values[-1])
+
+
+def ring(name):
+    """Returns the ring buffer of a timer, creating it if needed."""
+    r = _rings.get(name)
+    if r is None:
+        with _rings_lock:
+            r = _rings.setdefault(name, TimingRing())
+    return r
+
+
+class _Timer:
+    __slots__ = ('ring', 'start')
+
+    def __init__(self, ring):
+        self.ring = ring
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ring.add(time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name):
+    """Times a block of code.
+
+    Example:
+        with instrumentation.timer('Camera.read'):
+            ...
+
+    Args:
+        name (str): The name of the timer.
+
+    Returns:
+        A context manager, which does nothing when timing is off.
+
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(ring(name))
+
+
+def timed(name=None):
+    """Decorates a function to time every call.
+
+    Args:
+        name (str): (Optional) The name of the timer, the function's
+            qualified name if not given.
+
+    """
+    def decorate(function):
+        label = name if name is not None else function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                ring(label).add(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def summary():
+    """Returns the summary of every timer.
+
+    Returns:
+        dict of str: TimingSummary: The summaries, by timer name.
+
+    """
+    with _rings_lock:
+        rings = dict(_rings)
+    return {name: r.summary() for name, r in sorted(rings.items())}
+
+
+def summaryText():
+    """Returns the summaries as text, one timer per line (times in ms)."""
+    lines = []
+    for name, s in summary().items():
+        lines.append('{}: n={} mean={:.2f} p50={:.2f} p90={:.2f} '
+                     'p99={:.2f} max={:.2f}'.format(name, s.count,
+                                                    s.mean * 1e3, s.p50 * 1e3,
+                                                    s.p90 * 1e3, s.p99 * 1e3,
+                                                    s.max * 1e3))
+    return '\n'.join(lines)
+
+
+def dump(path):
+    """Writes the summary of every timer to a JSON file (times in seconds)."""
+    with open(path, 'w') as f:
+        json.dump({name: s._asdict()
+                   for name, s in summary().items()},
+                  f,
+                  indent=2)
+
+
+def reset():
+    """Removes every timer."""
+    with _rings_lock:
+        _rings.clear()
+
+
+class SamplingProfiler(threading.Thread):
+    """Samples the stacks of every thread at a fixed interval.
+
+    The samples are counted as folded stacks ('thread;module:function;...')
+    that can be turned into a flame graph.
+
+    Args:
+        duration (float): How long to sample (in seconds).
+        interval (float): (Optional) The time between samples (in seconds).
+        path (str): (Optional) Write the folded stacks to this file when done.
+
+    Attributes:
+        stacks (Counter of str: int): The number of samples of each stack.
+        samples (int): The number of samples taken.
+
+    """
+    def __init__(self, duration, interval=0.005, path=None):
+        super().__init__(name='SamplingProfiler', daemon=True)
+        self.duration = duration
+        self.interval = interval
+        self.path = path
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Samples until the duration is over or stop() is called."""
+        names = {}
+        end = time.monotonic() + self.duration
+        while not self._stop_event.is_set() and time.monotonic() < end:
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append('{}:{}'.format(
+                        os.path.basename(code.co_filename), code.co_name))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop_event.wait(self.interval)
+        if self.path is not None:
+            self.write(self.path)
+
+    def write(self, path):
+        """Writes the folded stacks to a file, one 'stack count' per line."""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write('{} {}\n'.format(stack, count))
+
+    def stop(self):
+        """Stops sampling early."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -1,10 +1,9 @@
 import time
-import nav_algo.boat as boat
+import nav_algo.control_loop as control_loop
 import nav_algo.coordinates as coord
-import nav_algo.radio as radio
+import nav_algo.simulation as sim
 from nav_algo.events import Events
 from nav_algo.navigation_helper import *
-# from nav_algo.camera import Camera
 
 
 class NavigationController:
@@ -12,23 +11,32 @@ class NavigationController:
 
     Args:
         waypoints (list of (float, float)): A list of (latitude, longitude) tuples of waypoints.
+        simulation (bool or Simulation): (Optional) Run against a simulated boat
+            instead of the hardware (a default Simulation if True).
 
     Attributes:
         DETECTION_RADIUS (float): How close we need to get to a waypoint.
         coordinate_system (CoordinateSystem): The global coordinate system.
-        waypoints (list of Vector): Position vectors of waypoints.
+        waypoints (Route): Position vectors of waypoints.
         boat (BoatController): A representation of the boat.
         radio (Radio): Prints navigation data to the base station.
         current_waypoint (Vector): The current target waypoint.
         boat_position (Vector): The current position of the boat.
         boat_to_target (Vector): The vector from the boat to the target position.
-        simulation (bool): If we are running a simulation
+        sailing_angle (float): The latest planned sailing angle.
+        loop_stats (LoopStats): The timing statistics of the last navigate call.
+        simulation (Simulation): The simulated boat, or None on the real boat.
+        clock (object): Provides monotonic() and sleep(seconds), the simulation
+            or the time module.
+        camera (Camera): Detects buoys and boats, started by navigateDetection.
+        binary_telemetry (bool): If the radio sends binary telemetry frames
 
     """
     def __init__(self,
                  event=Events.FLEET_RACE,
                  waypoints=[],
-                 simulation=False):
+                 simulation=False,
+                 binary_telemetry=False):
 
         # Make sure we have at least one waypoint
         if (len(waypoints) < 1):
@@ -38,14 +46,29 @@ class NavigationController:
 
         self.coordinate_system = coord.CoordinateSystem(
             waypoints[0][0], waypoints[0][1])
-        self.waypoints = [
-            coord.Vector(self.coordinate_system, w[0], w[1]) for w in waypoints
-        ]
+        self.waypoints = coord.Route.fromLatLon(self.coordinate_system,
+                                                [w[0] for w in waypoints],
+                                                [w[1] for w in waypoints])
+
+        self.simulation = None
+        self.clock = time
+        self.camera = None
+        if simulation:
+            self.simulation = (simulation if isinstance(
+                simulation, sim.Simulation) else sim.Simulation())
+            self.clock = self.simulation
+            self.boat = self.simulation.boat(self.coordinate_system)
+            self.radio = self.simulation.radio()
+        else:
+            # the drivers talk to the hardware as soon as they are imported
+            import nav_algo.boat as boat
+            import nav_algo.radio as radio
+            self.boat = boat.BoatController(
+                coordinate_system=self.coordinate_system,
+                background_gps=True,
+                scheduled_sensors=True)
+            self.radio = radio.Radio(9600, binary=binary_telemetry)
 
-        self.boat = boat.BoatController(
-            coordinate_system=self.coordinate_system)
-
-        self.radio = radio.Radio(9600)
         self.radio.transmitString(
             "Using lat/long point ({}, {}) as the center of the coordinate system.\n"
             .format(waypoints[0][0], waypoints[0][1]))
@@ -54,7 +77,7 @@ class NavigationController:
 
         # wait until we know where we are
         while self.boat.sensors.velocity is None:
-            self.boat.sensors.readGPS()  # ok if this is blocking
+            self.boat.sensors.readGPS(timeout=1.0)  # ok if this is blocking
 
         self.radio.transmitString(
             "Established GPS fix. Beginning navigation...\n")
@@ -62,135 +85,160 @@ class NavigationController:
         # self.current_waypoint = self.waypoints[desired_fst_waypoint]
         # TODO: add modified ^ to event algos before each navigate call
 
-        # If the event is fleet race, we don't care about the algo, just set angles
-        # NOTE commands should end with \n, send 'q' to quit, angles are space delineated 'main tail'
-        if event == Events.FLEET_RACE:
-            self.radio.fleetRace = True
-            self.radio.transmitString(
-                "Starting Fleet Race\nSend angles of the form 'sail_angle rudder_angle'"
-            )
-            while True:
-                try:
-                    self.radio.receiveString()  # timeout is 1 sec
-                except:
-                    pass
-                self.boat.updateSensors()
-                self.radio.printData(self.boat)
-
-        elif event == Events.ENDURANCE:
-            # 7 hrs = 25200 sec
-            exit_before = 25200
-            start_time = time.time()
-            loop_waypoints = counterClockwiseRect(self.waypoints,
-                                                  self.boat,
-                                                  buoy_offset=5)
-
-            while (time.time() - start_time < exit_before):
-                self.waypoints = loop_waypoints
+        try:
+            # If the event is fleet race, we don't care about the algo, just set angles
+            # NOTE commands should end with \n, send 'q' to quit, angles are space delineated 'main tail'
+            if event == Events.FLEET_RACE:
+                self.radio.fleetRace = True
+                self.radio.transmitString(
+                    "Starting Fleet Race\nSend angles of the form 'sail_angle rudder_angle'"
+                )
+                while True:
+                    # angles are set by the radio as soon as they arrive, this
+                    # only quits or sends new data every second (or command)
+                    self.radio.receiveString(timeout=1.0)
+                    self.boat.updateSensors()
+                    self.radio.printData(self.boat)
+
+            elif event == Events.ENDURANCE:
+                # 7 hrs = 25200 sec
+                exit_before = 25200
+                start_time = self.clock.monotonic()
+                loop_waypoints = counterClockwiseRect(self.waypoints,
+                                                      self.boat,
+                                                      buoy_offset=5)
+
+                while (self.clock.monotonic() - start_time < exit_before):
+                    loop_waypoints.rewind()
+                    self.waypoints = loop_waypoints
+                    self.current_waypoint = self.waypoints.pop(0)
+                    self.navigate()
+
+            elif event == Events.STATION_KEEPING:
+                # TODO find an optimal radius, 10m for now
+                buoy_waypoints = self.waypoints
+                exit_before = 300
+                circle_radius = 10
+                self.waypoints = stationKeeping(buoy_waypoints,
+                                                circle_radius,
+                                                "ENTRY",
+                                                boat=self.boat)
                 self.current_waypoint = self.waypoints.pop(0)
                 self.navigate()
 
-        elif event == Events.STATION_KEEPING:
-            # TODO find an optimal radius, 10m for now
-            buoy_waypoints = self.waypoints
-            exit_before = 300
-            circle_radius = 10
-            self.waypoints = stationKeeping(buoy_waypoints,
-                                            circle_radius,
-                                            "ENTRY",
-                                            boat=self.boat)
+                # Set timer
+                start_time = self.clock.monotonic()
+                loop_waypoints = stationKeeping(buoy_waypoints,
+                                                circle_radius,
+                                                "KEEP",
+                                                boat=self.boat)
+                while self.clock.monotonic() - start_time < exit_before:
+                    loop_waypoints.rewind()
+                    self.waypoints = loop_waypoints
+                    self.current_waypoint = self.waypoints.pop(0)
+                    self.navigate()
+                self.waypoints = stationKeeping(buoy_waypoints,
+                                                circle_radius,
+                                                "EXIT",
+                                                boat=self.boat)
+
+            elif event == Events.PRECISION_NAVIGATION:
+                self.waypoints = precisionNavigation(self.waypoints)
+            elif event == Events.COLLISION_AVOIDANCE:
+                self.waypoints = collisionAvoidance(self.waypoints)
+                self.current_waypoint = self.waypoints[0]
+                self.navigateDetection()
+            elif event == Events.SEARCH:
+                self.waypoints = search(self.waypoints, boat=self.boat)
+                self.current_waypoint = self.waypoints[0]
+                self.navigateDetection(event=Events.SEARCH)
+
             self.current_waypoint = self.waypoints.pop(0)
             self.navigate()
-
-            # Set timer
-            start_time = time.time()
-            loop_waypoints = stationKeeping(buoy_waypoints,
-                                            circle_radius,
-                                            "KEEP",
-                                            boat=self.boat)
-            while time.time() - start_time < exit_before:
-                self.waypoints = loop_waypoints
-                self.current_waypoint = self.waypoints.pop(0)
-                self.navigate()
-            self.waypoints = stationKeeping(buoy_waypoints,
-                                            circle_radius,
-                                            "EXIT",
-                                            boat=self.boat)
-
-        elif event == Events.PRECISION_NAVIGATION:
-            self.waypoints = precisionNavigation(self.waypoints)
-        elif event == Events.COLLISION_AVOIDANCE:
-            self.waypoints = collisionAvoidance(self.waypoints)
-            self.current_waypoint = self.waypoints[0]
-            self.navigateDetection()
-        elif event == Events.SEARCH:
-            self.waypoints = search(self.waypoints, boat=self.boat)
-            self.current_waypoint = self.waypoints[0]
-            self.navigateDetection(event=Events.SEARCH)
-
-        self.current_waypoint = self.waypoints.pop(0)
-        self.navigate()
-
-        # TODO Clean up ports
-        self.radio.serialStream.close()
-
-    def navigate(self):
+        finally:
+            # TODO Clean up ports
+            if self.camera is not None:
+                self.camera.close()
+            self.radio.close()
+            self.boat.close()
+
+    def navigate(self, rate=10.0):
         """ Execute the navigation algorithm.
 
         This is a blocking call that runs until all waypoints have been hit.
+        Sensing and actuation run every tick of a fixed rate control loop,
+        planning at half that rate and telemetry once a second on its own
+        thread. The loop statistics are kept in self.loop_stats.
 
-        """
-        while self.current_waypoint is not None:
-            # read for a quit signal ('q') or manual override ('o')
-            try:
-                self.radio.receiveString()
-            except:
-                pass
-
-            while self.radio.fleetRace:
-                # manual override has been engaged, wait for autopilot signal ('a')
-                try:
-                    self.radio.receiveString()
-                except:
-                    pass
-                self.boat.updateSensors()
-                self.radio.printData(self.boat)
-
-            all_waypts = []
-            all_waypts.append(self.current_waypoint)
-            for pt in self.waypoints:
-                all_waypts.append(pt)
-            self.radio.printAllWaypoints(all_waypts)
-            time.sleep(0.35)  # TODO how often should this run?
+        Args:
+            rate (float): (Optional) The rate of the control loop (in Hz).
 
-            self.boat.updateSensors()
-            self.boat_position = self.boat.getPosition()
-            self.radio.printData(self.boat)
+        """
+        self.sailing_angle = None
+        self._remaining = (self.current_waypoint, ) + tuple(self.waypoints)
+        loop = control_loop.ControlLoop(rate, clock=self.simulation)
+        loop.addStage('sense', self._sense)
+        loop.addStage('plan', self._plan, rate=rate / 2)
+        loop.addStage('actuate', self._actuate)
+        loop.addStage('telemetry', self._telemetry, rate=1.0, asynchronous=True)
+        try:
+            loop.run(lambda: self.current_waypoint is not None)
+        finally:
+            self.loop_stats = loop.stats()
+
+    def _sense(self):
+        # quit if a quit signal ('q') has been received (does not block)
+        self.radio.receiveString()
+        self.boat.updateSensors()
+        self.boat_position = self.boat.getPosition()
+
+    def _plan(self):
+        if self.radio.fleetRace:
+            return  # manual override, the radio sets the angles
+
+        if self.boat_position.xyDist(
+                self.current_waypoint) < self.DETECTION_RADIUS:
+            # hit waypoint -- send data back to basestation
+            self.radio.printHitWaypoint(self.current_waypoint)
+
+            if len(self.waypoints) > 0:
+                self.current_waypoint = self.waypoints.pop(0)
+                self._remaining = self._remaining[1:]
+            else:
+                self.current_waypoint = None
+                return
 
-            if self.boat_position.xyDist(
-                    self.current_waypoint) < self.DETECTION_RADIUS:
-                # hit waypoint -- send data back to basestation
-                self.radio.printHitWaypoint(self.current_waypoint)
+        self.sailing_angle = newSailingAngle(self.boat, self.current_waypoint)
 
-                if len(self.waypoints) > 0:
-                    self.current_waypoint = self.waypoints.pop(0)
-                else:
-                    self.current_waypoint = None
-                    break
+    def _actuate(self):
+        if not self.radio.fleetRace and self.sailing_angle is not None:
+            self.boat.setServos(self.sailing_angle)
 
-            sailing_angle = newSailingAngle(self.boat, self.current_waypoint)
-            self.boat.setServos(sailing_angle)
+    def _telemetry(self):
+        self.radio.printAllWaypoints(self._remaining)
+        self.radio.printData(self.boat)
 
     def navigateDetection(self, event=Events.COLLISION_AVOIDANCE):
         # TODO: modify to implement collision avoidance
+        if self.camera is None:
+            # the camera streams in the background from here on, and the
+            # detectors run on the cores the navigation loop does not use,
+            # only on a band around the horizon
+            from nav_algo.camera import Camera
+            sensors = self.boat.sensors
+            self.camera = Camera(workers=3,
+                                 roi=True,
+                                 attitude=lambda:
+                                 (sensors.pitch, sensors.roll))
+
         while self.current_waypoint is not None:
-            time.sleep(2)
+            self.clock.sleep(2)
 
             self.boat.updateSensors()
             self.boat_position = self.boat.getPosition()
-            (buoy_coords, obst_coords) = Camera.read(self.boat.sensors.yaw,
-                                                     self.boat_position.x,
-                                                     self.boat_position.y)
+            (buoy_coords, obst_coords) = self.camera.read(
+                self.boat.sensors.yaw, self.boat_position.x,
+                self.boat_position.y)
             if (buoy_coords is not None & event == Events.SEARCH):
                 # TODO: get buoy pos (buoy_waypoint)
                 buoy_coords = coord.Vector(x=buoy_coords[0], y=buoy_coords[1])
@@ -200,10 +248,10 @@ class NavigationController:
             if (obst_coords is not None):
                 obstacle_pos1 = obst_coords
                 # TODO: get obstacle_pos at time t
-                time.sleep(2)
-                snd_read = Camera.read(self.boat.sensors.yaw,
-                                       self.boat_position.x,
-                                       self.boat_position.y)
+                self.clock.sleep(2)
+                snd_read = self.camera.read(self.boat.sensors.yaw,
+                                            self.boat_position.x,
+                                            self.boat_position.y)
                 obstacle_pos2 = snd_read[0]
                 avoidance_waypoint = assessCollision(obstacle_pos1,
                                                      obstacle_pos2, 2)
@@ -1,16 +1,20 @@
 import nav_algo.coordinates as coord
+import nav_algo.instrumentation as instrumentation
 import nav_algo.navigation_utilities as util
 import math
 import numpy as np
 
 
-def newSailingAngle(boat, target):
+def newSailingAngle(boat, target, polar_table=None):
     """TODO Determines the best angle to sail at.
 
         The sailboat follows a locally optimal path (maximize vmg while minimizing
         directional changes) until the global optimum is "better" (based on the
         hysterisis factor).
 
+        Args:
+            polar_table (PolarTable): (Optional) The boat polar, the default polar if not given.
+
         Returns:
             float: The best angle to sail (in the global coordinate system).
 
@@ -21,17 +25,23 @@ def newSailingAngle(boat, target):
     target_position = (target.x, target.y)
     angle_boat_heading = boat.sensors.velocity.angle()
     abs_wind_dir = boat.sensors.wind_direction
-    return util.newSailingAngleImpl(boat_position, target_position,
-                                    angle_boat_heading, abs_wind_dir)
+    with instrumentation.timer('newSailingAngleImpl'):
+        return util.newSailingAngleImpl(boat_position,
+                                        target_position,
+                                        angle_boat_heading,
+                                        abs_wind_dir,
+                                        polar_table=polar_table,
+                                        wind_speed=boat.sensors.wind_speed)
 
 
-def optAngle(boat_to_target, boat, right):
+def optAngle(boat_to_target, boat, right, polar_table=None):
     """Determines the best angle to sail on either side of the wind.
 
         The "best angle" maximizes the velocity made good toward the target.
 
         Args:
             right (bool): True if evaluating the right side of the wind, False for left.
+            polar_table (PolarTable): (Optional) The boat polar, the default polar if not given.
 
         Returns:
             float: The best angle to sail (in the global coordinate system).
@@ -39,22 +49,28 @@ def optAngle(boat_to_target, boat, right):
 
     """
     return util.optAngleImpl(boat_to_target.angle(),
-                             boat.sensors.wind_direction, right)
+                             boat.sensors.wind_direction,
+                             right,
+                             polar_table=polar_table,
+                             wind_speed=boat.sensors.wind_speed)
 
 
-def polar(angle, boat):
+def polar(angle, boat, polar_table=None):
     """Evaluates the polar diagram for a given angle relative to the wind.
 
         Args:
             angle (float): A potential boat heading relative to the absolute wind direction.
             boat (BoatController): The BoatController (either sim or real)
+            polar_table (PolarTable): (Optional) The boat polar, the default polar if not given.
 
         Returns:
-            Vector: A unit boat velocity vector in the global coordinate system.
+            Vector: A boat velocity vector in the global coordinate system.
 
       """
-    # TODO might want to use a less simplistic polar diagram
-    x, y = util.polarImpl(angle, boat.sensors.wind_direction)
+    x, y = util.polarImpl(angle,
+                          boat.sensors.wind_direction,
+                          polar_table=polar_table,
+                          wind_speed=boat.sensors.wind_speed)
     return coord.Vector(x=x, y=y)
 
 
@@ -103,42 +119,34 @@ def counterClockwiseRect(waypoints, boat, buoy_offset=2):
     boat_angle = boat_pos.vectorSubtract(center).angle()
 
     if boat_angle > wa[3][1] or boat_angle < wa[0][1]:
-        return [w_ur, w_ul, w_ll, w_lr]
+        return coord.Route.fromVectors([w_ur, w_ul, w_ll, w_lr])
     elif boat_angle > wa[2][1]:
-        return [w_lr, w_ur, w_ul, w_ll]
+        return coord.Route.fromVectors([w_lr, w_ur, w_ul, w_ll])
     elif boat_angle > wa[1][1]:
-        return [w_ll, w_lr, w_ur, w_ul]
+        return coord.Route.fromVectors([w_ll, w_lr, w_ur, w_ul])
     else:
-        return [w_ul, w_ll, w_lr, w_ur]
+        return coord.Route.fromVectors([w_ul, w_ll, w_lr, w_ur])
 
 
 def stationKeeping(waypoints, circle_radius, state, boat, opt_angle=45):
     if state == "ENTRY":
-        stationKeepingWaypoints = []  # Necessary waypoints
         # entry point to the square
-        square_entries = [
+        square_entries = coord.Route.fromVectors([
             waypoints[0].midpoint(waypoints[1]),
             waypoints[1].midpoint(waypoints[2]),
             waypoints[2].midpoint(waypoints[3]),
             waypoints[3].midpoint(waypoints[0])
-        ]
+        ])
         curr_pos = boat.getPosition()
-        shortest_dist = min(
-            (curr_pos.xyDist(square_entries[0]), square_entries[0]),
-            (curr_pos.xyDist(square_entries[1]), square_entries[1]),
-            (curr_pos.xyDist(square_entries[2]), square_entries[2]),
-            (curr_pos.xyDist(square_entries[3]), square_entries[3]),
-            key=lambda x: x[0])
-        stationKeepingWaypoints.append(shortest_dist[1])
+        closest = int(np.argmin(square_entries.distances(curr_pos)))
+        entry = square_entries[closest]
 
         # center of the square
         center = waypoints[0].midpoint(waypoints[2])
-        stationKeepingWaypoints.append(center)
-        return stationKeepingWaypoints
+        return coord.Route.fromVectors([entry, center])
 
     elif state == "KEEP":
         # downwind=wind-yaw=0=clockwise,
-        keep_waypoints = []
         # radian_angle = math.radians(opt_angle)
         x_coord = boat.getPosition().x
         y_coord = boat.getPosition().y
@@ -160,14 +168,11 @@ def stationKeeping(waypoints, circle_radius, state, boat, opt_angle=45):
         # convert to radians for computation of other waypoints using trig
         first_angle_rad = math.radians(first_angle)
 
-        for i in range(4):
-            # place 4 waypoints each 90 deg apart; when angle>2pi, trig functions know to shift input to be in range
-            input_angle = first_angle_rad + \
-                loop_direction * i * math.radians(90)
-            keep_waypoints.append(
-                (x_coord + circle_radius * math.cos(input_angle)),
-                (y_coord + circle_radius * math.sin(input_angle)))
-        return keep_waypoints
+        # place 4 waypoints each 90 deg apart; when angle>2pi, trig functions know to shift input to be in range
+        input_angles = first_angle_rad + \
+            loop_direction * np.arange(4) * math.radians(90)
+        return coord.Route(x_coord + circle_radius * np.cos(input_angles),
+                           y_coord + circle_radius * np.sin(input_angles))
 
     elif state == "EXIT":
         # TODO this assumes that the buoys are cardinal aligned, but this is
@@ -190,13 +195,11 @@ def stationKeeping(waypoints, circle_radius, state, boat, opt_angle=45):
         west_exit = waypoints[0].midpoint(waypoints[3])
         west_exit.x -= units_away
         # exit waypoint order in list: N, E, S, W
+        exits = coord.Route.fromVectors(
+            [north_exit, east_exit, south_exit, west_exit])
         curr_pos = boat.getPosition()
-        shortest_dist = min((curr_pos.xyDist(north_exit), north_exit),
-                            (curr_pos.xyDist(east_exit), east_exit),
-                            (curr_pos.xyDist(south_exit), south_exit),
-                            (curr_pos.xyDist(west_exit), west_exit),
-                            key=lambda x: x[0])
-        return [shortest_dist[1]]
+        closest = int(np.argmin(exits.distances(curr_pos)))
+        return coord.Route.fromVectors([exits[closest]])
 
 
 def find_inner_outer_points(start_point, end_point, dist, flag):
@@ -225,8 +228,8 @@ def precisionNavigation(waypoints):
     # waypoints:[topleft_buoy, topright_buoy, botleft_buoy, botright_buoy]
     buoys = [(w.x, w.y) for w in waypoints]
     out_waypoints = util.precisionNavigationImpl(buoys)
-    out_waypoints = [coord.Vector(x=w[0], y=w[1]) for w in out_waypoints]
-    return out_waypoints
+    return coord.Route([w[0] for w in out_waypoints],
+                       [w[1] for w in out_waypoints])
 
 
 def getRectangleBox(center, theta):
@@ -389,7 +392,6 @@ def collisionAvoidance(buoy_waypoints, boat):
 
 
 def search(waypoints, boat, scalar=math.pi, constant=100):
-    search_waypoints = []
     center_point = waypoints[0]
     """
     entry_point = coord.Vector(center_point.x+100, center_point.y)
@@ -420,13 +422,11 @@ def search(waypoints, boat, scalar=math.pi, constant=100):
         theta_offset += math.pi
     entry_point = (100 * math.cos(theta_offset) + center_point.x,
                    100 * math.sin(theta_offset) + center_point.y)
-    search_waypoints.insert(0, entry_point)
-
-    for theta in range(1 + theta_offset, 31 + theta_offset, 1):
-        r = constant - scalar * (theta - theta_offset)
-        x = center_point.x + r * math.cos(theta)
-        y = center_point.y + r * math.sin(theta)
-        new_waypoint = coord.Vector(x=x, y=y)
-        search_waypoints.insert(len(search_waypoints), new_waypoint)
 
-    return search_waypoints
+    # spiral inward one radian at a time, starting at the entry point
+    steps = np.arange(1, 31)
+    thetas = steps + theta_offset
+    r = constant - scalar * steps
+    xs = np.concatenate(([entry_point[0]], center_point.x + r * np.cos(thetas)))
+    ys = np.concatenate(([entry_point[1]], center_point.y + r * np.sin(thetas)))
+    return coord.Route(xs, ys)
@@ -9,8 +9,14 @@ Within this file only, vectors are represented as (x, y) tuples.
 """
 
 
-def newSailingAngleImpl(boat_position, target_position, angle_boat_heading,
-                        abs_wind_dir):
+def newSailingAngleImpl(boat_position,
+                        target_position,
+                        angle_boat_heading,
+                        abs_wind_dir,
+                        delta_alpha=1.0,
+                        polar_table=None,
+                        wind_speed=None,
+                        beating=7.0):
     """Determines the best angle to sail at.
 
         The sailboat follows a locally optimal path (maximize vmg while minimizing
@@ -22,20 +28,25 @@ def newSailingAngleImpl(boat_position, target_position, angle_boat_heading,
             target_position (float, float): The global position of the target.
             angle_boat_heading (float): The direction the boat is currently traveling in.
             abs_wind_dir (float): The absolute wind direction.
+            delta_alpha (float): (Optional) The angle resolution of the polar sweep (in degrees).
+            polar_table (PolarTable): (Optional) The boat polar, DEFAULT_POLAR if not given.
+            wind_speed (float): (Optional) The wind speed, only used by wind speed dependent polars.
+            beating (float): (Optional) The hysterisis distance (in meters): the
+                other tack must be better by a factor of 1 + beating / distance
+                to the target before the boat tacks.
 
         Returns:
             float: The best angle to sail (in the global coordinate system).
 
     """
-    beating = 7.0  # TODO what should the beating parameter be?
+    # TODO what should the beating parameter be? (see nav_algo.fleet)
 
-    boat_to_target = vectorSubtract(boat_position, target_position)
+    boat_to_target = vectorSubtract(target_position, boat_position)
     angle_boat_to_target = vectorAngle(boat_to_target)
 
-    right_angle_max, right_vmg_max = optAngleImpl(angle_boat_to_target,
-                                                  abs_wind_dir, True)
-    left_angle_max, left_vmg_max = optAngleImpl(angle_boat_to_target,
-                                                abs_wind_dir, False)
+    right_angle_max, right_vmg_max, left_angle_max, left_vmg_max = optAnglesImpl(
+        angle_boat_to_target, abs_wind_dir, delta_alpha, polar_table,
+        wind_speed)
 
     hysterisis = 1.0 + (beating / vectorMagnitude(boat_to_target))
     sailing_angle = right_angle_max
@@ -50,7 +61,12 @@ def newSailingAngleImpl(boat_position, target_position, angle_boat_heading,
     return sailing_angle
 
 
-def optAngleImpl(angle_boat_to_target, abs_wind_dir, right):
+def optAngleImpl(angle_boat_to_target,
+                 abs_wind_dir,
+                 right,
+                 delta_alpha=1.0,
+                 polar_table=None,
+                 wind_speed=None):
     """Determines the best angle to sail on either side of the wind.
 
         The "best angle" maximizes the velocity made good toward the target.
@@ -59,46 +75,538 @@ def optAngleImpl(angle_boat_to_target, abs_wind_dir, right):
             angle_boat_to_target (float): The global angle from the boat to the target.
             abs_wind_dir (float): The absolute wind direction.
             right (bool): True if evaluating the right side of the wind, False for left.
+            delta_alpha (float): (Optional) The angle resolution of the polar sweep (in degrees).
+            polar_table (PolarTable): (Optional) The boat polar, DEFAULT_POLAR if not given.
+            wind_speed (float): (Optional) The wind speed, only used by wind speed dependent polars.
 
         Returns:
             float: The best angle to sail (in the global coordinate system).
             float: The velocity made good at the best angle.
 
     """
-    delta_alpha = 1.0  # angle resolution
-    alpha = 0.0  # potential boat angle relative to absolute wind
-    best_vmg = 0.0
-    best_angle = abs_wind_dir
+    right_angle, right_vmg, left_angle, left_vmg = optAnglesImpl(
+        angle_boat_to_target, abs_wind_dir, delta_alpha, polar_table,
+        wind_speed)
+    if right:
+        return right_angle, right_vmg
+    return left_angle, left_vmg
+
+
+def optAnglesImpl(angle_boat_to_target,
+                  abs_wind_dir,
+                  delta_alpha=1.0,
+                  polar_table=None,
+                  wind_speed=None):
+    """Determines the best angle to sail on both sides of the wind at once.
+
+        Every potential boat angle alpha in [0, 180) (relative to the absolute
+        wind) is scored on both tacks in a single array pass, so a finer
+        delta_alpha only grows the arrays instead of the number of Python
+        iterations. Ties are broken in favor of the smallest alpha.
 
-    while alpha < 180:
-        vel = polarImpl(alpha if right else -1.0 * alpha, abs_wind_dir)
-        vmg = dotProduct(vel, unitVector(angle_boat_to_target))
+        Args:
+            angle_boat_to_target (float): The global angle from the boat to the target.
+            abs_wind_dir (float): The absolute wind direction.
+            delta_alpha (float): (Optional) The angle resolution of the polar sweep (in degrees).
+            polar_table (PolarTable): (Optional) The boat polar, DEFAULT_POLAR if not given.
+            wind_speed (float): (Optional) The wind speed, only used by wind speed dependent polars.
 
-        if vmg > best_vmg:
-            best_vmg = vmg
-            best_angle = abs_wind_dir + alpha if right else abs_wind_dir - alpha
+        Returns:
+            float: The best angle to sail on the right side of the wind.
+            float: The velocity made good at the best right angle.
+            float: The best angle to sail on the left side of the wind.
+            float: The velocity made good at the best left angle.
 
-        alpha = alpha + delta_alpha
+    """
+    if polar_table is None:
+        polar_table = DEFAULT_POLAR
+    alphas, speeds, cos_alphas, sin_alphas = polar_table.sweep(
+        delta_alpha, wind_speed)
+
+    # cos(wind +/- alpha - target) expanded so that the only trig left per
+    # call is on the wind to target angle
+    offset = np.deg2rad(abs_wind_dir - angle_boat_to_target)
+    along = speeds * cos_alphas
+    along *= np.cos(offset)
+    across = speeds * sin_alphas
+    across *= np.sin(offset)
+
+    # row 0 is the right side of the wind, row 1 is the left side
+    vmgs = np.empty((2, alphas.size))
+    np.subtract(along, across, out=vmgs[0])
+    np.add(along, across, out=vmgs[1])
+
+    best = np.argmax(vmgs, axis=1)
+    result = []
+    for side, sign in ((0, 1.0), (1, -1.0)):
+        vmg = vmgs[side, best[side]]
+        if vmg > 0.0:
+            result.append(
+                rangeAngle(abs_wind_dir + sign * float(alphas[best[side]])))
+            result.append(float(vmg))
+        else:
+            # nothing makes progress toward the target
+            result.append(rangeAngle(abs_wind_dir))
+            result.append(0.0)
+    return tuple(result)
+
+
+def newSailingAnglesImpl(boat_positions,
+                         target_positions,
+                         angles_boat_heading,
+                         abs_wind_dirs,
+                         delta_alpha=1.0,
+                         polar_table=None,
+                         wind_speeds=None,
+                         beating=7.0):
+    """Determines the best angle to sail at for many boat states at once.
+
+        This is the batched form of newSailingAngleImpl for offline tuning and
+        replay. Every state is evaluated independently with the same
+        hysterisis rule, and the results match the scalar function exactly.
+        Inputs are broadcast against each other, so e.g. a single target or
+        wind direction can be shared by every state.
 
-    return rangeAngle(best_angle), best_vmg
+        Args:
+            boat_positions (array of (float, float)): The global positions of the boat.
+            target_positions (array of (float, float)): The global positions of the targets.
+            angles_boat_heading (array of float): The directions the boat is currently traveling in.
+            abs_wind_dirs (array of float): The absolute wind directions.
+            delta_alpha (float): (Optional) The angle resolution of the polar sweep (in degrees).
+            polar_table (PolarTable): (Optional) The boat polar, DEFAULT_POLAR if not given.
+            wind_speeds (array of float): (Optional) The wind speeds, only used by wind speed dependent polars.
+            beating (float): (Optional) The hysterisis distance (see newSailingAngleImpl).
 
+        Returns:
+            numpy.ndarray: The best angles to sail (in the global coordinate system).
 
-def polarImpl(angle, abs_wind_dir):
+    """
+
+    boat_positions = np.asarray(boat_positions, dtype=float)
+    target_positions = np.asarray(target_positions, dtype=float)
+    boat_to_target_x = target_positions[..., 0] - boat_positions[..., 0]
+    boat_to_target_y = target_positions[..., 1] - boat_positions[..., 1]
+    angles_boat_to_target = np.rad2deg(
+        np.arctan2(boat_to_target_y, boat_to_target_x))
+
+    arrays = [
+        angles_boat_to_target, boat_to_target_x, boat_to_target_y,
+        np.asarray(angles_boat_heading, dtype=float),
+        np.asarray(abs_wind_dirs, dtype=float)
+    ]
+    if wind_speeds is not None:
+        arrays.append(np.asarray(wind_speeds, dtype=float))
+    arrays = [a.ravel() for a in np.broadcast_arrays(*arrays)]
+    shape = np.broadcast_shapes(angles_boat_to_target.shape,
+                                np.shape(angles_boat_heading),
+                                np.shape(abs_wind_dirs),
+                                np.shape(wind_speeds))
+    angles_boat_to_target, boat_to_target_x, boat_to_target_y = arrays[:3]
+    angles_boat_heading, abs_wind_dirs = arrays[3:5]
+    if wind_speeds is not None:
+        wind_speeds = arrays[5]
+
+    right_angles, right_vmgs, left_angles, left_vmgs = optAnglesBatchImpl(
+        angles_boat_to_target, abs_wind_dirs, delta_alpha, polar_table,
+        wind_speeds)
+
+    with np.errstate(divide='ignore'):
+        hysterisis = 1.0 + (beating / np.sqrt((boat_to_target_x**2) +
+                                              (boat_to_target_y**2)))
+    right_offsets = np.abs(right_angles - angles_boat_heading)
+    left_offsets = np.abs(left_angles - angles_boat_heading)
+    use_left = (((right_offsets < left_offsets) &
+                 (right_vmgs * hysterisis < left_vmgs)) |
+                ((right_offsets >= left_offsets) &
+                 (left_vmgs * hysterisis >= right_vmgs)))
+
+    return np.where(use_left, left_angles, right_angles).reshape(shape)
+
+
+def optAnglesBatchImpl(angles_boat_to_target,
+                       abs_wind_dirs,
+                       delta_alpha=1.0,
+                       polar_table=None,
+                       wind_speeds=None,
+                       chunk_size=4096):
+    """Determines the best angle to sail on both sides of the wind for many states.
+
+        This is the batched form of optAnglesImpl. The states are scored in
+        chunks of chunk_size rows so that the (states x sweep angles) work
+        arrays stay small no matter how many states are given.
+
+        Args:
+            angles_boat_to_target (1D array of float): The global angles from the boat to the target.
+            abs_wind_dirs (1D array of float): The absolute wind directions.
+            delta_alpha (float): (Optional) The angle resolution of the polar sweep (in degrees).
+            polar_table (PolarTable): (Optional) The boat polar, DEFAULT_POLAR if not given.
+            wind_speeds (1D array of float): (Optional) The wind speeds, only used by wind speed dependent polars.
+            chunk_size (int): (Optional) The number of states scored per array pass.
+
+        Returns:
+            numpy.ndarray: The best angles to sail on the right side of the wind.
+            numpy.ndarray: The velocities made good at the best right angles.
+            numpy.ndarray: The best angles to sail on the left side of the wind.
+            numpy.ndarray: The velocities made good at the best left angles.
+
+    """
+    if polar_table is None:
+        polar_table = DEFAULT_POLAR
+    angles_boat_to_target = np.asarray(angles_boat_to_target, dtype=float)
+    abs_wind_dirs = np.asarray(abs_wind_dirs, dtype=float)
+
+    alphas, cos_alphas, sin_alphas = polar_table.sweepAngles(delta_alpha)
+    if polar_table.wind_speeds is None:
+        speeds = polar_table.sweep(delta_alpha)[1]
+        speed_cos, speed_sin = speeds * cos_alphas, speeds * sin_alphas
+
+    n = angles_boat_to_target.size
+    result = np.empty((4, n))
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        wind = abs_wind_dirs[start:stop]
+        if polar_table.wind_speeds is not None:
+            speeds = polar_table.speeds(alphas, wind_speeds[start:stop])
+            speed_cos, speed_sin = speeds * cos_alphas, speeds * sin_alphas
+
+        # same expansion as optAnglesImpl, one row per state
+        offset = np.deg2rad(wind - angles_boat_to_target[start:stop])
+        along = speed_cos * np.cos(offset)[:, None]
+        across = speed_sin * np.sin(offset)[:, None]
+
+        for side, sign in ((0, 1.0), (1, -1.0)):
+            vmgs = along - across if side == 0 else along + across
+            best = np.argmax(vmgs, axis=1)
+            vmg = vmgs[np.arange(stop - start), best]
+            progress = vmg > 0.0
+            # nothing makes progress toward the target on the other rows
+            result[2 * side, start:stop] = rangeAngle(
+                np.where(progress, wind + sign * alphas[best], wind))
+            result[2 * side + 1, start:stop] = np.where(progress, vmg, 0.0)
+
+    return result[0], result[1], result[2], result[3]
+
+
+def polarImpl(angle, abs_wind_dir, polar_table=None, wind_speed=None):
     """Evaluates the polar diagram for a given angle relative to the wind. All values are in degrees.
 
         Args:
             angle (float): A potential boat heading relative to the absolute wind direction.
             abs_wind_dir (float): The absolute (global) wind direction.
+            polar_table (PolarTable): (Optional) The boat polar, DEFAULT_POLAR if not given.
+            wind_speed (float): (Optional) The wind speed, only used by wind speed dependent polars.
 
         Returns:
             (float, float): A boat velocity vector (x, y) in the global coordinate system.
 
     """
-    angle = rangeAngle(angle)
-    if (angle > 20 and angle < 160) or (angle > 200 and angle < 340):
-        # put back into global coords
-        return unitVector(angle + abs_wind_dir)
-    return 0, 0
+    if polar_table is None:
+        polar_table = DEFAULT_POLAR
+    return polar_table.velocity(angle, abs_wind_dir, wind_speed)
+
+
+class PolarTable:
+    """A boat polar diagram that is precomputed onto a dense lookup table.
+
+    The polar is given as boat speeds at a few true wind angles (relative to
+    the absolute wind direction, between 0 and 180 degrees since the polar is
+    symmetric about the wind) and optionally at a few wind speeds. It is
+    resampled once onto a grid with the given resolution, after which every
+    query is an index computation plus a linear interpolation between the two
+    neighboring grid points (and the two neighboring wind speeds).
+
+    An angle may be given twice to make the speed jump there, e.g. at the
+    edge of a no-go zone. The speed exactly at a jump is the lower of the
+    two, and queries that fall in a grid cell containing a jump are
+    evaluated exactly, so a jump stays a step at any resolution.
+
+    Args:
+        angles (list of float): Increasing true wind angles (degrees) spanning 0 to 180.
+        speeds (list of float): The boat speeds at each angle, or a list of such lists (one per wind speed).
+        wind_speeds (list of float): (Optional) Increasing wind speeds matching the rows of speeds.
+        resolution (float): (Optional) The largest angle resolution of the lookup table (in degrees).
+
+    Raises:
+        ValueError: If the polar does not match the angles or wind speeds.
+
+    Attributes:
+        resolution (float): The angle resolution of the lookup table (in degrees),
+            which divides 180 degrees.
+        wind_speeds (numpy.ndarray): The wind speeds of the table rows, or None.
+        table (numpy.ndarray): The boat speeds, one row per wind speed and one column per grid angle.
+
+    """
+    def __init__(self, angles, speeds, wind_speeds=None, resolution=1.0):
+        angles = np.asarray(angles, dtype=float)
+        speeds = np.atleast_2d(np.asarray(speeds, dtype=float))
+        if resolution <= 0:
+            raise ValueError('The angle resolution must be positive.')
+        if speeds.shape[1] != angles.size:
+            raise ValueError('There must be one speed per polar angle.')
+        if np.any(np.diff(angles) < 0):
+            raise ValueError('The polar angles must be increasing.')
+        if wind_speeds is not None:
+            wind_speeds = np.asarray(wind_speeds, dtype=float)
+            if wind_speeds.size != speeds.shape[0]:
+                raise ValueError('There must be one polar per wind speed.')
+        elif speeds.shape[0] != 1:
+            raise ValueError('Wind speeds are required for multiple polars.')
+
+        # the grid spans exactly 0 to 180 degrees in equal cells
+        cells = int(np.ceil(180.0 / resolution))
+        self.resolution = 180.0 / cells
+        self.wind_speeds = wind_speeds
+        self._angles = angles
+        self._speeds = speeds
+        self._jumps = np.flatnonzero(np.diff(angles) == 0)
+
+        n = cells + 1
+        self.table = self._exact(speeds, np.linspace(0.0, 180.0, n))
+
+        # the cells with a jump anywhere in them (including their ends)
+        self._jump_cells = None
+        if self._jumps.size > 0:
+            self._jump_cells = np.zeros(n - 1, dtype=bool)
+            for jump in angles[self._jumps]:
+                index = jump / self.resolution
+                first = max(int(np.ceil(index - 1e-9)) - 1, 0)
+                last = min(int(np.floor(index + 1e-9)), n - 2)
+                self._jump_cells[first:last + 1] = True
+
+        self._sweeps = {}
+        self._sweep_speeds = {}
+
+    def speed(self, angle, wind_speed=None):
+        """Looks up the boat speed at angles relative to the wind.
+
+        Args:
+            angle (float or numpy.ndarray): Boat headings relative to the absolute wind direction.
+            wind_speed (float or numpy.ndarray): (Optional) The wind speed, or
+                one wind speed per angle, required by wind speed dependent polars.
+
+        Returns:
+            float or numpy.ndarray: The boat speed at each angle.
+
+        """
+        if self.wind_speeds is not None and np.ndim(wind_speed) > 0:
+            return self._interpolatePairs(self._rows(wind_speed), angle)
+        speed = self._interpolate(self._row(wind_speed), angle)
+        if speed.ndim == 0:
+            return float(speed)
+        return speed
+
+    def velocity(self, angle, abs_wind_dir, wind_speed=None):
+        """Evaluates the boat velocity for a heading relative to the wind.
+
+        Args:
+            angle (float): A potential boat heading relative to the absolute wind direction.
+            abs_wind_dir (float): The absolute (global) wind direction.
+            wind_speed (float): (Optional) The wind speed, required by wind speed dependent polars.
+
+        Returns:
+            (float, float): A boat velocity vector (x, y) in the global coordinate system.
+
+        """
+        speed = self.speed(angle, wind_speed)
+        if speed == 0.0:
+            return 0.0, 0.0
+        x, y = unitVector(angle + abs_wind_dir)
+        return speed * x, speed * y
+
+    def speeds(self, angle, wind_speeds):
+        """Looks up the boat speed at angles relative to the wind for many wind speeds.
+
+        Args:
+            angle (numpy.ndarray): Boat headings relative to the absolute wind direction.
+            wind_speeds (numpy.ndarray): The wind speeds.
+
+        Returns:
+            numpy.ndarray: The boat speeds, one row per wind speed and one column per angle.
+
+        """
+        lower, upper, frac = self._rows(wind_speeds)
+        return self._interpolate((lower, upper, frac[:, None]), angle)
+
+    def sweep(self, delta_alpha, wind_speed=None):
+        """Evaluates the polar on every angle of a polar sweep.
+
+        The sweep angles and their sines and cosines only depend on the
+        resolution, so they are computed once per delta_alpha and reused.
+
+        Args:
+            delta_alpha (float): The angle resolution of the sweep (in degrees).
+            wind_speed (float): (Optional) The wind speed, required by wind speed dependent polars.
+
+        Raises:
+            ValueError: If delta_alpha is not positive.
+
+        Returns:
+            numpy.ndarray: The angles alpha in [0, 180) relative to the wind.
+            numpy.ndarray: The boat speed at each alpha.
+            numpy.ndarray: The cosine of each alpha.
+            numpy.ndarray: The sine of each alpha.
+
+        """
+        alphas, cos_alphas, sin_alphas = self.sweepAngles(delta_alpha)
+        if self.wind_speeds is not None:
+            return (alphas, self.speed(alphas, wind_speed), cos_alphas,
+                    sin_alphas)
+
+        speeds = self._sweep_speeds.get(delta_alpha)
+        if speeds is None:
+            speeds = self.speed(alphas)
+            self._sweep_speeds[delta_alpha] = speeds
+        return alphas, speeds, cos_alphas, sin_alphas
+
+    def sweepAngles(self, delta_alpha):
+        """Returns the cached angles of a polar sweep and their cosines and sines.
+
+        Args:
+            delta_alpha (float): The angle resolution of the sweep (in degrees).
+
+        Raises:
+            ValueError: If delta_alpha is not positive.
+
+        Returns:
+            numpy.ndarray: The angles alpha in [0, 180) relative to the wind.
+            numpy.ndarray: The cosine of each alpha.
+            numpy.ndarray: The sine of each alpha.
+
+        """
+        sweep = self._sweeps.get(delta_alpha)
+        if sweep is None:
+            if delta_alpha <= 0:
+                raise ValueError('The angle resolution must be positive.')
+            alphas = np.arange(0.0, 180.0, delta_alpha)
+            alphas_rad = np.deg2rad(alphas)
+            sweep = (alphas, np.cos(alphas_rad), np.sin(alphas_rad))
+            self._sweeps[delta_alpha] = sweep
+        return sweep
+
+    def _interpolate(self, row, angle):
+        """Linearly interpolates the table at angles relative to the wind.
+
+        Args:
+            row ((int or array, int or array, float or array)): The lower and
+                upper rows and the weight of the upper row (see _row).
+            angle (float or numpy.ndarray): The angles.
+
+        """
+        lower, upper, frac = row
+        rows = self.table[lower] * (1.0 - frac) + self.table[upper] * frac
+        # the polar is symmetric, so fold the angle into [0, 180]
+        folded = np.abs((np.asarray(angle, dtype=float) + 180.0) % 360.0 -
+                        180.0)
+        index = folded / self.resolution
+        cell = np.minimum(index.astype(int), rows.shape[-1] - 2)
+        weight = index - cell
+        speed = rows[..., cell] * (1.0 - weight) + rows[..., cell + 1] * weight
+
+        if self._jump_cells is not None:
+            near_jump = self._jump_cells[cell]
+            if np.any(near_jump):
+                sources = (self._speeds[lower] * (1.0 - frac) +
+                           self._speeds[upper] * frac)
+                speed = np.where(near_jump, self._exact(sources, folded),
+                                 speed)
+        return speed
+
+    def _interpolatePairs(self, rows, angle):
+        """Linearly interpolates the table at each angle in its own rows.
+
+        Args:
+            rows ((array, array, array)): The lower and upper rows and the
+                weight of the upper row for each angle (see _rows).
+            angle (numpy.ndarray): The angles.
+
+        """
+        lower, upper, frac = rows
+        folded = np.abs((np.asarray(angle, dtype=float) + 180.0) % 360.0 -
+                        180.0)
+        index = folded / self.resolution
+        cell = np.minimum(index.astype(int), self.table.shape[1] - 2)
+        weight = index - cell
+        table = self.table
+        speed = ((table[lower, cell] * (1.0 - weight) +
+                  table[lower, cell + 1] * weight) * (1.0 - frac) +
+                 (table[upper, cell] * (1.0 - weight) +
+                  table[upper, cell + 1] * weight) * frac)
+
+        if self._jump_cells is not None:
+            near_jump = self._jump_cells[cell]
+            if np.any(near_jump):
+                lower, upper = lower[near_jump], upper[near_jump]
+                frac = frac[near_jump, None]
+                sources = (self._speeds[lower] * (1.0 - frac) +
+                           self._speeds[upper] * frac)
+                speed[near_jump] = self._exact(sources,
+                                               folded[near_jump],
+                                               paired=True)
+        return speed
+
+    def _exact(self, sources, folded, paired=False):
+        """Evaluates polars given at the polar angles at angles in [0, 180].
+
+        Every polar is evaluated at every angle, or if 'paired', the i-th
+        polar only at the i-th angle.
+
+        """
+        angles = self._angles
+        upper = np.clip(np.searchsorted(angles, folded, side='right'), 1,
+                        angles.size - 1)
+        x0, x1 = angles[upper - 1], angles[upper]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(x1 > x0, (folded - x0) / (x1 - x0), 0.0)
+        if paired:
+            polars = np.arange(folded.size)
+            speed = (sources[polars, upper - 1] * (1.0 - weight) +
+                     sources[polars, upper] * weight)
+        else:
+            speed = (sources[..., upper - 1] * (1.0 - weight) +
+                     sources[..., upper] * weight)
+        for jump in self._jumps:
+            edge = np.minimum(sources[..., jump], sources[..., jump + 1])
+            if not paired and np.ndim(edge) > 0 and np.ndim(folded) > 0:
+                edge = edge[..., None]
+            speed = np.where(folded == angles[jump], edge, speed)
+        return speed
+
+    def _rows(self, wind_speeds):
+        """Returns the (lower, upper, weight of upper) table rows for every wind speed."""
+        wind_speeds = np.asarray(wind_speeds, dtype=float).ravel()
+        if self.wind_speeds is None or self.wind_speeds.size == 1:
+            lower = upper = np.zeros(wind_speeds.size, dtype=int)
+            return lower, upper, np.zeros(wind_speeds.size)
+        upper = np.clip(np.searchsorted(self.wind_speeds, wind_speeds), 1,
+                        self.wind_speeds.size - 1)
+        lower = upper - 1
+        frac = np.clip((wind_speeds - self.wind_speeds[lower]) /
+                       (self.wind_speeds[upper] - self.wind_speeds[lower]),
+                       0.0, 1.0)
+        return lower, upper, frac
+
+    def _row(self, wind_speed):
+        """Returns the (lower, upper, weight of upper) table rows for the wind speed."""
+        if self.wind_speeds is None:
+            return 0, 0, 0.0
+        if wind_speed is None:
+            raise ValueError('This polar requires a wind speed.')
+        if wind_speed <= self.wind_speeds[0]:
+            return 0, 0, 0.0
+        last = self.wind_speeds.size - 1
+        if wind_speed >= self.wind_speeds[-1]:
+            return last, last, 0.0
+        upper = int(np.searchsorted(self.wind_speeds, wind_speed))
+        lower = upper - 1
+        frac = ((wind_speed - self.wind_speeds[lower]) /
+                (self.wind_speeds[upper] - self.wind_speeds[lower]))
+        return lower, upper, frac
+
+
+# Unit boat speed strictly between the 20 degree no-go zones around upwind
+# and downwind, at any resolution.
+DEFAULT_POLAR = PolarTable([0.0, 20.0, 20.0, 160.0, 160.0, 180.0],
+                           [0.0, 0.0, 1.0, 1.0, 0.0, 0.0])
 
 
 def getServoAnglesImpl(abs_wind_dir, yaw, intended_angle):
@@ -130,21 +638,14 @@ def getServoAnglesImpl(abs_wind_dir, yaw, intended_angle):
     else:
         sail = 15.0 * np.sign(angle_of_attack)
 
-    offset = intended_angle - yaw
+    # turn the short way round, saturating at the tail limits
+    offset = (intended_angle - yaw + 180.0) % 360.0 - 180.0
     #sail = sail + 74.0
 
     if (abs(offset) < 30):
         tail = offset
     else:
-        bigGang = 1
-        if (abs(offset) > 180):
-            bigGang = -1
-
-        if (offset > 0):
-            tail = -30
-        if (offset < 0):
-            tail = 30
-        tail = tail * bigGang
+        tail = 30.0 * np.sign(offset)
 
     return sail, tail
 
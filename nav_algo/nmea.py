@@ -1,3 +1,6 @@
+from collections import namedtuple
+
+
 class NMEA:
     """A parser for National Marine Electronics Association (NMEA) sentences.
 
@@ -36,6 +39,9 @@ class NMEA:
     def parse(self):
         """Parses the sentence associated with the NMEA object."""
         self.fields = self.sentence.split(',')
+        self.utc = None
+        self.latitude = None
+        self.longitude = None
 
         if "RMC" in self.sentence:
             self.parseRMC()
@@ -187,3 +193,247 @@ class NMEA:
             self.hour = int(time[0:2])
             self.minute = int(time[2:4])
             self.second = int(time[4:6])
+
+
+KNOTS_TO_METERS_PER_SECOND = 1852.0 / 3600.0
+
+NMEAFix = namedtuple('NMEAFix', [
+    'time', 'latitude', 'longitude', 'fix_quality', 'speed', 'course', 'hdop',
+    'satellites'
+])
+NMEAFix.__doc__ = """A GPS fix parsed from an NMEA stream.
+
+Attributes:
+    time (float): Seconds since midnight UTC.
+    latitude (float): The latitude (in decimal degrees).
+    longitude (float): The longitude (in decimal degrees).
+    fix_quality (int): The GGA fix quality (1 for GPS, 2 for DGPS, ...).
+    speed (float): The speed over the ground (in m/s), or None.
+    course (float): The true course over the ground (in degrees), or None.
+    hdop (float): The horizontal dilution of precision, or None.
+    satellites (int): The number of satellites used, or None.
+"""
+
+
+def checksum(body):
+    """Computes the NMEA checksum (the XOR of every byte) of a sentence body.
+
+    The bytes are XORed together by folding the body, read as one integer,
+    in half until a single byte is left, which takes log2(len(body)) integer
+    operations instead of one per byte.
+
+    Args:
+        body (bytes): The sentence between the '$' and the '*'.
+
+    Returns:
+        int: The checksum.
+
+    """
+    n = len(body)
+    x = int.from_bytes(body, 'little')
+    while n > 1:
+        n = (n + 1) >> 1
+        x = (x & ((1 << (n << 3)) - 1)) ^ (x >> (n << 3))
+    return x
+
+
+def _degrees(value, hemisphere, negative):
+    """Converts a DDDMM.MMMM field to decimal degrees."""
+    value = float(value)
+    degs = value // 100
+    degs += (value - degs * 100) / 60.0
+    return -degs if hemisphere == negative else degs
+
+
+def _utcSeconds(value):
+    """Converts a hhmmss.ss field to seconds since midnight."""
+    value = float(value)
+    hours = value // 10000
+    minutes = value // 100 - hours * 100
+    return hours * 3600 + minutes * 60 + (value - (value // 100) * 100)
+
+
+class NMEAParser:
+    """A streaming parser for NMEA sentences.
+
+    Unlike the NMEA class, the parser works directly on bytes, verifies the
+    '*hh' checksum of every sentence, and dispatches on the sentence ID
+    instead of scanning the sentence. Sentences without a position (VTG and
+    GSA) update the speed, course and HDOP that are attached to the next fix,
+    so each valid RMC, GGA or GLL sentence produces one compact NMEAFix.
+
+    Args:
+        require_checksum (bool): (Optional) If True, sentences without a
+            checksum are rejected too.
+
+    Attributes:
+        sentences (int): The number of sentences seen.
+        checksum_errors (int): The number of sentences with a bad or missing checksum.
+        errors (int): The number of malformed sentences.
+
+    """
+    TALKERS = (b'GP', b'GN', b'GL', b'GA', b'GB', b'BD')
+
+    def __init__(self, require_checksum=True):
+        self.require_checksum = require_checksum
+        self.sentences = 0
+        self.checksum_errors = 0
+        self.errors = 0
+        self.fix_quality = 1
+        self.speed = None
+        self.course = None
+        self.hdop = None
+        self.satellites = None
+        self._parsers = {
+            b'RMC': self._parseRMC,
+            b'VTG': self._parseVTG,
+            b'GGA': self._parseGGA,
+            b'GSA': self._parseGSA,
+            b'GLL': self._parseGLL,
+        }
+
+    def parseLine(self, line):
+        """Parses a single sentence.
+
+        Args:
+            line (bytes): The sentence, with or without the line ending.
+
+        Returns:
+            NMEAFix: The fix in the sentence, or None if it has no valid fix.
+
+        """
+        self.sentences += 1
+        start = line.find(b'$')
+        if start < 0:
+            self.errors += 1
+            return None
+        # sentences that carry nothing we use are not checksummed
+        parser = self._parsers.get(line[start + 3:start + 6])
+        if parser is None or line[start + 1:start + 3] not in NMEAParser.TALKERS:
+            return None
+
+        end = line.find(b'*', start)
+        if end < 0:
+            if self.require_checksum:
+                self.checksum_errors += 1
+                return None
+            body = line[start + 1:].rstrip()
+        else:
+            body = line[start + 1:end]
+            try:
+                expected = int(line[end + 1:end + 3], 16)
+            except ValueError:
+                expected = -1
+            if checksum(body) != expected:
+                self.checksum_errors += 1
+                return None
+
+        return self.parseSentence(body)
+
+    def parseSentence(self, body):
+        """Parses a sentence whose checksum has already been verified.
+
+        Args:
+            body (bytes): The sentence between the '$' and the '*'.
+
+        Returns:
+            NMEAFix: The fix in the sentence, or None if it has no valid fix.
+
+        """
+        parser = self._parsers.get(body[2:5])
+        if parser is None:
+            return None
+        try:
+            return parser(body.split(b','))
+        except (IndexError, ValueError):
+            self.errors += 1
+            return None
+
+    def parse(self, lines):
+        """Parses a stream of sentences.
+
+        Args:
+            lines (iterable of bytes): The sentences, e.g. a file opened in binary mode.
+
+        Yields:
+            NMEAFix: Every valid fix, in order.
+
+        """
+        parse_line = self.parseLine
+        for line in lines:
+            fix = parse_line(line)
+            if fix is not None:
+                yield fix
+
+    def _fix(self, utc, latitude, lat_dir, longitude, long_dir):
+        return NMEAFix(_utcSeconds(utc), _degrees(latitude, lat_dir, b'S'),
+                       _degrees(longitude, long_dir, b'W'), self.fix_quality,
+                       self.speed, self.course, self.hdop, self.satellites)
+
+    def _parseRMC(self, fields):
+        # $GPRMC,hhmmss,A,llll.ll,a,yyyyy.yy,a,knots,course,ddmmyy,...
+        if fields[2] != b'A':
+            return None
+        self._setVelocity(fields[7], fields[8])
+        return self._fix(fields[1], fields[3], fields[4], fields[5],
+                         fields[6])
+
+    def _parseVTG(self, fields):
+        # $GPVTG,course,T,course,M,knots,N,kmh,K
+        self._setVelocity(fields[5], fields[1])
+        return None
+
+    def _parseGGA(self, fields):
+        # $GPGGA,hhmmss,llll.ll,a,yyyyy.yy,a,quality,sats,hdop,...
+        quality = int(fields[6] or 0)
+        if quality == 0:
+            return None
+        self.fix_quality = quality
+        if fields[7]:
+            self.satellites = int(fields[7])
+        if fields[8]:
+            self.hdop = float(fields[8])
+        return self._fix(fields[1], fields[2], fields[3], fields[4],
+                         fields[5])
+
+    def _parseGSA(self, fields):
+        # $GPGSA,mode,fix,sv1,...,sv12,pdop,hdop,vdop
+        if fields[16]:
+            self.hdop = float(fields[16])
+        self.satellites = 12 - fields[3:15].count(b'')
+        return None
+
+    def _parseGLL(self, fields):
+        # $GPGLL,llll.ll,a,yyyyy.yy,a,hhmmss,A
+        if fields[6][:1] != b'A':
+            return None
+        return self._fix(fields[5], fields[1], fields[2], fields[3],
+                         fields[4])
+
+    def _setVelocity(self, knots, course):
+        self.speed = float(knots) * KNOTS_TO_METERS_PER_SECOND if knots else None
+        self.course = float(course) if course else None
+
+
+def parseStream(source, require_checksum=True):
+    """Parses every fix in an NMEA log or stream.
+
+    Args:
+        source (str, bytes, or iterable of bytes): A file path, the contents
+            of a log, or a binary stream of sentences (e.g. an open file or a
+            serial port).
+        require_checksum (bool): (Optional) If True, sentences without a
+            checksum are rejected.
+
+    Yields:
+        NMEAFix: Every valid fix, in order.
+
+    """
+    parser = NMEAParser(require_checksum)
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            yield from parser.parse(f)
+    elif isinstance(source, (bytes, bytearray)):
+        yield from parser.parse(source.splitlines())
+    else:
+        yield from parser.parse(source)
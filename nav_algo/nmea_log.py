@@ -0,0 +1,142 @@
+import nav_algo.nmea as nmea
+from collections import namedtuple
+import mmap
+import numpy as np
+import os
+
+NMEALog = namedtuple('NMEALog', [
+    'time', 'latitude', 'longitude', 'fix_quality', 'speed', 'course', 'x',
+    'y', 'sentences', 'checksum_errors'
+])
+NMEALog.__doc__ = """The fixes of a GPS log as NumPy columns, one row per UTC epoch.
+
+Attributes:
+    time (numpy.ndarray): Seconds since midnight UTC of the first fix, which
+        keeps increasing past midnight.
+    latitude (numpy.ndarray): The latitudes (in decimal degrees).
+    longitude (numpy.ndarray): The longitudes (in decimal degrees).
+    fix_quality (numpy.ndarray): The GGA fix qualities.
+    speed (numpy.ndarray): The speeds over the ground (in m/s), NaN if unknown.
+    course (numpy.ndarray): The courses over the ground (in degrees), NaN if unknown.
+    x (numpy.ndarray): The projected x positions, or None.
+    y (numpy.ndarray): The projected y positions, or None.
+    sentences (int): The number of sentences in the log.
+    checksum_errors (int): The number of sentences with a bad or missing checksum.
+"""
+
+# the sentences that carry fixes, speed, course, or quality information
+_SENTENCES = (b'RMC', b'VTG', b'GGA', b'GSA', b'GLL')
+
+# maps an ASCII byte to its hexadecimal value, or -1
+_HEX = np.full(256, -1, dtype=np.int16)
+for _i, _c in enumerate(b'0123456789ABCDEF'):
+    _HEX[_c] = _i
+for _i, _c in enumerate(b'abcdef'):
+    _HEX[_c] = 10 + _i
+
+
+def _codes(names):
+    """Packs byte strings into integers (big endian) for vectorized comparisons."""
+    return np.array([int.from_bytes(name, 'big') for name in names])
+
+
+def loadLog(path, coordinate_system=None):
+    """Loads every fix in an NMEA log file.
+
+    The file is memory mapped and scanned with NumPy: the sentences are
+    located, checksummed and filtered by type for the whole file at once, so
+    only the sentences we use are split and converted in Python.
+
+    Args:
+        path (str): The path to the log file.
+        coordinate_system (CoordinateSystem): (Optional) If given, the fixes
+            are also projected to x and y positions in this system.
+
+    Returns:
+        NMEALog: The fixes in the log.
+
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return _columns([], 0, 0, coordinate_system)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _parse(data, coordinate_system)
+
+
+def _parse(data, coordinate_system):
+    """Parses the contents of a log (see loadLog)."""
+    buf = np.frombuffer(data, dtype=np.uint8)
+    starts = np.flatnonzero(buf == ord('$'))
+    stars = np.flatnonzero(buf == ord('*'))
+    sentences = len(starts)
+
+    # every sentence needs a '*' before the next '$', two hex digits after
+    # it, and room for a talker and sentence ID
+    next_star = np.searchsorted(stars, starts)
+    has_star = next_star < len(stars)
+    ends = np.full(sentences, len(buf))
+    ends[has_star] = stars[next_star[has_star]]
+    next_start = np.append(starts[1:], len(buf))
+    ok = has_star & (ends < next_start) & (ends + 2 < len(buf)) & (
+        ends - starts > 6)
+    starts, ends = starts[ok], ends[ok]
+
+    high, low = _HEX[buf[ends + 1]], _HEX[buf[ends + 2]]
+    expected = np.where((high >= 0) & (low >= 0), high * 16 + low, -1)
+    if len(starts) > 0:
+        # XOR of each body: reduce over [start + 1, end), skipping [end, next start + 1)
+        bounds = np.empty(2 * len(starts), dtype=np.intp)
+        bounds[0::2] = starts + 1
+        bounds[1::2] = ends
+        sums = np.bitwise_xor.reduceat(buf, bounds)[0::2]
+    else:
+        sums = np.zeros(0, dtype=np.uint8)
+    valid = sums == expected
+    checksum_errors = sentences - int(np.count_nonzero(valid))
+    starts, ends = starts[valid], ends[valid]
+
+    # talker (2 bytes) and sentence ID (3 bytes) after the '$'
+    talkers = buf[starts + 1].astype(np.int64) << 8 | buf[starts + 2]
+    ids = (buf[starts + 3].astype(np.int64) << 16 | buf[starts + 4].astype(
+        np.int64) << 8 | buf[starts + 5])
+    used = np.isin(talkers, _codes(nmea.NMEAParser.TALKERS)) & np.isin(
+        ids, _codes(_SENTENCES))
+
+    parser = nmea.NMEAParser()
+    parse_sentence = parser.parseSentence
+    fixes = []
+    for start, end in zip(starts[used].tolist(), ends[used].tolist()):
+        fix = parse_sentence(data[start + 1:end])
+        if fix is not None:
+            fixes.append(fix)
+    return _columns(fixes, sentences, checksum_errors, coordinate_system)
+
+
+def _columns(fixes, sentences, checksum_errors, coordinate_system):
+    """Converts a list of NMEAFix records to an NMEALog.
+
+    The receiver reports every epoch in several sentences (RMC, GGA, GLL,
+    ...), so consecutive fixes of the same UTC epoch are merged into one row,
+    like GPSReader does: the position is the first fix of the epoch, and the
+    quality, speed and course are those of its last fix, which the parser has
+    updated from every GGA, RMC and VTG sentence of the epoch.
+
+    """
+    columns = np.array(
+        [(f.time, f.latitude, f.longitude, f.fix_quality, f.speed, f.course)
+         for f in fixes],
+        dtype=float).reshape(-1, 6)  # None becomes NaN
+    first = np.flatnonzero(np.diff(columns[:, 0], prepend=np.nan) != 0)
+    last = np.flatnonzero(np.diff(columns[:, 0], append=np.nan) != 0)
+    columns = np.concatenate((columns[first, :3], columns[last, 3:]), axis=1)
+    time = columns[:, 0]
+    # the UTC time restarts at midnight
+    rollovers = np.concatenate(([0], np.cumsum(np.diff(time) < -43200)))
+    time = time + 86400.0 * rollovers
+
+    x = y = None
+    if coordinate_system is not None:
+        x, y = coordinate_system.project(columns[:, 1], columns[:, 2])
+    return NMEALog(time, columns[:, 1], columns[:, 2],
+                   columns[:, 3].astype(int), columns[:, 4], columns[:, 5], x,
+                   y, sentences, checksum_errors)
@@ -1,8 +1,14 @@
 from nav_algo.SailSensors import UARTDevice
 import nav_algo.boat as boat
 import nav_algo.coordinates as coord
+import nav_algo.instrumentation as instrumentation
+import nav_algo.receiver as receiver
+import nav_algo.sensor_scheduler as sched
+import nav_algo.telemetry as telemetry
+import nav_algo.transmitter as transmitter
 from time import time
 import sys
+import threading
 
 
 # TODO document this class
@@ -12,15 +18,61 @@ class Radio(UARTDevice):
     -baudrate is an integer(should be 9600 for the xbee)
     -serialport, the serial port the xbee is connected to(just leave default for the xbee)
     -t is the uart timeout period(just leave at 1 for normal operation)
+    -binary, if True the navigation data and waypoints are sent as binary
+     telemetry frames (see nav_algo.telemetry) instead of text
+
+    Messages are queued and written by a background RadioTransmitter, so a
+    slow link never blocks the caller. Navigation data and waypoint lists
+    are coalesced (only the latest is kept) and hit waypoints and command
+    acknowledgements are sent first. Commands are read continuously by a
+    CommandReceiver thread and take effect as soon as they arrive. Call
+    close() to flush the queue and stop both threads.
     """
     def __init__(self,
                  baudrate,
                  boatController=None,
                  fleetRace=False,
                  serialPort='/dev/ttyS0',
-                 t=1):
+                 t=1,
+                 binary=False):
         super().__init__(baudrate, serialPort, t, fleetRace)
         self.boatController = boatController
+        self.binary = binary
+        # frames are numbered as they are sent, so the telemetry that is
+        # coalesced in the queue is not counted as lost by the base station
+        self.telemetry = telemetry.TelemetryEncoder(stamp_on_send=True)
+        self.transmitter = transmitter.RadioTransmitter(
+            self.sendUart, baudrate, stamp=self.telemetry.stamp)
+        self.transmitter.start()
+
+        self.quit_requested = threading.Event()
+        self.receiver = receiver.CommandReceiver(
+            self.readline, {
+                receiver.QUIT: self._onQuit,
+                receiver.OVERRIDE: self._onOverride,
+                receiver.AUTOPILOT: self._onAutopilot,
+                receiver.STATS: self._onStats,
+                receiver.PROFILE: self._onProfile,
+                receiver.ANGLES: self._onAngles,
+                receiver.INVALID: self._onInvalid,
+            })
+        self.receiver.start()
+        self.profiler = None
+
+    def send(self, message, priority=transmitter.NORMAL, key=None):
+        """Queues bytes for the base station (see RadioTransmitter.send)."""
+        return self.transmitter.send(message, priority, key)
+
+    def acknowledge(self, message: str):
+        """Prints a command acknowledgement and sends it ahead of telemetry."""
+        print(message)
+        self.send(message.encode('utf-8'), transmitter.URGENT)
+
+    def close(self, timeout=1.0):
+        """Sends the queued messages (waiting up to 'timeout' seconds) and closes the port."""
+        self.receiver.stop()
+        self.transmitter.stop(timeout)
+        self.serialStream.close()
 
     """
     Prints the given messge to the basestation. string must be sent with a 'b' before the string
@@ -28,57 +80,78 @@ class Radio(UARTDevice):
 
     def transmitString(self, message: str):
         print(message)
-        self.sendUart(message.encode('utf-8'))
-        pass
+        self.send(message.encode('utf-8'))
 
     """
-    Reads in a line from the XBee. NOTE this assumes that the line ends with \n
-    If 'q' is received, the nav algo will quit.
+    Handles quit commands received by the command receiver. This does not
+    block: it returns immediately unless a timeout is given, in which case it
+    waits up to 'timeout' seconds for the next command.
+    If 'q' has been received, the nav algo will quit.
     """
 
-    def receiveString(self):
-        l = self.readline()
-        l = l.replace('\n', '')
-        if l == 'q':
-            print("Quitting...")
-            self.sendUart("Quitting...".encode('utf-8'))
-            time.sleep(1)  # give time to send message, then quit
-            self.serialStream.close()
-            self.boatController.sensors.gps_serial_port.close()
+    def receiveString(self, timeout=0.0):
+        if timeout > 0 and not self.quit_requested.is_set():
+            self.receiver.waitForCommand(timeout=timeout)
+        if self.quit_requested.is_set():
+            self.close()  # give time to send the acknowledgement, then quit
+            self.boatController.close()
             raise RuntimeError('Quitting navigation algorithm.')
-        elif l == 'o':
-            # manual override
-            print("Entering Manual Override...")
-            self.sendUart("Entering Manual Override...".encode('utf-8'))
-            self.fleetRace = True
-        elif l == 'a':
-            # turn on autopilot
-            print("Entering Autopilot Mode...")
-            self.sendUart("Entering Autopilot Mode...".encode('utf-8'))
-            self.fleetRace = False
-        elif self.fleetRace:
-            # assumes the only other possibility is setting sail angles
-            self.readAngles(l)
 
     """
-    Reads in manual sail and rudder (tail sail) angles of the form "a b" (space delineated)
+    Command handlers, called on the receiver thread as soon as a command
+    arrives. Manual angles are of the form "a b" (space delineated).
     """
 
-    def readAngles(self, message: str):
-        spl = message.split(" ")
-        if not len(spl) == 2:
-            self.sendUart(
-                "Angles in incorrect format. Ignoring.".encode('utf-8'))
+    def _onQuit(self, command):
+        self.acknowledge("Quitting...")
+        self.quit_requested.set()
+
+    def _onOverride(self, command):
+        self.fleetRace = True
+        self.acknowledge("Entering Manual Override...")
+
+    def _onAutopilot(self, command):
+        self.fleetRace = False
+        self.acknowledge("Entering Autopilot Mode...")
+
+    def _onStats(self, command):
+        # the first request turns timing on, later ones send the percentiles
+        # (and keep a copy on the pi) and the achieved sensor rates
+        if not instrumentation.isEnabled():
+            instrumentation.enable()
+            self.acknowledge("Timing enabled, send 's' again for statistics.")
             return
+        instrumentation.dump('timings.json')
+        text = instrumentation.summaryText()
+        sensor_stats = None
+        if self.boatController is not None:
+            sensor_stats = self.boatController.sensorStats()
+        if sensor_stats is not None:
+            text += '\n' + sched.statsText(sensor_stats)
+        self.transmitString(text + '\n')
 
-        sail = float(spl[0])
-        tail = float(spl[1])
-        self.boatController.setAngles(sail, tail)
+    def _onProfile(self, command):
+        if self.profiler is not None and self.profiler.is_alive():
+            self.acknowledge("Already profiling.")
+            return
+        path = 'profile-{}.folded'.format(int(time()))
+        self.profiler = instrumentation.SamplingProfiler(10.0, path=path)
+        self.profiler.start()
+        self.acknowledge("Profiling for 10 s into {}".format(path))
+
+    def _onAngles(self, command):
+        if self.fleetRace and self.boatController is not None:
+            self.boatController.setAngles(command.sail, command.tail)
+
+    def _onInvalid(self, command):
+        if self.fleetRace:
+            self.acknowledge("Angles in incorrect format. Ignoring.")
 
     """
     Sends all of the boat data to the basestation. All arguments are taken in as floats
     """
 
+    @instrumentation.timed('Radio.printData')
     def printData(self, boatController):
         """Data should be of the form:.
 
@@ -99,6 +172,8 @@ class Radio(UARTDevice):
         Note that fields are comma delineated and there is only a new line
         character at the end of the string.
 
+        In binary mode, the same fields are sent as one 61 byte frame.
+
         """
         origLat = boatController.coordinate_system.LAT_OFFSET
         origLong = boatController.coordinate_system.LONG_OFFSET
@@ -112,6 +187,16 @@ class Radio(UARTDevice):
         tailAngle = boatController.tail_angle
         heading = boatController.sensors.velocity.angle()
 
+        if self.binary:
+            self.send(self.telemetry.navigation(origLat, origLong,
+                                                currentPositionX,
+                                                currentPositionY, windDir,
+                                                pitch, roll, yaw, sailAngle,
+                                                tailAngle, heading),
+                      transmitter.TELEMETRY,
+                      key='navigation')
+            return
+
         msg = ("----------NAVIGATION----------" + ",Origin Latitude: " +
                str(origLat) + ",Origin Longitude: " + str(origLong) +
                ",X position: " + str(currentPositionX) + ",Y position: " +
@@ -121,8 +206,7 @@ class Radio(UARTDevice):
                str(tailAngle) + ",Heading: " + str(heading) +
                ",----------END----------" + '\n')
         print(msg)
-        msg = msg.encode()
-        self.sendUart(msg)
+        self.send(msg.encode(), transmitter.TELEMETRY, key='navigation')
         return
         """
         Takes a list of tuple waypoints and sends them to the basestation.
@@ -143,15 +227,22 @@ class Radio(UARTDevice):
         the same point are space delineated. The waypoints should be printed in
         order from first to last (do not include waypoints that have already
         been hit).
+
+        In binary mode, the list is only sent in full when it has changed.
         """
+        if self.binary:
+            # waypoint frames may be deltas, so they are never coalesced
+            self.send(self.telemetry.waypoints(currentWaypointsArray),
+                      transmitter.TELEMETRY)
+            return
+
         msg = "----------WAYPOINTS----------"
         for j in currentWaypointsArray:
             msg = msg + ",X:" + str(j.x) + " Y:" + str(j.y)
         pass
         msg = msg + ",----------END----------" + '\n'
         print(msg)
-        msg = msg.encode()
-        self.sendUart(msg)
+        self.send(msg.encode(), transmitter.TELEMETRY, key='waypoints')
         return
 
     """
@@ -172,9 +263,12 @@ class Radio(UARTDevice):
         Note 'printAllWaypoints' should be called immediately after this.
 
         """
+        if self.binary:
+            self.send(self.telemetry.hit(hitWaypoint), transmitter.URGENT)
+            return
+
         msg = ("----------HIT----------" + ",X:" + str(hitWaypoint.x) + " Y:" +
                str(hitWaypoint.y) + ",----------END----------" + '\n')
         print(msg)
-        msg = msg.encode()
-        self.sendUart(msg)
+        self.send(msg.encode(), transmitter.URGENT)
         return
@@ -0,0 +1,143 @@
+from collections import deque, namedtuple
+import threading
+import time
+
+# command kinds
+QUIT = 'q'
+OVERRIDE = 'o'
+AUTOPILOT = 'a'
+STATS = 's'
+PROFILE = 'p'
+ANGLES = 'angles'
+INVALID = 'invalid'
+
+Command = namedtuple('Command', ['timestamp', 'kind', 'sail', 'tail', 'text'])
+Command.__doc__ = """A command from the base station, timestamped with time.monotonic() when it was received.
+
+Attributes:
+    timestamp (float): When the command was received.
+    kind (str): QUIT, OVERRIDE, AUTOPILOT, STATS, PROFILE, ANGLES or INVALID.
+    sail (float): The sail angle of an ANGLES command, or None.
+    tail (float): The tail angle of an ANGLES command, or None.
+    text (str): The received line.
+"""
+
+
+def parseCommand(line, timestamp):
+    """Parses a line from the base station.
+
+    Commands are 'q' (quit), 'o' (manual override), 'a' (autopilot), 's'
+    (timing statistics), 'p' (profile) and manual angles of the form
+    'sail tail' (space delineated).
+
+    Args:
+        line (str): The received line.
+        timestamp (float): When the line was received.
+
+    Returns:
+        Command: The command, or None for an empty line.
+
+    """
+    text = line.strip()
+    if len(text) == 0:
+        return None
+    if text in (QUIT, OVERRIDE, AUTOPILOT, STATS, PROFILE):
+        return Command(timestamp, text, None, None, text)
+    spl = text.split(' ')
+    if len(spl) == 2:
+        try:
+            return Command(timestamp, ANGLES, float(spl[0]), float(spl[1]),
+                           text)
+        except ValueError:
+            pass
+    return Command(timestamp, INVALID, None, None, text)
+
+
+class CommandReceiver(threading.Thread):
+    """Reads commands from the base station in a background thread.
+
+    Every command is handled on the receiver thread as soon as its line
+    arrives, so the handlers (e.g. a kill switch) take effect without waiting
+    for the control loop, and the control loop never blocks on the radio.
+
+    Args:
+        readline (callable): Reads a line, returning an empty string (or
+            bytes) when it times out.
+        handlers (dict of str: callable): (Optional) The function called with
+            the Command for each kind of command.
+
+    Attributes:
+        history (deque of Command): The most recent commands, oldest first.
+        received (int): The number of commands received.
+        errors (int): The number of reads or handlers that raised an exception.
+
+    """
+    def __init__(self, readline, handlers=None, history=32):
+        super().__init__(name='CommandReceiver', daemon=True)
+        self.readline = readline
+        self.handlers = dict(handlers) if handlers is not None else {}
+        self.history = deque(maxlen=history)
+        self.received = 0
+        self.errors = 0
+        self._new_command = threading.Condition()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Reads and handles commands until stop() is called."""
+        while not self._stop_event.is_set():
+            try:
+                line = self.readline()
+            except Exception:
+                if self._stop_event.is_set():
+                    break
+                self.errors += 1
+                self._stop_event.wait(0.1)
+                continue
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', 'replace')
+            command = parseCommand(line, time.monotonic())
+            if command is not None:
+                self.handle(command)
+
+    def handle(self, command):
+        """Records a command and calls its handler.
+
+        Args:
+            command (Command): The command.
+
+        """
+        handler = self.handlers.get(command.kind)
+        if handler is not None:
+            try:
+                handler(command)
+            except Exception:
+                self.errors += 1
+        with self._new_command:
+            self.history.append(command)
+            self.received += 1
+            self._new_command.notify_all()
+
+    def waitForCommand(self, received=None, timeout=None):
+        """Waits until more than 'received' commands have been received.
+
+        Args:
+            received (int): (Optional) The number of commands the caller has
+                seen, the current number if not given.
+            timeout (float): (Optional) The maximum time to wait (in seconds).
+
+        Returns:
+            int: The number of commands received.
+
+        """
+        with self._new_command:
+            if received is None:
+                received = self.received
+            self._new_command.wait_for(lambda: self.received > received,
+                                       timeout)
+            return self.received
+
+    def stop(self):
+        """Stops the receiver (after the current read times out)."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
@@ -0,0 +1,237 @@
+from collections import deque, namedtuple
+import threading
+import time
+
+SensorReading = namedtuple('SensorReading', ['timestamp', 'latency', 'value'])
+SensorReading.__doc__ = """A raw sensor sample, timestamped with time.monotonic() when the read finished."""
+
+SensorStats = namedtuple(
+    'SensorStats',
+    ['rate', 'target_rate', 'mean_latency', 'max_latency', 'reads', 'errors'])
+SensorStats.__doc__ = """Achieved read rate (Hz) and read latencies (seconds) of a sensor."""
+
+
+class SensorTask(threading.Thread):
+    """Samples one sensor at a fixed rate on its own thread.
+
+    The task only does I/O: every sample is published as an immutable
+    SensorReading, and the control thread applies it to the sensor readings
+    later. Samples that are never applied are dropped, except for the
+    'history' most recent ones.
+
+    Args:
+        name (str): The name of the sensor.
+        sample (callable): Reads the sensor and returns the raw sample.
+        rate (float): How often to sample the sensor (in Hz).
+        bus_lock (threading.Lock): (Optional) Held while sampling, e.g. to share an I2C bus.
+        history (int): (Optional) How many unapplied samples to keep.
+        clock (object): (Optional) Provides monotonic() and sleep(seconds),
+            like the time module, which is used if not given.
+
+    Attributes:
+        latest (SensorReading): The most recent sample, or None.
+        reads (int): The number of successful reads.
+        errors (int): The number of reads that raised an exception.
+
+    """
+    def __init__(self, name, sample, rate, bus_lock=None, history=1,
+                 clock=None):
+        super().__init__(name='SensorTask-' + name, daemon=True)
+        self.sample = sample
+        self.clock = clock
+        self.period = 1.0 / rate
+        self.bus_lock = bus_lock
+        self.latest = None
+        self.pending = deque(maxlen=history)
+        self.reads = 0
+        self.errors = 0
+        self._read_times = deque(maxlen=50)
+        self._latencies = deque(maxlen=50)
+        self._stop_event = threading.Event()
+
+    def run(self):
+        """Samples the sensor until stop() is called."""
+        monotonic = time.monotonic
+        sleep = self._stop_event.wait
+        if self.clock is not None:
+            monotonic = self.clock.monotonic
+            sleep = self.clock.sleep
+        next_time = monotonic()
+        while not self._stop_event.is_set():
+            start = monotonic()
+            try:
+                if self.bus_lock is not None:
+                    with self.bus_lock:
+                        value = self.sample()
+                else:
+                    value = self.sample()
+            except Exception:
+                # a failed read (e.g. an I2C error) only skips this sample
+                self.errors += 1
+            else:
+                end = monotonic()
+                reading = SensorReading(end, end - start, value)
+                self.latest = reading
+                self.pending.append(reading)
+                self.reads += 1
+                self._read_times.append(end)
+                self._latencies.append(end - start)
+
+            # fixed rate: don't let the read time shift the schedule, but
+            # don't try to catch up on missed periods either
+            next_time += self.period
+            delay = next_time - monotonic()
+            if delay < -self.period:
+                next_time = monotonic()
+            elif delay > 0:
+                sleep(delay)
+
+    def stats(self):
+        """Returns the achieved rate and latencies over the last 50 reads.
+
+        Returns:
+            SensorStats: The statistics of this sensor.
+
+        """
+        read_times = list(self._read_times)
+        latencies = list(self._latencies)
+        rate = 0.0
+        if len(read_times) > 1 and read_times[-1] > read_times[0]:
+            rate = (len(read_times) - 1) / (read_times[-1] - read_times[0])
+        mean_latency = max_latency = 0.0
+        if len(latencies) > 0:
+            mean_latency = sum(latencies) / len(latencies)
+            max_latency = max(latencies)
+        return SensorStats(rate, 1.0 / self.period, mean_latency, max_latency,
+                           self.reads, self.errors)
+
+    def stop(self):
+        """Stops sampling, after the current sample if called by the sample callable."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+
+
+class SensorScheduler:
+    """Samples every sensor concurrently, each at its own rate.
+
+    The IMU and the anemometer (through the ADS1015) share the I2C bus, so
+    their tasks share a lock. The GPS is sampled on its own task unless the
+    sensors already have a background GPS reader. Readings are applied to the
+    sensorData object on the control thread by apply(), which never waits on
+    a sensor: it only takes the samples that have already been read.
+
+    Args:
+        sensors (sensorData): The sensors to sample.
+        imu_rate (float): (Optional) How often to sample the IMU (in Hz).
+        wind_rate (float): (Optional) How often to sample the anemometer (in Hz).
+        gps_rate (float): (Optional) How often to sample the GPS (in Hz).
+        i2c_lock (threading.Lock): (Optional) The I2C bus lock, a new lock if not given.
+        clock (object): (Optional) The clock of every task (see SensorTask).
+
+    Attributes:
+        tasks (dict of str: SensorTask): The sampling task of each sensor.
+
+    """
+    def __init__(self,
+                 sensors,
+                 imu_rate=20.0,
+                 wind_rate=20.0,
+                 gps_rate=1.0,
+                 i2c_lock=None,
+                 clock=None):
+        self.sensors = sensors
+        self.clock = clock
+        if i2c_lock is None:
+            i2c_lock = threading.Lock()
+
+        # every anemometer sample goes through the smoothing filter
+        self.tasks = {
+            'imu': SensorTask('imu',
+                              sensors.sampleIMU,
+                              imu_rate,
+                              i2c_lock,
+                              clock=clock),
+            'wind': SensorTask('wind',
+                               sensors.sampleWindDirection,
+                               wind_rate,
+                               i2c_lock,
+                               history=int(wind_rate * 10),
+                               clock=clock),
+        }
+        if sensors.gps_reader is None:
+            self.tasks['gps'] = SensorTask('gps',
+                                           sensors.sampleGPS,
+                                           gps_rate,
+                                           clock=clock)
+        self._applied_imu = None
+
+    def start(self):
+        """Starts sampling every sensor."""
+        for task in self.tasks.values():
+            task.start()
+
+    def stop(self):
+        """Stops sampling every sensor."""
+        for task in self.tasks.values():
+            task.stop()
+
+    def apply(self):
+        """Applies the samples read since the last call to the sensor readings.
+
+        Returns:
+            dict of str: float: The age of each sensor's latest reading (in seconds), or None.
+
+        """
+        imu = self.tasks['imu'].latest
+        if imu is not None and imu is not self._applied_imu:
+            self.sensors.applyIMU(imu.value)
+            self._applied_imu = imu
+
+        wind = self.tasks['wind'].pending
+        while len(wind) > 0:
+            self.sensors.applyWindDirection(wind.popleft().value)
+
+        if 'gps' in self.tasks:
+            gps = self.tasks['gps'].latest
+            gps_age = self.sensors.applyGPS(
+                gps.value if gps is not None else None)
+        else:
+            gps_age = self.sensors.readGPS()
+
+        now = (self.clock.monotonic()
+               if self.clock is not None else time.monotonic())
+        ages = {'gps': gps_age}
+        for name in ('imu', 'wind'):
+            latest = self.tasks[name].latest
+            ages[name] = now - latest.timestamp if latest is not None else None
+        return ages
+
+    def stats(self):
+        """Returns the achieved rate and latencies of every sensor.
+
+        Returns:
+            dict of str: SensorStats: The statistics of each sensor.
+
+        """
+        return {name: task.stats() for name, task in self.tasks.items()}
+
+
+def statsText(stats):
+    """Returns sensor statistics as text, one sensor per line (latencies in ms).
+
+    Args:
+        stats (dict of str: SensorStats): The statistics of each sensor (see SensorScheduler.stats).
+
+    Returns:
+        str: The statistics.
+
+    """
+    lines = []
+    for name, s in stats.items():
+        lines.append('{}: {:.1f}/{:.1f} Hz latency mean={:.2f} max={:.2f} '
+                     'reads={} errors={}'.format(name, s.rate, s.target_rate,
+                                                 s.mean_latency * 1e3,
+                                                 s.max_latency * 1e3, s.reads,
+                                                 s.errors))
+    return '\n'.join(lines)
@@ -1,14 +1,136 @@
 import nav_algo.nmea as nmea
+import nav_algo.filters as filters
+import nav_algo.instrumentation as instrumentation
 import nav_algo.coordinates as coord
 import nav_algo.SailSensors as SailSensors
+from collections import namedtuple
 from math import pi
 import serial
-import struct
+import threading
 import time
 
+SECONDS_PER_DAY = 24 * 3600
+
+GPSFix = namedtuple('GPSFix', ['timestamp', 'latitude', 'longitude', 'utc'])
+GPSFix.__doc__ = """A GPS fix.
+
+Attributes:
+    timestamp (float): The time.monotonic() when the fix was read.
+    latitude (float): The latitude (in decimal degrees).
+    longitude (float): The longitude (in decimal degrees).
+    utc (float): The epoch of the fix (in seconds since midnight UTC).
+"""
+
+
+def epochInterval(previous, current):
+    """Computes the time between two GPS epochs.
+
+    Args:
+        previous (float): The earlier epoch (in seconds since midnight UTC).
+        current (float): The later epoch (in seconds since midnight UTC).
+
+    Returns:
+        float: The time between the epochs (in seconds), wrapping at midnight.
+
+    """
+    return (current - previous) % SECONDS_PER_DAY
+
+
+class GPSReader(threading.Thread):
+    """Reads the GPS in a background thread.
+
+    The serial port stays open for the lifetime of the reader and every NMEA
+    sentence is parsed as soon as it arrives, so no fixes are thrown away and
+    consumers never wait on the 9600 baud UART. The receiver reports every
+    epoch in several sentences (RMC, GGA, GLL, ...), so only the first fix of
+    each UTC epoch is published. The latest fix is published as an immutable
+    GPSFix by a single attribute assignment, so readers always see a
+    consistent fix without taking a lock.
+
+    Args:
+        serial_port (serial.Serial): The (unopened) GPS serial port.
+
+    Attributes:
+        fix (GPSFix): The latest valid fix, or None before the first fix.
+        sentences (int): The number of sentences read.
+        errors (int): The number of failed reads of the serial port.
+        parser (NMEAParser): The parser, which counts checksum and parse errors.
+
+    """
+    def __init__(self, serial_port):
+        super().__init__(name='GPSReader', daemon=True)
+        self.serial_port = serial_port
+        self.fix = None
+        self.sentences = 0
+        self.errors = 0
+        self.parser = nmea.NMEAParser()
+        self._stop_event = threading.Event()
+        self._new_fix = threading.Condition()
+
+    def run(self):
+        """Reads and parses sentences until stop() is called."""
+        if not self.serial_port.is_open:
+            self.serial_port.open()
+        self.serial_port.reset_input_buffer()
+        while not self._stop_event.is_set():
+            try:
+                line = self.serial_port.readline()
+            except serial.SerialException:
+                if self._stop_event.is_set():
+                    break
+                self.errors += 1
+                time.sleep(0.1)
+                continue
+            if len(line) == 0:
+                continue  # timed out without a sentence
+
+            self.sentences += 1
+            # corrupted sentences fail the checksum and are dropped
+            nmea_fix = self.parser.parseLine(line)
+            # the other sentences of an epoch repeat its fix
+            if nmea_fix is None or (self.fix is not None
+                                    and nmea_fix.time == self.fix.utc):
+                continue
+            with self._new_fix:
+                self.fix = GPSFix(time.monotonic(), nmea_fix.latitude,
+                                  nmea_fix.longitude, nmea_fix.time)
+                self._new_fix.notify_all()
+        self.serial_port.close()
+
+    def waitForFix(self, previous=None, timeout=None):
+        """Waits until there is a fix newer than 'previous'.
+
+        Args:
+            previous (GPSFix): (Optional) The last fix the caller has seen.
+            timeout (float): (Optional) The maximum time to wait (in seconds).
+
+        Returns:
+            GPSFix: The latest fix, which is still 'previous' on timeout.
+
+        """
+        with self._new_fix:
+            self._new_fix.wait_for(lambda: self.fix is not previous, timeout)
+            return self.fix
+
+    def stop(self):
+        """Stops the reader and closes the serial port."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+
 
 class sensorData:
-    def __init__(self, coordinate_system=None):
+    """The latest readings of every sensor on the boat.
+
+    Args:
+        coordinate_system (CoordinateSystem): The global coordinate system.
+        background_gps (bool): (Optional) If True, the GPS is read continuously
+            by a GPSReader thread and readGPS returns the freshest fix
+            immediately. Otherwise readGPS opens the port and reads it on
+            every call.
+
+    """
+    def __init__(self, coordinate_system=None, background_gps=False):
         self.coordinate_system = coordinate_system
 
         # IMU
@@ -19,7 +141,9 @@ class sensorData:
         # anemometer
         self.wind_direction = 0  # wrt x-axis and noise removed
         self.wind_speed = 0  #don't need this, might add as an extra if there is time left
-        self.anemomSMA = []  #helps remove noise from the anemometer reading
+        # helps remove noise from the anemometer reading (each reading gets
+        # half of the weight, like the old halving average)
+        self.wind_filter = filters.CircularExponentialFilter(0.5)
 
         # GPS
         self.fix = False
@@ -27,7 +151,8 @@ class sensorData:
         self.longitude = 0.0
         self.velocity = None
         self.position = None
-        self.prev_time = None
+        self.prev_time = None  # the UTC epoch of the current fix
+        self.gps_fix_age = None  # seconds since the current fix was read
 
         #Sensor objects
         self.IMU = SailSensors.SailIMU()
@@ -37,21 +162,34 @@ class sensorData:
                                              baudrate=9600,
                                              timeout=1)
         self.gps_serial_port.port = '/dev/ttyAMA3'  #ttyAMA3 needs to bes
+        self.gps_reader = None
+        self._last_fix = None
+        if background_gps:
+            self.gps_reader = GPSReader(self.gps_serial_port)
+            self.gps_reader.start()
 
         #sensorData
         self.boat_direction = 0  # angle of the sail wrt north.
         self.sailAngleBoat = 0  #angle of the sail wrt to the boat.
         self.rawWind = 0
 
+    @instrumentation.timed('sensorData.readIMU')
     def readIMU(self):
-        rawData = self.IMU.i2c_read_imu()
-        eulerAngles = [0, 0, 0]
-        #iterates through the list of raw data and converts int into a list of three floats
-        for n in range(3):
-            byteFloatList = rawData[4 * n:4 + 4 * n]
-            eulerAngles[n] = struct.unpack(">f", bytes(byteFloatList))[0]
-            eulerAngles[n] *= (180 / pi)
+        self.applyIMU(self.sampleIMU())
+
+    @instrumentation.timed('sensorData.sampleIMU')
+    def sampleIMU(self):
+        """Reads the IMU without updating any readings.
 
+        Returns:
+            (float, float, float): The raw euler angles (in degrees).
+
+        """
+        return tuple(angle * (180 / pi)
+                     for angle in self.IMU.readEulerAngles())
+
+    def applyIMU(self, eulerAngles):
+        """Updates the attitude from raw euler angles (see sampleIMU)."""
         self.pitch = eulerAngles[0]
         self.roll = eulerAngles[2]
         self.yaw = 360 + 90 - eulerAngles[1]
@@ -63,68 +201,123 @@ class sensorData:
 
         return
 
+    @instrumentation.timed('sensorData.readWindDirection')
     def readWindDirection(self):
-        rawData = self.anemometer.readAnemometerVoltage()
-        """print(rawData)"""
+        self.applyWindDirection(self.sampleWindDirection())
+
+    @instrumentation.timed('sensorData.sampleWindDirection')
+    def sampleWindDirection(self):
+        """Reads the anemometer without updating any readings.
+
+        Returns:
+            float: The raw anemometer voltage.
+
+        """
+        return self.anemometer.readAnemometerVoltage()
+
+    def applyWindDirection(self, rawData):
+        """Updates the wind direction from a raw anemometer voltage (see sampleWindDirection)."""
         rawWind = rawData
         rawAngle = (360 - rawData * 360 / 1700) + 180
 
         windWrtN = (rawAngle + self.sailAngleBoat)
         windWrtN = (windWrtN + self.boat_direction + 270) % 360
-        self.wind_direction = self._addAverage(windWrtN)
+        self.wind_direction = self.wind_filter.update(windWrtN)
         return
 
+    @instrumentation.timed('sensorData.readGPS')
+    def readGPS(self, timeout=None):
+        """Updates the position and velocity from the GPS.
+
+        With a background GPS reader this never touches the serial port: it
+        uses the freshest fix (waiting up to 'timeout' seconds for one newer
+        than the last call if given) and returns immediately.
+
+        Args:
+            timeout (float): (Optional) Background mode only, how long to wait for a new fix.
 
-    def readGPS(self):
-        # use the NMEA parser
-        # TODO you may want to just leave this open
+        Returns:
+            float: The age of the current fix (in seconds), or None without a fix.
+
+        """
+        if self.gps_reader is not None:
+            fix = self.gps_reader.fix
+            if timeout is not None and fix is self._last_fix:
+                fix = self.gps_reader.waitForFix(self._last_fix, timeout)
+        else:
+            fix = self.sampleGPS()
+        return self.applyGPS(fix)
+
+    @instrumentation.timed('sensorData.sampleGPS')
+    def sampleGPS(self):
+        """Reads a few sentences from the GPS port without updating any readings.
+
+        Returns:
+            GPSFix: The last valid fix that was read, or None.
+
+        """
+        fix = None
+        parser = nmea.NMEAParser()
         self.gps_serial_port.open()
         self.gps_serial_port.reset_input_buffer()
         for _ in range(5):
             try:
-                line = self.gps_serial_port.readline().decode('utf-8')
-                #print(line)
-            except:
-                line = ''
-            nmea_data = nmea.NMEA(line)
-            if nmea_data.status:
-                self.fix = True
-                self.latitude = nmea_data.latitude
-                self.longitude = nmea_data.longitude
-                print("got lat {}, long {}".format(self.latitude,
-                                                   self.longitude))
-                new_position = coord.Vector(self.coordinate_system,
-                                            self.latitude, self.longitude)
-                cur_time = time.time()
-
-                if self.prev_time is None:
-                    self.position = new_position
-                    self.prev_time = cur_time
-                else:
-                    self.velocity = new_position.vectorSubtract(self.position)
-                    self.velocity.scale(1.0 / (cur_time - self.prev_time))
-                    self.position = new_position
-                    self.prev_time = cur_time
-                    
+                line = self.gps_serial_port.readline()
+            except serial.SerialException:
+                continue
+            nmea_fix = parser.parseLine(line)
+            if nmea_fix is not None:
+                fix = GPSFix(time.monotonic(), nmea_fix.latitude,
+                             nmea_fix.longitude, nmea_fix.time)
+
         self.gps_serial_port.close()
+        return fix
 
+    def applyGPS(self, fix):
+        """Updates the position and velocity from a fix (see sampleGPS).
 
+        A fix of the same UTC epoch as the current one is ignored, so the
+        velocity is only ever computed between two different epochs.
 
+        Args:
+            fix (GPSFix): The latest fix, or None if there is no new fix.
 
-    def _addAverage(self, newValue):
-        """Helper function that manages the SMA of the anemometer, this keeps the list at size =11 and returns the
-        average of the list of ints. This function assumes that anemometer readings are taken semi-frequently
-        parameter: newValue - int denoting number to be added to the """
-        self.anemomSMA.append(newValue / 2)
-        if (len(self.anemomSMA) > 1):
-            for i in range(len(self.anemomSMA) - 1):
-                self.anemomSMA[i] = self.anemomSMA[i] / 2
-        if (len(self.anemomSMA) > 10):
-            self.anemomSMA.pop(0)
-        sum = 0
-        for n in self.anemomSMA:
-            sum = sum + n
-        return sum
+        Returns:
+            float: The age of the current fix (in seconds), or None without a fix.
+
+        """
+        if fix is not None and (self._last_fix is None
+                                or fix.utc != self._last_fix.utc):
+            self._last_fix = fix
+            self._updatePosition(fix.latitude, fix.longitude, fix.utc)
+        if self._last_fix is None:
+            return None
+        self.gps_fix_age = time.monotonic() - self._last_fix.timestamp
+        return self.gps_fix_age
+
+    def _updatePosition(self, latitude, longitude, cur_time):
+        """Moves the boat to the fix of a new epoch and updates the velocity."""
+        self.fix = True
+        self.latitude = latitude
+        self.longitude = longitude
+        print("got lat {}, long {}".format(self.latitude, self.longitude))
+        new_position = coord.Vector.fromLatLon(self.coordinate_system,
+                                               self.latitude, self.longitude)
+
+        if self.prev_time is None:
+            self.position = new_position
+            self.prev_time = cur_time
+        else:
+            self.velocity = new_position.vectorSubtract(self.position)
+            self.velocity.iscale(1.0 / epochInterval(self.prev_time, cur_time))
+            self.position = new_position
+            self.prev_time = cur_time
+
+    def close(self):
+        """Stops the background GPS reader (if any) and closes the GPS port."""
+        if self.gps_reader is not None:
+            self.gps_reader.stop()
+        self.gps_serial_port.close()
 
     def readAll(self):
         self.readIMU()
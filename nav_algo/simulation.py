@@ -0,0 +1,489 @@
+"""
+A headless simulator that stands in for the boat hardware.
+
+A Simulation is a time-stepped 2D model of the boat: the tail turns the boat
+and the boat speed relaxes toward the polar speed at its angle to the wind.
+It hands out stand-ins for BoatController, sensorData, Servo and Radio that
+read and drive the model instead of the hardware (with optional GPS, IMU and
+anemometer noise), and it doubles as the clock of the control loop, so the
+real navigation code runs as fast as the model can be stepped.
+
+Nothing here imports the hardware drivers.
+"""
+from collections import deque, namedtuple
+import math
+import random
+import nav_algo.coordinates as coord
+import nav_algo.filters as filters
+import nav_algo.navigation_utilities as util
+import nav_algo.receiver as receiver
+
+SimulatedFix = namedtuple('SimulatedFix', ['timestamp', 'latitude', 'longitude'])
+SimulatedFix.__doc__ = """A GPS fix, timestamped with the simulation time when it was taken."""
+
+TrackPoint = namedtuple('TrackPoint', [
+    'time', 'x', 'y', 'heading', 'speed', 'sail_angle', 'tail_angle',
+    'wind_direction'
+])
+TrackPoint.__doc__ = """The true state of the simulated boat and the wind at a point in time."""
+
+
+class SimulationTimeout(RuntimeError):
+    """Raised when a simulation runs past its time limit."""
+
+
+class ConstantWind:
+    """A wind that is the same everywhere and at all times.
+
+    Args:
+        direction (float): The absolute wind direction (in degrees).
+        speed (float): (Optional) The wind speed (in m/s).
+
+    """
+    def __init__(self, direction, speed=5.0):
+        self.direction = direction
+        self.speed = speed
+
+    def at(self, x, y, t):
+        """Returns the (direction, speed) of the wind at a position and time."""
+        return self.direction, self.speed
+
+
+class ShiftingWind:
+    """A wind that oscillates around a mean direction and speed.
+
+    The direction swings back and forth by 'shift' degrees and can also veer
+    steadily, while the speed pulses by 'gust' m/s. The wind is a smooth,
+    deterministic function of time, so runs are reproducible; randomness
+    comes from the sensor noise of the Simulation.
+
+    Args:
+        direction (float): The mean absolute wind direction (in degrees).
+        speed (float): (Optional) The mean wind speed (in m/s).
+        shift (float): (Optional) The amplitude of the direction swings (in degrees).
+        shift_period (float): (Optional) The period of the direction swings (in seconds).
+        veer_rate (float): (Optional) The steady change of direction (in degrees per second).
+        gust (float): (Optional) The amplitude of the speed pulses (in m/s).
+        gust_period (float): (Optional) The period of the speed pulses (in seconds).
+
+    """
+    def __init__(self,
+                 direction,
+                 speed=5.0,
+                 shift=10.0,
+                 shift_period=300.0,
+                 veer_rate=0.0,
+                 gust=1.0,
+                 gust_period=60.0):
+        self.direction = direction
+        self.speed = speed
+        self.shift = shift
+        self.shift_period = shift_period
+        self.veer_rate = veer_rate
+        self.gust = gust
+        self.gust_period = gust_period
+
+    def at(self, x, y, t):
+        """Returns the (direction, speed) of the wind at a position and time."""
+        direction = (self.direction + self.veer_rate * t + self.shift *
+                     math.sin(2 * math.pi * t / self.shift_period))
+        speed = self.speed + self.gust * math.sin(
+            2 * math.pi * t / self.gust_period)
+        return direction % 360.0, max(speed, 0.0)
+
+
+class Simulation:
+    """A time-stepped 2D model of the boat and its clock.
+
+    Every step, the boat turns at 'turn_rate' degrees per second at full tail
+    deflection (proportionally less for smaller angles), its speed relaxes
+    toward the polar speed at its current angle to the wind with the time
+    constant 'acceleration_time', and it moves along its heading. The sail is
+    assumed to be trimmed by the controller. Time only advances when sleep is
+    called, which is what the control loop does between ticks.
+
+    Args:
+        wind (object): (Optional) Provides at(x, y, t) -> (direction, speed), e.g.
+            a ConstantWind or ShiftingWind. A steady 5 m/s wind from 45 degrees
+            if not given.
+        position (float, float): (Optional) The starting (x, y) position (in meters).
+        heading (float): (Optional) The starting heading (in degrees).
+        polar_table (PolarTable): (Optional) The boat polar (boat speeds in m/s),
+            the default polar if not given.
+        dt (float): (Optional) The time step of the model (in seconds).
+        turn_rate (float): (Optional) The turn rate at full tail deflection (in degrees per second).
+        acceleration_time (float): (Optional) The time constant of the boat speed (in seconds).
+        gps_rate (float): (Optional) How often the GPS gets a new fix (in Hz).
+        gps_noise (float): (Optional) The standard deviation of the GPS position error (in meters).
+        imu_noise (float): (Optional) The standard deviation of the IMU angle errors (in degrees).
+        wind_noise (float): (Optional) The standard deviation of the anemometer error (in degrees).
+        seed (int): (Optional) Seeds the sensor noise, for reproducible runs.
+        time_limit (float): (Optional) Raise SimulationTimeout once the simulation
+            time passes this (in seconds). No limit if not given.
+        record (bool): (Optional) Record the true state of every step in 'track'.
+        commands (list of (float, str)): (Optional) Base station commands sent at
+            the given simulation times (see SimulatedRadio).
+
+    Attributes:
+        time (float): The simulation time (in seconds).
+        x (float): The true x position of the boat (in meters).
+        y (float): The true y position of the boat (in meters).
+        heading (float): The true heading of the boat (in degrees).
+        speed (float): The true speed of the boat (in m/s).
+        sail_angle (float): The commanded sail angle (in degrees).
+        tail_angle (float): The commanded tail angle (in degrees).
+        track (list of TrackPoint): The recorded states, if 'record' is True.
+
+    """
+    def __init__(self,
+                 wind=None,
+                 position=(0.0, 0.0),
+                 heading=0.0,
+                 polar_table=None,
+                 dt=0.1,
+                 turn_rate=30.0,
+                 acceleration_time=3.0,
+                 gps_rate=1.0,
+                 gps_noise=0.0,
+                 imu_noise=0.0,
+                 wind_noise=0.0,
+                 seed=None,
+                 time_limit=None,
+                 record=True,
+                 commands=()):
+        self.wind = wind if wind is not None else ConstantWind(45.0)
+        self.polar_table = (polar_table if polar_table is not None else
+                            util.DEFAULT_POLAR)
+        self.dt = dt
+        self.turn_rate = turn_rate
+        self.acceleration_time = acceleration_time
+        self.gps_period = 1.0 / gps_rate
+        self.gps_noise = gps_noise
+        self.imu_noise = imu_noise
+        self.wind_noise = wind_noise
+        self.random = random.Random(seed)
+        self.time_limit = time_limit
+        self.record = record
+        self.commands = list(commands)
+
+        self.time = 0.0
+        self.x, self.y = position
+        self.heading = heading % 360.0
+        self.speed = 0.0
+        self.sail_angle = 0.0
+        self.tail_angle = 0.0
+        self.track = []
+        if record:
+            self._record(self.windAt()[0])
+
+    def monotonic(self):
+        """Returns the simulation time (in seconds), like time.monotonic."""
+        return self.time
+
+    def sleep(self, seconds):
+        """Advances the simulation by 'seconds', like time.sleep.
+
+        Raises:
+            SimulationTimeout: If the simulation time passes the time limit.
+
+        """
+        end = self.time + seconds
+        while end - self.time > 1e-9:
+            self.step(min(self.dt, end - self.time))
+        self.time = end
+        if self.time_limit is not None and self.time > self.time_limit:
+            raise SimulationTimeout(
+                'The simulation ran for more than {} s.'.format(
+                    self.time_limit))
+
+    def step(self, dt):
+        """Advances the model by one time step of 'dt' seconds."""
+        wind_direction, wind_speed = self.wind.at(self.x, self.y, self.time)
+
+        self.heading = (self.heading + self.turn_rate * dt * self.tail_angle /
+                        SimulatedServo.TAIL_MAX_ANGLE) % 360.0
+        target_speed = self.polar_table.speed(
+            self.heading - wind_direction,
+            wind_speed if self.polar_table.wind_speeds is not None else None)
+        self.speed += (target_speed - self.speed) * min(
+            1.0, dt / self.acceleration_time)
+
+        rad = math.radians(self.heading)
+        self.x += self.speed * math.cos(rad) * dt
+        self.y += self.speed * math.sin(rad) * dt
+        self.time += dt
+        if self.record:
+            self._record(wind_direction)
+
+    def windAt(self):
+        """Returns the true (direction, speed) of the wind at the boat."""
+        return self.wind.at(self.x, self.y, self.time)
+
+    def boat(self, coordinate_system):
+        """Returns a SimulatedBoat that stands in for a BoatController.
+
+        Args:
+            coordinate_system (CoordinateSystem): The global coordinate system.
+
+        """
+        return SimulatedBoat(self, coordinate_system)
+
+    def radio(self):
+        """Returns a SimulatedRadio (with the scripted commands) that stands in for a Radio."""
+        return SimulatedRadio(self, self.commands)
+
+    def _record(self, wind_direction):
+        self.track.append(
+            TrackPoint(self.time, self.x, self.y, self.heading, self.speed,
+                       self.sail_angle, self.tail_angle, wind_direction))
+
+
+class SimulatedSensors:
+    """Stands in for sensorData, reading the simulated boat with noise.
+
+    The readings have the same names and conventions as sensorData. The GPS
+    only gets a new fix every 1 / gps_rate seconds of simulation time, and
+    the position and velocity are derived from the fixes the same way.
+
+    Args:
+        simulation (Simulation): The simulated boat.
+        coordinate_system (CoordinateSystem): The global coordinate system.
+
+    """
+    def __init__(self, simulation, coordinate_system=None):
+        self.simulation = simulation
+        self.coordinate_system = coordinate_system
+
+        # IMU
+        self.pitch = 0
+        self.roll = 0
+        self.yaw = 0
+
+        # anemometer
+        self.wind_direction = 0
+        self.wind_speed = 0
+        self.wind_filter = filters.CircularExponentialFilter(0.5)
+
+        # GPS
+        self.fix = False
+        self.latitude = 0.0
+        self.longitude = 0.0
+        self.velocity = None
+        self.position = None
+        self.prev_time = None
+        self.gps_fix_age = None
+        self._last_fix = None
+
+        self.boat_direction = 0
+        self.sailAngleBoat = 0
+
+    def readIMU(self):
+        sim = self.simulation
+        self.pitch = self._noise(sim.imu_noise)
+        self.roll = self._noise(sim.imu_noise)
+        self.yaw = (sim.heading + self._noise(sim.imu_noise)) % 360.0
+        self.boat_direction = self.yaw
+
+    def readWindDirection(self):
+        direction, speed = self.simulation.windAt()
+        self.wind_direction = self.wind_filter.update(
+            direction + self._noise(self.simulation.wind_noise))
+        self.wind_speed = speed
+
+    def readGPS(self, timeout=None):
+        """Updates the position and velocity if the GPS has a new fix.
+
+        Args:
+            timeout (float): (Optional) How long to wait for a new fix (in simulation seconds).
+
+        Returns:
+            float: The age of the current fix (in seconds), or None without a fix.
+
+        """
+        sim = self.simulation
+        if timeout is not None and not self._fixDue():
+            sim.sleep(
+                min(timeout, self._last_fix.timestamp + sim.gps_period -
+                    sim.time))
+        if self._fixDue():
+            x = sim.x + self._noise(sim.gps_noise)
+            y = sim.y + self._noise(sim.gps_noise)
+            latitude, longitude = self.coordinate_system.unproject(x, y)
+            self._last_fix = SimulatedFix(sim.time, float(latitude),
+                                          float(longitude))
+            self._updatePosition(self._last_fix)
+        if self._last_fix is None:
+            return None
+        self.gps_fix_age = sim.time - self._last_fix.timestamp
+        return self.gps_fix_age
+
+    def readAll(self):
+        self.readIMU()
+        self.readWindDirection()
+        self.readGPS()
+
+    def close(self):
+        """Does nothing, there are no ports to close."""
+
+    def _fixDue(self):
+        return (self._last_fix is None or self.simulation.time -
+                self._last_fix.timestamp >= self.simulation.gps_period - 1e-9)
+
+    def _updatePosition(self, fix):
+        self.fix = True
+        self.latitude = fix.latitude
+        self.longitude = fix.longitude
+        new_position = coord.Vector.fromLatLon(self.coordinate_system,
+                                               fix.latitude, fix.longitude)
+        if self.prev_time is not None:
+            self.velocity = new_position.vectorSubtract(self.position)
+            self.velocity.iscale(1.0 / (fix.timestamp - self.prev_time))
+        self.position = new_position
+        self.prev_time = fix.timestamp
+
+    def _noise(self, sigma):
+        return self.simulation.random.gauss(0.0, sigma) if sigma > 0 else 0.0
+
+
+class SimulatedServo:
+    """Stands in for Servo, commanding the simulated sail and tail.
+
+    The angles are clamped to the same limits as the real servos.
+
+    Args:
+        simulation (Simulation): The simulated boat.
+
+    """
+    SAIL_MAX_ANGLE = 90
+    SAIL_MIN_ANGLE = -90
+
+    TAIL_MAX_ANGLE = 30
+    TAIL_MIN_ANGLE = -30
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+        self.currentTail = 0
+        self.currentSail = 0
+        self.setTail(0)
+        self.setSail(0)
+
+    def setTail(self, tail_angle):
+        tail_angle = min(max(tail_angle, SimulatedServo.TAIL_MIN_ANGLE),
+                         SimulatedServo.TAIL_MAX_ANGLE)
+        self.simulation.tail_angle = tail_angle
+        self.currentTail = tail_angle
+
+    def setSail(self, sail_angle):
+        sail_angle = min(max(sail_angle, SimulatedServo.SAIL_MIN_ANGLE),
+                         SimulatedServo.SAIL_MAX_ANGLE)
+        self.simulation.sail_angle = sail_angle
+        self.currentSail = sail_angle
+
+
+class SimulatedBoat:
+    """Stands in for BoatController, with simulated sensors and servos.
+
+    Args:
+        simulation (Simulation): The simulated boat.
+        coordinate_system (CoordinateSystem): The global coordinate system.
+
+    """
+    def __init__(self, simulation, coordinate_system=None):
+        self.simulation = simulation
+        self.coordinate_system = coordinate_system
+        self.sensors = SimulatedSensors(simulation, coordinate_system)
+        self.servos = SimulatedServo(simulation)
+        self.sail_angle = 0
+        self.tail_angle = 0
+
+    def getPosition(self):
+        return self.sensors.position
+
+    def updateSensors(self):
+        self.sensors.readAll()
+
+    def sensorStats(self):
+        """Returns None, the simulated sensors are not scheduled."""
+        return None
+
+    def close(self):
+        self.sensors.close()
+
+    def getServoAngles(self, intended_angle: float):
+        return util.getServoAnglesImpl(self.sensors.wind_direction,
+                                       self.sensors.yaw, intended_angle)
+
+    def setServos(self, intended_angle: float):
+        self.sail_angle, self.tail_angle = self.getServoAngles(intended_angle)
+        self.servos.setTail(self.tail_angle)
+        self.servos.setSail(self.sail_angle)
+        self.sensors.sailAngleBoat = self.servos.currentSail
+
+    def setAngles(self, mainsail: float, tail: float):
+        self.servos.setSail(mainsail)
+        self.servos.setTail(tail)
+
+
+class SimulatedRadio:
+    """Stands in for Radio. There is no base station, so nothing is sent.
+
+    Text messages and hit waypoints are kept for inspection. Commands come
+    from a script of (simulation time, line) pairs instead of the base
+    station, and are handled like the real ones when receiveString is
+    called. Nobody is at the controls of a simulated fleet race, so once
+    the script has run out during one, the base station sends 'q'.
+
+    Args:
+        simulation (Simulation): The simulated boat.
+        commands (list of (float, str)): (Optional) The scripted commands, in time order.
+
+    Attributes:
+        messages (list of str): The text messages.
+        hits (list of (float, Vector)): The simulation time and position of every hit waypoint.
+
+    """
+    def __init__(self, simulation, commands=()):
+        self.simulation = simulation
+        self.boatController = None
+        self.fleetRace = False
+        self.messages = []
+        self.hits = []
+        self.commands = deque(commands)
+
+    def transmitString(self, message: str):
+        self.messages.append(message)
+
+    def receiveString(self, timeout=0.0):
+        if timeout > 0:
+            self.simulation.sleep(timeout)
+        while (len(self.commands) > 0
+               and self.commands[0][0] <= self.simulation.time):
+            command = receiver.parseCommand(self.commands.popleft()[1],
+                                            self.simulation.time)
+            if command is not None:
+                self._handle(command)
+        if self.fleetRace and len(self.commands) == 0:
+            self._handle(receiver.parseCommand('q', self.simulation.time))
+
+    def printData(self, boatController):
+        pass
+
+    def printAllWaypoints(self, currentWaypointsArray):
+        pass
+
+    def printHitWaypoint(self, hitWaypoint):
+        self.hits.append((self.simulation.time, hitWaypoint))
+
+    def close(self, timeout=1.0):
+        pass
+
+    def _handle(self, command):
+        if command.kind == receiver.QUIT:
+            raise RuntimeError('Quitting navigation algorithm.')
+        if command.kind == receiver.OVERRIDE:
+            self.fleetRace = True
+        elif command.kind == receiver.AUTOPILOT:
+            self.fleetRace = False
+        elif (command.kind == receiver.ANGLES and self.fleetRace
+              and self.boatController is not None):
+            self.boatController.setAngles(command.sail, command.tail)
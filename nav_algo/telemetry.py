@@ -0,0 +1,358 @@
+"""
+A compact binary telemetry protocol for the XBee link to the base station.
+
+Every frame is
+
+    sync (2 bytes) | type (1) | sequence number (2) | length (2) | payload | CRC (2)
+
+with little endian fields and a CRC-16/CCITT over everything between the
+sync bytes and the CRC. Frames can be mixed with the plain text messages
+sent by Radio.transmitString: the decoder skips anything that is not a
+valid frame. The text telemetry that Radio sends when it is not in binary
+mode is decoded into the same messages by TextTelemetryDecoder.
+
+The waypoint list is only sent in full when it changes (and every few
+messages, so a base station that missed a frame catches up). Otherwise a
+tiny frame says that it is unchanged, or that the first few waypoints have
+been hit.
+"""
+from collections import namedtuple
+import binascii
+import struct
+
+SYNC = b'\xa5\x5a'
+
+NAVIGATION = 1
+WAYPOINTS = 2
+WAYPOINTS_UNCHANGED = 3
+WAYPOINTS_ADVANCED = 4
+HIT = 5
+
+# longer frames are treated as noise instead of waiting for their payload
+MAX_PAYLOAD = 4096
+
+_HEADER = struct.Struct('<2sBHH')
+_CRC = struct.Struct('<H')
+_SEQ = struct.Struct('<H')
+_REVISION = struct.Struct('<H')
+_NAVIGATION = struct.Struct('<dd9f')
+_WAYPOINTS = struct.Struct('<HH')
+_WAYPOINTS_ADVANCED = struct.Struct('<HHH')
+_POINT = struct.Struct('<2f')
+
+NavigationTelemetry = namedtuple('NavigationTelemetry', [
+    'seq', 'origin_latitude', 'origin_longitude', 'x', 'y', 'wind_direction',
+    'pitch', 'roll', 'yaw', 'sail_angle', 'tail_angle', 'heading'
+])
+NavigationTelemetry.__doc__ = """The boat data sent by Radio.printData."""
+
+WaypointsTelemetry = namedtuple('WaypointsTelemetry',
+                                ['seq', 'revision', 'waypoints'])
+WaypointsTelemetry.__doc__ = """The remaining waypoints, as a tuple of (x, y) tuples."""
+
+HitTelemetry = namedtuple('HitTelemetry', ['seq', 'x', 'y'])
+HitTelemetry.__doc__ = """A waypoint the boat just hit."""
+
+
+def _crc(data):
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+class TelemetryEncoder:
+    """Packs telemetry into binary frames.
+
+    Frames are numbered when they are packed, unless stamp_on_send is set:
+    then they are packed with sequence number 0 and stamp() numbers them as
+    they are written to the link. A transmit queue can then reorder, replace
+    or drop frames without the base station counting them as lost.
+
+    Args:
+        full_every (int): (Optional) Send the full waypoint list at least once
+            every full_every waypoint messages.
+        stamp_on_send (bool): (Optional) Leave the numbering to stamp().
+
+    Attributes:
+        seq (int): The sequence number of the next frame.
+        revision (int): The revision of the waypoint list, incremented
+            whenever the list changes.
+
+    """
+    def __init__(self, full_every=20, stamp_on_send=False):
+        self.full_every = full_every
+        self.stamp_on_send = stamp_on_send
+        self.seq = 0
+        self.revision = 0
+        self._waypoints = None
+        self._since_full = 0
+
+    def navigation(self, origin_latitude, origin_longitude, x, y,
+                   wind_direction, pitch, roll, yaw, sail_angle, tail_angle,
+                   heading):
+        """Packs the boat data.
+
+        Returns:
+            bytes: The frame.
+
+        """
+        return self._frame(
+            NAVIGATION,
+            _NAVIGATION.pack(origin_latitude, origin_longitude, x, y,
+                             wind_direction, pitch, roll, yaw, sail_angle,
+                             tail_angle, heading))
+
+    def waypoints(self, waypoints):
+        """Packs the remaining waypoints, only sending what has changed.
+
+        Args:
+            waypoints (iterable of Vector): The remaining waypoints, in order.
+
+        Returns:
+            bytes: The frame.
+
+        """
+        points = tuple((w.x, w.y) for w in waypoints)
+        previous = self._waypoints
+        self._since_full += 1
+        if previous is not None and self._since_full < self.full_every:
+            if points == previous:
+                return self._frame(WAYPOINTS_UNCHANGED,
+                                   _REVISION.pack(self.revision))
+            hit = len(previous) - len(points)
+            if 0 < hit and points == previous[hit:]:
+                base = self.revision
+                self._setWaypoints(points)
+                return self._frame(
+                    WAYPOINTS_ADVANCED,
+                    _WAYPOINTS_ADVANCED.pack(self.revision, base, hit))
+
+        if points != previous:
+            self._setWaypoints(points)
+        self._since_full = 0
+        payload = _WAYPOINTS.pack(self.revision, len(points)) + b''.join(
+            _POINT.pack(*p) for p in points)
+        return self._frame(WAYPOINTS, payload)
+
+    def hit(self, waypoint):
+        """Packs a waypoint that was just hit.
+
+        Args:
+            waypoint (Vector): The waypoint.
+
+        Returns:
+            bytes: The frame.
+
+        """
+        return self._frame(HIT, _POINT.pack(waypoint.x, waypoint.y))
+
+    def stamp(self, data):
+        """Numbers a frame with the next sequence number, just before it is sent.
+
+        Args:
+            data (bytes): A frame packed by this encoder, or any other message
+                (e.g. text), which is returned unchanged.
+
+        Returns:
+            bytes: The frame with its sequence number and CRC rewritten.
+
+        """
+        if not self.stamp_on_send or data[:2] != SYNC or len(
+                data) < _HEADER.size + _CRC.size:
+            return data
+        body = bytearray(data[2:-_CRC.size])
+        _SEQ.pack_into(body, 1, self.seq)
+        self.seq = (self.seq + 1) & 0xFFFF
+        return SYNC + body + _CRC.pack(_crc(body))
+
+    def _setWaypoints(self, points):
+        self._waypoints = points
+        self.revision = (self.revision + 1) & 0xFFFF
+
+    def _frame(self, frame_type, payload):
+        seq = 0
+        if not self.stamp_on_send:
+            seq = self.seq
+            self.seq = (self.seq + 1) & 0xFFFF
+        header = _HEADER.pack(SYNC, frame_type, seq, len(payload))
+        body = header[2:] + payload
+        return SYNC + body + _CRC.pack(_crc(body))
+
+
+class TelemetryDecoder:
+    """Unpacks frames from the bytes received by the base station.
+
+    Attributes:
+        waypoints (tuple of (float, float)): The latest known waypoint list, or None.
+        revision (int): The revision of the waypoint list.
+        crc_errors (int): The number of frames with a bad CRC.
+        corrupt (int): The number of frames with a good CRC but a payload
+            that does not match their type, which are skipped like noise.
+        lost (int): The number of frames missing from the sequence.
+        stale (int): The number of waypoint updates that could not be applied
+            because a previous waypoint frame was lost.
+
+    """
+    def __init__(self):
+        self.waypoints = None
+        self.revision = None
+        self.crc_errors = 0
+        self.corrupt = 0
+        self.lost = 0
+        self.stale = 0
+        self._buffer = bytearray()
+        self._next_seq = None
+
+    def feed(self, data):
+        """Adds received bytes and decodes every complete frame.
+
+        Args:
+            data (bytes): The received bytes.
+
+        Returns:
+            list: The decoded NavigationTelemetry, WaypointsTelemetry and
+            HitTelemetry messages, in order.
+
+        """
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        start = 0
+        while True:
+            start = buffer.find(SYNC, start)
+            if start < 0:
+                # keep a trailing sync byte that may start a frame
+                start = len(buffer) - 1 if buffer[-1:] == SYNC[:1] else len(
+                    buffer)
+                break
+            if len(buffer) - start < _HEADER.size:
+                break
+            _, frame_type, seq, length = _HEADER.unpack_from(buffer, start)
+            if length > MAX_PAYLOAD:
+                start += 1
+                continue
+            end = start + _HEADER.size + length + _CRC.size
+            if len(buffer) < end:
+                break
+            body = bytes(buffer[start + 2:end - _CRC.size])
+            if _CRC.unpack_from(buffer, end - _CRC.size)[0] != _crc(body):
+                # not a frame (or a corrupted one), look for the next sync
+                self.crc_errors += 1
+                start += 1
+                continue
+
+            try:
+                message = self._decode(frame_type, seq,
+                                       body[_HEADER.size - 2:])
+            except struct.error:
+                # the CRC matched by chance, look for the next sync
+                self.corrupt += 1
+                start += 1
+                continue
+
+            if self._next_seq is not None:
+                self.lost += (seq - self._next_seq) & 0xFFFF
+            self._next_seq = (seq + 1) & 0xFFFF
+            if message is not None:
+                messages.append(message)
+            start = end
+        del buffer[:start]
+        return messages
+
+    def _decode(self, frame_type, seq, payload):
+        if frame_type == NAVIGATION:
+            return NavigationTelemetry(seq, *_NAVIGATION.unpack(payload))
+        if frame_type == HIT:
+            return HitTelemetry(seq, *_POINT.unpack(payload))
+        if frame_type == WAYPOINTS:
+            revision, count = _WAYPOINTS.unpack_from(payload)
+            if len(payload) != _WAYPOINTS.size + count * _POINT.size:
+                raise struct.error('waypoint count does not match the length')
+            self.revision = revision
+            self.waypoints = tuple(
+                _POINT.iter_unpack(payload[_WAYPOINTS.size:]))
+        elif frame_type == WAYPOINTS_UNCHANGED:
+            if _REVISION.unpack(payload)[0] != self.revision:
+                self.stale += 1
+                return None
+        elif frame_type == WAYPOINTS_ADVANCED:
+            revision, base, hit = _WAYPOINTS_ADVANCED.unpack(payload)
+            if base != self.revision:
+                self.stale += 1
+                return None
+            self.revision = revision
+            self.waypoints = self.waypoints[hit:]
+        else:
+            return None
+        return WaypointsTelemetry(seq, self.revision, self.waypoints)
+
+
+class TextTelemetryDecoder:
+    """Unpacks the text telemetry sent by Radio when it is not in binary mode.
+
+    The messages have the same types as those of TelemetryDecoder, with a
+    sequence number (and waypoint revision) of None. Other lines, e.g.
+    status messages, are skipped.
+
+    Attributes:
+        waypoints (tuple of (float, float)): The latest known waypoint list, or None.
+        errors (int): The number of telemetry messages that could not be parsed.
+
+    """
+    _NAVIGATION = b'----------NAVIGATION----------'
+    _WAYPOINTS = b'----------WAYPOINTS----------'
+    _HIT = b'----------HIT----------'
+    _END = b'----------END----------'
+
+    def __init__(self):
+        self.waypoints = None
+        self.errors = 0
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Adds received bytes and decodes every complete line.
+
+        Args:
+            data (bytes): The received bytes.
+
+        Returns:
+            list: The decoded NavigationTelemetry, WaypointsTelemetry and
+            HitTelemetry messages, in order.
+
+        """
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        end = buffer.rfind(b'\n')
+        if end < 0:
+            return messages
+        lines = bytes(buffer[:end]).split(b'\n')
+        del buffer[:end + 1]
+        for line in lines:
+            fields = line.strip().split(b',')
+            if len(fields) < 2 or fields[-1] != self._END:
+                continue
+            try:
+                message = self._decode(fields[0], fields[1:-1])
+            except (IndexError, TypeError, ValueError):
+                self.errors += 1
+                continue
+            if message is not None:
+                messages.append(message)
+        return messages
+
+    def _decode(self, kind, fields):
+        if kind == self._NAVIGATION:
+            # "Name: value" fields, in the order of NavigationTelemetry
+            values = [float(f.split(b':', 1)[1]) for f in fields]
+            return NavigationTelemetry(None, *values)
+        if kind == self._WAYPOINTS:
+            self.waypoints = tuple(self._point(f) for f in fields)
+            return WaypointsTelemetry(None, None, self.waypoints)
+        if kind == self._HIT:
+            return HitTelemetry(None, *self._point(fields[0]))
+        return None
+
+    @staticmethod
+    def _point(field):
+        # "X:1.5 Y:-2.0"
+        x, y = field.split()
+        return float(x[2:]), float(y[2:])
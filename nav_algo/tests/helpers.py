@@ -0,0 +1,102 @@
+"""Stand-ins and test data shared by the tests."""
+import contextlib
+import sys
+from unittest import mock
+import cv2
+import numpy as np
+
+# the BGR color of the buoys the detectors look for
+BUOY_COLOR = (50, 150, 200)
+
+
+class SerialException(Exception):
+    pass
+
+
+@contextlib.contextmanager
+def stubDrivers():
+    """Puts stand-ins for the hardware driver packages in sys.modules.
+
+    The sensor and camera modules are imported inside it, so that they can
+    be imported (and tested with fakes) off the boat. SailSensors would
+    otherwise need smbus2, Adafruit_ADS1x15 and pyserial, and open the ADC at
+    import, and the camera needs picamera. Only the driver entries are
+    restored afterwards, the modules imported inside stay loaded.
+
+    """
+    serial = mock.MagicMock(name='serial')
+    serial.SerialException = SerialException
+    stubs = {
+        'smbus2': mock.MagicMock(name='smbus2'),
+        'Adafruit_ADS1x15': mock.MagicMock(name='Adafruit_ADS1x15'),
+        'serial': serial,
+        'picamera': mock.MagicMock(name='picamera'),
+        'picamera.array': mock.MagicMock(name='picamera.array'),
+    }
+    saved = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        yield stubs
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                del sys.modules[name]
+            else:
+                sys.modules[name] = module
+
+
+class FakeClock:
+    """A clock that only advances when something sleeps or moves its time.
+
+    Args:
+        start (float): (Optional) The starting time (in seconds).
+
+    Attributes:
+        time (float): The current time (in seconds).
+        sleeps (list of float): The duration of every sleep.
+
+    """
+    def __init__(self, start=0.0):
+        self.time = start
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.time
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.time += seconds
+
+
+def buoyFrame(height,
+              width,
+              buoy=None,
+              radius=20,
+              noise=90,
+              horizon=None,
+              seed=0):
+    """A noisy BGR frame with a buoy colored disc.
+
+    Args:
+        height (int): The height of the frame.
+        width (int): The width of the frame.
+        buoy ((int, int)): (Optional) The (x, y) center of the disc, no disc
+            if not given.
+        radius (int): (Optional) The radius of the disc.
+        noise (int): (Optional) The pixels are uniformly random below this.
+        horizon (int): (Optional) The rows above this are a bright sky, the
+            frame is all water if not given.
+        seed (int): (Optional) Seeds the noise.
+
+    Returns:
+        numpy.ndarray: The frame.
+
+    """
+    frame = np.random.default_rng(seed).integers(0,
+                                                 noise, (height, width, 3),
+                                                 dtype=np.uint8)
+    if horizon is not None:
+        frame[:horizon] += 180
+    if buoy is not None:
+        cv2.circle(frame, buoy, radius, BUOY_COLOR, -1)
+    return frame
@@ -0,0 +1,64 @@
+import unittest
+import cv2
+import numpy as np
+import nav_algo.benchmarks.detector_benchmark as detector_benchmark
+from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
+from nav_algo.tests.helpers import buoyFrame
+
+
+class TestBuoyDetectorMethods(unittest.TestCase):
+    def test_threshold(self):
+        # thresholding in BGR order matches converting to RGB first
+        frame = np.random.default_rng(0).integers(0,
+                                                  256, (48, 64, 3),
+                                                  dtype=np.uint8)
+        bd = BuoyDetector(48, 64)
+        bd.process(frame)
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        expected = cv2.inRange(rgb, (100, 100, 0), (255.0, 200, 100))
+        np.testing.assert_array_equal(bd.rgb_threshold_output, expected)
+
+    def test_persistent(self):
+        bd = BuoyDetector(480, 640)
+        buffers = [
+            bd.rgb_threshold_output, bd.cv_erode_output, bd.blur_output,
+            bd.cv_dilate_output
+        ]
+        for i, center in enumerate([(100, 100), (320, 240), (500, 400)]):
+            frame = buoyFrame(480, 640, center, radius=40, seed=i)
+            bd.process(frame)
+
+            # the stages write into the preallocated buffers
+            self.assertIs(bd.rgb_threshold_output, buffers[0])
+            self.assertIs(bd.cv_erode_output, buffers[1])
+            self.assertIs(bd.blur_output, buffers[2])
+            self.assertIs(bd.cv_dilate_output, buffers[3])
+
+            # and give the same result as a fresh detector and the old code
+            fresh = BuoyDetector(480, 640)
+            fresh.process(frame)
+            np.testing.assert_array_equal(bd.cv_dilate_output,
+                                          fresh.cv_dilate_output)
+            legacy = detector_benchmark.legacyProcess(frame)
+            self.assertEqual(len(bd.find_contours_output), len(legacy))
+            for a, b in zip(bd.find_contours_output, legacy):
+                np.testing.assert_array_equal(a, b)
+
+            x, y, w, h = cv2.boundingRect(
+                max(bd.filter_contours_output, key=cv2.contourArea))
+            self.assertLess(abs(x + w / 2 - center[0]), 5)
+            self.assertLess(abs(y + h / 2 - center[1]), 5)
+
+    def test_resize(self):
+        # a frame of another size reallocates the buffers
+        bd = BuoyDetector(480, 640)
+        bd.process(buoyFrame(525, 700, (350, 260), radius=40))
+        self.assertEqual(bd.cv_dilate_output.shape, (525, 700))
+        buffer = bd.cv_dilate_output
+        bd.process(buoyFrame(525, 700, (200, 260), radius=40, seed=1))
+        self.assertIs(bd.cv_dilate_output, buffer)
+        self.assertEqual(len(bd.filter_contours_output), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+from nav_algo.tests.helpers import buoyFrame, stubDrivers
+
+with stubDrivers():
+    import nav_algo.camera as camera
+
+
+class StillSource:
+    """Sends the same frame a few times, at 5 frames per second."""
+    def __init__(self, frame, count=3):
+        self.shape = frame.shape
+        self.frame = frame
+        self.count = count
+        self.closed = False
+
+    def read(self, out):
+        time.sleep(0.2)
+        if self.count == 0:
+            return False
+        self.count -= 1
+        out[...] = self.frame
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+class TestCameraMethods(unittest.TestCase):
+    def test_read(self):
+        source = StillSource(
+            buoyFrame(525, 700, (300, 205), radius=15, noise=60,
+                      horizon=200))
+        cam = camera.Camera(source)
+        try:
+            buoy, boat = cam.read(0.0, 0.0, 0.0, timeout=30.0)
+            self.assertIsNotNone(buoy)
+            self.assertGreater(buoy.x, 0.0)
+            self.assertEqual(cam.frame.index, 1)
+        finally:
+            cam.close()
+        self.assertTrue(source.closed)
+
+    def test_maxAge(self):
+        # a single frame, so its detections stay the newest
+        source = StillSource(buoyFrame(525,
+                                       700, (300, 205),
+                                       radius=15,
+                                       noise=60,
+                                       horizon=200),
+                             count=1)
+        cam = camera.Camera(source, workers=1, max_age=0.5)
+        try:
+            detections = cam.service.waitForDetections(timeout=30.0)
+            cam.capture.monotonic = lambda: detections.timestamp + 0.4
+            buoy, boat = cam.read(0.0, 0.0, 0.0)
+            self.assertIsNotNone(buoy)
+            self.assertIs(cam.detections, detections)
+
+            # the detections of an old frame are not used
+            cam.capture.monotonic = lambda: detections.timestamp + 0.6
+            self.assertEqual(cam.read(0.0, 0.0, 0.0), (None, None))
+        finally:
+            cam.close()
+        self.assertTrue(source.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
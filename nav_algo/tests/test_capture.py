@@ -0,0 +1,141 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+import cv2
+import numpy as np
+import nav_algo.capture as capture
+from nav_algo.tests.helpers import FakeClock
+
+
+class FakeSource:
+    """Frames filled with their number, captured one per release()."""
+    def __init__(self, count=100):
+        self.shape = (48, 64, 3)
+        self.count = count
+        self.read_count = 0
+        self.gate = threading.Semaphore(0)
+
+    def release(self, frames=1):
+        for _ in range(frames):
+            self.gate.release()
+
+    def read(self, out):
+        self.gate.acquire()
+        if self.read_count == self.count:
+            return False
+        self.read_count += 1
+        out[...] = self.read_count
+        return True
+
+
+class TestCaptureMethods(unittest.TestCase):
+    def setUp(self):
+        self.source = FakeSource()
+        self.capture = capture.CaptureThread(self.source)
+        self.capture.start()
+
+    def tearDown(self):
+        self.source.release(self.source.count)
+        self.capture.stop()
+
+    def captureFrames(self, frames):
+        """Captures frames without taking them, then the newest one."""
+        count = self.capture.frames + frames
+        self.source.release(frames)
+        for _ in range(500):
+            if self.capture.frames == count:
+                break
+            time.sleep(0.01)
+        return self.capture.latest()
+
+    def test_latest(self):
+        self.assertIsNone(self.capture.latest())
+        self.source.release()
+        frame = self.capture.waitForFrame(timeout=5.0)
+        self.assertEqual(frame.index, 1)
+        self.assertTrue((frame.image == 1).all())
+        self.assertEqual(self.capture.latest(), frame)
+
+        # the frames nobody read are dropped, the newest one wins
+        frame = self.captureFrames(3)
+        self.assertEqual(frame.index, 4)
+        self.assertTrue((frame.image == 4).all())
+        self.assertEqual(self.capture.dropped, 2)
+
+        # the frame being worked on is not overwritten by new frames
+        newest = self.captureFrames(10)
+        self.assertEqual(newest.index, 14)
+        self.assertEqual(self.capture.dropped, 11)
+        self.assertTrue((frame.image == 4).all())
+        self.assertTrue((newest.image == 14).all())
+        self.assertGreaterEqual(newest.timestamp, frame.timestamp)
+
+        # no new frame, the wait times out with the frame the caller has
+        self.assertIs(self.capture.waitForFrame(newest, timeout=0.01),
+                      newest)
+
+    def test_end(self):
+        self.source.count = 2
+        self.source.release(3)
+        self.capture.join(timeout=5.0)
+        self.assertTrue(self.capture.finished)
+        frame = self.capture.waitForFrame(timeout=5.0)
+        self.assertEqual(frame.index, 2)
+        self.assertIs(self.capture.waitForFrame(frame), frame)
+
+    def test_buffers(self):
+        self.assertRaises(ValueError,
+                          lambda: capture.CaptureThread(FakeSource(), 2))
+
+
+class TestVideoSourceMethods(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        for i in range(5):
+            image = np.full((60, 80, 3), 10 * (i + 1), np.uint8)
+            cv2.imwrite(
+                os.path.join(self.directory.name, '{:03d}.png'.format(i)),
+                image)
+        self.path = os.path.join(self.directory.name, '%03d.png')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read(self):
+        clock = FakeClock()
+        source = capture.VideoSource(self.path, fps=10, loop=True, clock=clock)
+        self.assertEqual(source.shape, (60, 80, 3))
+        out = np.empty(source.shape, np.uint8)
+        values = []
+        for _ in range(7):
+            self.assertTrue(source.read(out))
+            values.append(int(out[0, 0, 0]))
+        self.assertEqual(values, [10, 20, 30, 40, 50, 10, 20])
+        # the frames are played back at the frame rate
+        self.assertAlmostEqual(clock.time, 0.6)
+        source.close()
+
+        self.assertRaises(
+            IOError, lambda: capture.VideoSource(
+                os.path.join(self.directory.name, 'missing.avi')))
+
+    def test_capture(self):
+        # the capture thread scales the frames and stops at the end
+        source = capture.VideoSource(self.path)
+        thread = capture.CaptureThread(source, max_dimension=40)
+        self.assertEqual(thread.shape, (30, 40, 3))
+        thread.start()
+        thread.join(timeout=5.0)
+        self.assertTrue(thread.finished)
+        self.assertEqual(thread.frames, 5)
+        frame = thread.latest()
+        self.assertEqual(frame.index, 5)
+        self.assertEqual(frame.image.shape, (30, 40, 3))
+        self.assertTrue((frame.image == 50).all())
+        source.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import threading
+import unittest
+import nav_algo.control_loop as control_loop
+from nav_algo.tests.helpers import FakeClock
+
+
+class TestControlLoopMethods(unittest.TestCase):
+    def test_histogram(self):
+        h = control_loop.TimingHistogram([0.001, 0.01])
+        for duration in [0.0005, 0.001, 0.005, 2.0]:
+            h.add(duration)
+        self.assertEqual(h.bins(), [(0.001, 2), (0.01, 1),
+                                    (float('inf'), 1)])
+        self.assertEqual(h.count, 4)
+        self.assertEqual(h.max, 2.0)
+        self.assertAlmostEqual(h.mean(), 2.0065 / 4)
+
+    def test_rates(self):
+        clock = FakeClock(100.0)
+        loop = control_loop.ControlLoop(100.0, clock=clock)
+        runs = {'sense': 0, 'plan': 0}
+
+        def count(name, duration):
+            runs[name] += 1
+            clock.time += duration
+
+        loop.addStage('sense', lambda: count('sense', 0.002))
+        loop.addStage('plan', lambda: count('plan', 0.003), rate=25.0)
+        start = clock.monotonic()
+        loop.run(lambda: runs['sense'] < 20)
+
+        # fixed period without drift: the stage times are slept off
+        self.assertEqual(runs, {'sense': 20, 'plan': 5})
+        self.assertAlmostEqual(clock.monotonic() - start, 0.2)
+        self.assertAlmostEqual(clock.sleeps[0], 0.005)
+        self.assertAlmostEqual(clock.sleeps[1], 0.008)
+        stats = loop.stats()
+        self.assertAlmostEqual(stats.rate, 100.0)
+        self.assertEqual(stats.ticks, 20)
+        self.assertEqual(stats.deadline_misses, 0)
+        self.assertEqual([s.runs for s in stats.stages], [20, 5])
+        self.assertEqual(stats.stages[1].rate, 25.0)
+
+    def test_asynchronous(self):
+        clock = FakeClock(100.0)
+        loop = control_loop.ControlLoop(100.0, clock=clock)
+        release = threading.Event()
+        ticks = []
+        loop.addStage('sense', lambda: ticks.append(clock.monotonic()))
+        # a stage stuck on I/O does not hold up the loop
+        slow = loop.addStage('telemetry', lambda: release.wait(5.0),
+                             asynchronous=True)
+        loop.run(lambda: len(ticks) < 10)
+        self.assertEqual(len(ticks), 10)
+        release.set()
+        slow.stop(1.0)
+        self.assertAlmostEqual(ticks[-1] - ticks[0], 0.09)
+        self.assertEqual(loop.deadline_misses, 0)
+        self.assertEqual(slow.overruns, 9)
+        self.assertEqual(slow.histogram.count, 1)
+
+    def test_deadline_misses(self):
+        clock = FakeClock(100.0)
+        loop = control_loop.ControlLoop(100.0, clock=clock)
+        ticks = []
+
+        def slow():
+            ticks.append(clock.monotonic())
+            clock.time += 0.025
+
+        loop.addStage('slow', slow)
+        loop.run(lambda: len(ticks) < 4)
+        self.assertEqual(loop.deadline_misses, 4)
+        # the missed ticks are skipped instead of run back to back
+        self.assertEqual(len(ticks), 4)
+        for previous, current in zip(ticks, ticks[1:]):
+            self.assertAlmostEqual(current - previous, 0.025)
+        self.assertEqual(clock.sleeps, [])
+
+    def test_errors(self):
+        loop = control_loop.ControlLoop(100.0)
+
+        def fail():
+            raise ValueError('stage failed')
+
+        loop.addStage('fail', fail, asynchronous=True)
+        self.assertRaises(ValueError, loop.run)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,45 @@ class TestCoordinatesMethods(unittest.TestCase):
         self.assertAlmostEqual(coord_sys.LONG_OFFSET, upson_hall[1])
         self.assertAlmostEqual(coord_sys.EARTH_RADIUS, 6371000.0)
 
+    def test_project(self):
+        coord_sys = coord.CoordinateSystem(upson_hall[0], upson_hall[1])
+        xs, ys = coord_sys.project([upson_hall[0], olin_hall[0]],
+                                   [upson_hall[1], olin_hall[1]])
+        self.assertAlmostEqual(xs[0], 0)
+        self.assertAlmostEqual(ys[0], 0)
+        self.assertAlmostEqual(xs[1], 228.1, 1)
+        self.assertAlmostEqual(ys[1], 197.37, 2)
+
+        lats, longs = coord_sys.unproject(xs, ys)
+        self.assertAlmostEqual(lats[1], olin_hall[0], 10)
+        self.assertAlmostEqual(longs[1], olin_hall[1], 10)
+
+    def test_project_transverse_mercator(self):
+        coord_sys = coord.CoordinateSystem(
+            42.0, 76.0, coord.CoordinateSystem.TRANSVERSE_MERCATOR)
+
+        # one degree of latitude along the central meridian at 42.5 N
+        x, y = coord_sys.project(43.0, 76.0)
+        self.assertAlmostEqual(x, 0)
+        self.assertAlmostEqual(y, 111083.0, 0)
+
+        # close to the origin it agrees with the equirectangular projection
+        vec = coord.Vector(coord_sys, 42.001, 76.001)
+        self.assertAlmostEqual(vec.x, 82.8, 0)
+        self.assertAlmostEqual(vec.y, 111.1, 0)
+
+        # round trip over a several km course
+        lats = [42.0, 42.03, 41.97, 42.05]
+        longs = [76.0, 76.04, 75.95, 75.98]
+        xs, ys = coord_sys.project(lats, longs)
+        new_lats, new_longs = coord_sys.unproject(xs, ys)
+        for i in range(len(lats)):
+            self.assertAlmostEqual(new_lats[i], lats[i], 8)
+            self.assertAlmostEqual(new_longs[i], longs[i], 8)
+
+        self.assertRaises(ValueError,
+                          lambda: coord.CoordinateSystem(42.0, 76.0, 'utm'))
+
     def test_vector_init(self):
         coord_sys = coord.CoordinateSystem(upson_hall[0], upson_hall[1])
 
@@ -146,6 +185,47 @@ class TestCoordinatesMethods(unittest.TestCase):
         self.assertAlmostEqual(z.magnitude(), 0)
         self.assertAlmostEqual(z.angle(), 0)
 
+    def test_fast_constructors(self):
+        coord_sys = coord.CoordinateSystem(upson_hall[0], upson_hall[1])
+        vec = coord.Vector.fromLatLon(coord_sys, olin_hall[0], olin_hall[1])
+        self.assertAlmostEqual(vec.latitude, olin_hall[0])
+        self.assertAlmostEqual(vec.x, 228.1, 1)
+        self.assertAlmostEqual(vec.y, 197.37, 2)
+
+        vec = coord.Vector.fromPolar(60, 2)
+        self.assertAlmostEqual(vec.x, 1)
+        self.assertAlmostEqual(vec.y, 3**0.5)
+
+        vec = coord.Vector.fromXY(1, 2)
+        self.assertAlmostEqual(vec.x, 1)
+        self.assertAlmostEqual(vec.y, 2)
+        self.assertRaises(AttributeError, lambda: setattr(vec, 'z', 3))
+
+    def test_operators(self):
+        p1 = coord.Vector(x=5, y=5)
+        p2 = coord.Vector(x=2, y=3)
+        total = p1 + p2
+        self.assertAlmostEqual(total.x, 7)
+        self.assertAlmostEqual(total.y, 8)
+        diff = p1 - p2
+        self.assertAlmostEqual(diff.x, 3)
+        self.assertAlmostEqual(diff.y, 2)
+        scaled = 2 * p2 / 4
+        self.assertAlmostEqual(scaled.x, 1)
+        self.assertAlmostEqual(scaled.y, 1.5)
+        self.assertAlmostEqual((-p2).x, -2)
+
+        # in-place variants update the same object
+        v = coord.Vector(x=5, y=5)
+        self.assertIs(v.isub(p2), v)
+        self.assertAlmostEqual(v.x, 3)
+        self.assertIs(v.iscale(2), v)
+        self.assertAlmostEqual(v.y, 4)
+        v += p2
+        self.assertAlmostEqual(v.x, 8)
+        v *= 0.5
+        self.assertAlmostEqual(v.y, 3.5)
+
     def test_degToRad(self):
         self.assertAlmostEqual(coord.degToRad(0), 0)
         self.assertAlmostEqual(coord.degToRad(180), 3.14159, 5)
@@ -162,5 +242,51 @@ class TestCoordinatesMethods(unittest.TestCase):
         self.assertAlmostEqual(coord.rangeAngle(820), 100)
 
 
+    def test_route(self):
+        route = coord.Route([0, 3, 6], [0, 4, 8])
+        self.assertEqual(len(route), 3)
+        self.assertAlmostEqual(route[1].x, 3)
+        self.assertAlmostEqual(route[-1].y, 8)
+
+        # popping the first waypoint only moves the cursor
+        xs = route.xs
+        first = route.pop(0)
+        self.assertAlmostEqual(first.x, 0)
+        self.assertIs(route.xs, xs)
+        self.assertEqual(len(route), 2)
+        self.assertAlmostEqual(route.current().x, 3)
+        self.assertEqual([w.y for w in route], [4, 8])
+
+        # slices share the coordinate arrays
+        rest = route[1:]
+        self.assertEqual(len(rest), 1)
+        self.assertAlmostEqual(rest[0].x, 6)
+
+        dists = route.distances(coord.Vector(x=0, y=0))
+        self.assertAlmostEqual(dists[0], 5)
+        self.assertAlmostEqual(dists[1], 10)
+
+        route.insert(0, coord.Vector(x=1, y=1))
+        self.assertAlmostEqual(route[0].x, 1)
+        self.assertEqual(len(route), 3)
+
+        route.advance()
+        route.advance()
+        self.assertIsNone(route.advance())
+        self.assertRaises(IndexError, lambda: route.pop(0))
+        route.rewind()
+        self.assertEqual(len(route), 4)
+
+    def test_route_fromLatLon(self):
+        coord_sys = coord.CoordinateSystem(upson_hall[0], upson_hall[1])
+        route = coord.Route.fromLatLon(coord_sys,
+                                       [upson_hall[0], olin_hall[0]],
+                                       [upson_hall[1], olin_hall[1]])
+        vec = coord.Vector(coord_sys, olin_hall[0], olin_hall[1])
+        self.assertAlmostEqual(route[0].x, 0)
+        self.assertAlmostEqual(route[0].y, 0)
+        self.assertAlmostEqual(route[1].x, vec.x)
+        self.assertAlmostEqual(route[1].y, vec.y)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import time
+import unittest
+import cv2
+import nav_algo.capture as capture
+import nav_algo.detection as detection
+from nav_algo.tests.helpers import buoyFrame
+
+
+def _frame(center):
+    """A frame with a bright sky, dark water and a buoy colored disc."""
+    return buoyFrame(240, 320, center, noise=60, horizon=100)
+
+
+class TestDetectionMethods(unittest.TestCase):
+    def test_service(self):
+        service = detection.DetectionService((240, 320, 3), workers=2)
+        try:
+            self.assertTrue(service.submit(_frame((100, 180)), 12.5, 3))
+            record = service.waitForDetections(timeout=30.0)
+            self.assertEqual((record.timestamp, record.index), (12.5, 3))
+
+            # the buoy is found left of the center, below a level horizon
+            self.assertEqual(record.buoy.count, 1)
+            self.assertAlmostEqual(record.buoy.offset, -60.0, delta=2.0)
+            self.assertGreater(record.boat.distance, record.buoy.distance)
+            self.assertAlmostEqual(record.horizon.angle, 0.0, delta=1.0)
+            self.assertAlmostEqual(record.horizon.height, 100.0, delta=2.0)
+
+            # the newest frame wins, even if an older one finishes later
+            for index in (5, 4):
+                self.assertTrue(
+                    service.submit(_frame((200, 180)), index=index))
+            for _ in range(3000):
+                if service.completed == 3:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(service.latest.index, 5)
+            self.assertAlmostEqual(service.latest.buoy.offset,
+                                   40.0,
+                                   delta=2.0)
+            self.assertEqual(service.errors, 0)
+        finally:
+            service.close()
+
+    def test_dropped(self):
+        # with every slot taken, submit drops the frame instead of waiting
+        service = detection.DetectionService((240, 320, 3),
+                                             workers=1,
+                                             detectors=('buoy', ),
+                                             slots=1)
+        try:
+            self.assertTrue(service.submit(_frame((100, 180))))
+            self.assertFalse(service.submit(_frame((100, 180))))
+            self.assertEqual((service.submitted, service.dropped), (1, 1))
+            record = service.waitForDetections(timeout=30.0)
+            self.assertIsNone(record.boat)
+            self.assertIsNone(record.horizon)
+        finally:
+            service.close()
+        self.assertRaises(
+            ValueError,
+            lambda: detection.DetectionService((240, 320, 3),
+                                               detectors=('sail', )))
+
+    def test_roi(self):
+        # the band around the horizon gives the same sighting
+        service = detection.DetectionService((240, 320, 3),
+                                             workers=1,
+                                             roi=True)
+        try:
+            self.assertTrue(
+                service.submit(_frame((100, 110)), pitch=0.0, roll=0.0))
+            record = service.waitForDetections(timeout=30.0)
+            self.assertEqual(record.buoy.count, 1)
+            self.assertAlmostEqual(record.buoy.offset, -60.0, delta=2.0)
+            # the horizon is estimated at a quarter of the resolution
+            self.assertAlmostEqual(record.horizon.height, 100.0, delta=5.0)
+            self.assertEqual(service.errors, 0)
+        finally:
+            service.close()
+
+    def test_follow(self):
+        # every frame of a capture is handed to the workers
+        with tempfile.TemporaryDirectory() as directory:
+            for i in range(3):
+                cv2.imwrite(os.path.join(directory, '{}.png'.format(i)),
+                            _frame((100 + 50 * i, 180)))
+            source = capture.VideoSource(os.path.join(directory, '%d.png'),
+                                         fps=5)
+            thread = capture.CaptureThread(source)
+            service = detection.DetectionService(thread.shape, workers=1)
+            try:
+                thread.start()
+                service.follow(thread)
+                record = None
+                while record is None or record.index < 3:
+                    record = service.waitForDetections(record, timeout=30.0)
+                self.assertAlmostEqual(record.buoy.offset, 40.0, delta=2.0)
+            finally:
+                service.close()
+                thread.stop()
+                source.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
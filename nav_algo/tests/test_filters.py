@@ -0,0 +1,70 @@
+import unittest
+import nav_algo.filters as filters
+
+
+class TestFilters(unittest.TestCase):
+    def assertAngleAlmostEqual(self, first, second, places=7):
+        diff = (first - second + 180) % 360 - 180
+        self.assertAlmostEqual(diff, 0.0, places=places)
+
+    def test_exponentialFilter(self):
+        f = filters.ExponentialFilter(0.5)
+        self.assertIsNone(f.value)
+        self.assertEqual(f.update(4.0), 4.0)
+        self.assertEqual(f.update(8.0), 6.0)
+        self.assertEqual(f.update(8.0), 7.0)
+        self.assertRaises(ValueError, lambda: filters.ExponentialFilter(0.0))
+        self.assertRaises(ValueError, lambda: filters.ExponentialFilter(1.5))
+
+    def test_circularExponentialFilter(self):
+        f = filters.CircularExponentialFilter(0.5)
+        self.assertAlmostEqual(f.update(90.0), 90.0)
+
+        # readings on either side of north average to north, not south
+        f = filters.CircularExponentialFilter(0.5)
+        f.update(350.0)
+        self.assertAngleAlmostEqual(f.update(10.0), 0.0)
+        self.assertGreaterEqual(f.value, 0.0)
+        self.assertLess(f.value, 360.0)
+
+        # converges to a constant reading
+        for _ in range(60):
+            f.update(200.0)
+        self.assertAlmostEqual(f.value, 200.0)
+        self.assertRaises(ValueError,
+                          lambda: filters.CircularExponentialFilter(0.0))
+
+    def test_circularMovingAverage(self):
+        f = filters.CircularMovingAverage(4)
+        self.assertEqual(len(f), 0)
+        self.assertEqual(f.strength(), 0.0)
+        self.assertAlmostEqual(f.update(10.0), 10.0)
+        self.assertAngleAlmostEqual(f.update(350.0), 0.0)
+        self.assertEqual(len(f), 2)
+
+        # only the last 4 angles are in the window
+        for angle in [100.0, 100.0, 100.0, 100.0]:
+            f.update(angle)
+        self.assertEqual(len(f), 4)
+        self.assertAlmostEqual(f.value, 100.0)
+        self.assertAlmostEqual(f.strength(), 1.0)
+
+        # opposite angles cancel out
+        f = filters.CircularMovingAverage(2)
+        f.update(0.0)
+        f.update(180.0)
+        self.assertAlmostEqual(f.strength(), 0.0)
+
+        # the running sums stay accurate over many passes through the ring
+        f = filters.CircularMovingAverage(3)
+        for i in range(10000):
+            f.update(i * 37.0)
+        f.update(45.0)
+        f.update(45.0)
+        f.update(45.0)
+        self.assertAlmostEqual(f.value, 45.0)
+        self.assertRaises(ValueError, lambda: filters.CircularMovingAverage(0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import math
+import unittest
+import numpy as np
+import nav_algo.fleet as fleet
+import nav_algo.navigation_utilities as util
+import nav_algo.simulation as sim
+
+
+class TestFleetMethods(unittest.TestCase):
+    def setUp(self):
+        self.course = [(0.0, 40.0), (30.0, 10.0)]
+
+    def test_dynamics(self):
+        # boats on a beam reach sail straight, like the single boat model
+        boats = fleet.FleetSimulation([(1000.0, 0.0)],
+                                      positions=[(0.0, 0.0), (0.0, 5.0)],
+                                      headings=0.0,
+                                      wind_directions=90.0)
+        self.assertEqual(boats.boats, 2)
+        for _ in range(300):
+            boats.step()
+        s = sim.Simulation(wind=sim.ConstantWind(90.0), record=False)
+        s.sleep(30.0)
+        self.assertAlmostEqual(boats.time, 30.0)
+        np.testing.assert_allclose(boats.heading, 0.0)
+        np.testing.assert_allclose(boats.x, s.x)
+        np.testing.assert_allclose(boats.y, [0.0, 5.0])
+        self.assertEqual(list(boats.tacks), [0, 0])
+
+        # a boat that starts facing away turns around at the turn rate
+        boats = fleet.FleetSimulation([(100.0, 0.0)], [(0.0, 0.0)], 180.0,
+                                      90.0)
+        boats.step()
+        boats.step()
+        self.assertAlmostEqual(boats.heading[0],
+                               180.0 - 2 * boats.turn_rate * boats.dt)
+
+        # every boat sails at the polar speed of its own wind speed
+        table = util.PolarTable([0.0, 180.0], [[0.5, 0.5], [2.0, 2.0]],
+                                wind_speeds=[2.0, 8.0])
+        boats = fleet.FleetSimulation([(1000.0, 0.0)], [(0.0, 0.0)] * 3,
+                                      0.0,
+                                      90.0,
+                                      wind_speeds=[2.0, 5.0, 8.0],
+                                      polar_table=table)
+        for _ in range(300):
+            boats.step()
+        np.testing.assert_allclose(boats.speed, [0.5, 1.25, 2.0], rtol=1e-3)
+
+        self.assertRaises(
+            ValueError, lambda: fleet.FleetSimulation([], [(0.0, 0.0)], 0.0,
+                                                      90.0))
+
+    def test_run(self):
+        boats = fleet.FleetSimulation.random(self.course,
+                                             20,
+                                             wind_direction=90.0,
+                                             wind_shift=10.0,
+                                             seed=1,
+                                             time_limit=600.0)
+        result = boats.run()
+        self.assertEqual(result.course_times.shape, (20, ))
+        self.assertFalse(np.any(np.isnan(result.course_times)))
+        self.assertTrue(np.all(result.hits == 2))
+        self.assertTrue(np.all(boats.waypoint == 2))
+        self.assertLessEqual(boats.time, np.max(result.course_times) + 0.2)
+        # the first leg is upwind, so most boats tack
+        self.assertGreater(np.sum(result.tacks > 0), 10)
+
+        # the same seed gives the same fleet
+        again = fleet.FleetSimulation.random(self.course,
+                                             20,
+                                             wind_direction=90.0,
+                                             wind_shift=10.0,
+                                             seed=1,
+                                             time_limit=600.0).run()
+        np.testing.assert_array_equal(again.course_times, result.course_times)
+        np.testing.assert_array_equal(again.tacks, result.tacks)
+
+        # without hysterisis the boats tack back and forth
+        chatter = fleet.FleetSimulation.random(self.course,
+                                               20,
+                                               wind_direction=90.0,
+                                               wind_shift=10.0,
+                                               seed=1,
+                                               beating=0.0,
+                                               time_limit=600.0).run()
+        self.assertGreater(np.mean(chatter.tacks), np.mean(result.tacks))
+
+    def test_timeLimit(self):
+        boats = fleet.FleetSimulation.random(self.course,
+                                             5,
+                                             seed=2,
+                                             time_limit=5.0)
+        result = boats.run()
+        self.assertAlmostEqual(boats.time, 5.0)
+        self.assertTrue(np.all(np.isnan(result.course_times)))
+        summary = fleet.summarize(result)
+        self.assertEqual(summary.boats, 5)
+        self.assertEqual(summary.finished, 0.0)
+        self.assertTrue(math.isnan(summary.median_time))
+
+    def test_summarize(self):
+        result = fleet.FleetResult(np.array([10.0, 20.0, np.nan, 30.0]),
+                                   np.array([1, 2, 3, 6]),
+                                   np.array([2, 2, 1, 2]),
+                                   np.array([0, 1, 2, 0]))
+        summary = fleet.summarize(result)
+        self.assertEqual(summary.boats, 4)
+        self.assertEqual(summary.finished, 0.75)
+        self.assertEqual(summary.mean_time, 20.0)
+        self.assertEqual(summary.median_time, 20.0)
+        self.assertAlmostEqual(summary.p90_time, 28.0)
+        self.assertEqual(summary.mean_tacks, 3.0)
+        self.assertAlmostEqual(summary.miss_rate, 3 / 10)
+
+    def test_sweep(self):
+        settings = [{'beating': 3.5}, {'detection_radius': 8.0}]
+        serial = fleet.sweep(self.course,
+                             settings,
+                             boats=4,
+                             seed=3,
+                             processes=1)
+        parallel = fleet.sweep(self.course,
+                               settings,
+                               boats=4,
+                               seed=3,
+                               processes=2)
+        self.assertEqual(len(parallel), 2)
+        for a, b in zip(serial, parallel):
+            np.testing.assert_array_equal(a.course_times, b.course_times)
+            np.testing.assert_array_equal(a.tacks, b.tacks)
+        # a larger radius is hit sooner
+        self.assertLess(np.nanmean(serial[1].course_times),
+                        np.nanmean(serial[0].course_times))
+
+
+if __name__ == '__main__':
+    unittest.main()
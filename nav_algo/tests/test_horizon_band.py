@@ -0,0 +1,97 @@
+import unittest
+import cv2
+import numpy as np
+from nav_algo.computer_vision.detectors.boatDetector import BoatDetector
+from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
+from nav_algo.computer_vision.detectors.horizonBandDetector import HorizonBandDetector
+from nav_algo.tests.helpers import BUOY_COLOR, buoyFrame
+
+
+def _scene(horizon=200, buoy=(300, 205), hull=True, sky=True):
+    """A frame with a bright sky, dark water, a buoy colored disc and a buoy
+    colored patch of hull at the bottom."""
+    frame = buoyFrame(525,
+                      700,
+                      buoy,
+                      radius=15,
+                      noise=60,
+                      horizon=horizon if sky else None)
+    if hull:
+        frame[480:, 200:500] = BUOY_COLOR
+    return frame
+
+
+def _boxes(detector):
+    return sorted(cv2.boundingRect(c) for c in detector.filter_contours_output)
+
+
+class TestHorizonBandMethods(unittest.TestCase):
+    def setUp(self):
+        self.buoy = BuoyDetector(525, 700)
+        self.boat = BoatDetector(525, 700)
+        self.band = HorizonBandDetector([self.buoy, self.boat], 525, 700)
+
+    def test_band(self):
+        frame = _scene()
+        self.band.process(frame)
+        angle, height = self.band.horizon
+        self.assertAlmostEqual(angle, 0.0, delta=1.0)
+        self.assertAlmostEqual(height, 200.0, delta=3.0)
+
+        # only the band around the buoy is searched, not the hull below it
+        top, bottom, left, right = self.band.region
+        self.assertTrue(top < 205 < bottom < 480)
+        self.assertTrue(left < 300 < right)
+        self.assertLess(self.band.pixels, 525 * 700 / 4)
+
+        # the contours are in frame coordinates, as on the whole frame
+        full = BuoyDetector(525, 700)
+        full.process(_scene(hull=False))
+        self.assertEqual(_boxes(self.buoy), _boxes(full))
+        self.assertEqual(self.buoy.find_distance_largest_contour(),
+                         full.find_distance_largest_contour())
+
+    def test_attitude(self):
+        # between estimates, the horizon follows the pitch of the boat
+        self.band.process(_scene(), pitch=0.0, roll=0.0)
+        self.band.process(_scene(horizon=230, buoy=(300, 235)),
+                          pitch=2.0,
+                          roll=3.0)
+        self.assertEqual(self.band.estimates, 1)
+        angle, height = self.band.horizon
+        self.assertAlmostEqual(angle, -3.0, delta=1.0)
+        self.assertAlmostEqual(height, 230.0, delta=10.0)
+        self.assertEqual(len(self.buoy.filter_contours_output), 1)
+
+    def test_buffers(self):
+        # regions of every size reuse the buffers of the whole frame
+        self.band.process(_scene())
+        mask = self.buoy.cv_dilate_output
+        region = self.band.region
+        self.band.process(_scene(buoy=(600, 205)))
+        self.assertNotEqual(self.band.region, region)
+        top, bottom, left, right = self.band.region
+        self.assertEqual(self.buoy.cv_dilate_output.shape,
+                         (bottom - top, right - left))
+        self.assertTrue(np.shares_memory(self.buoy.cv_dilate_output, mask))
+        self.assertEqual(len(self.buoy.filter_contours_output), 1)
+
+    def test_nothing(self):
+        # without a candidate color in the band, the detectors do not run
+        self.band.process(_scene(buoy=(300, 100)))
+        self.assertIsNone(self.band.region)
+        self.assertEqual(self.band.pixels, 0)
+        self.assertEqual(self.buoy.filter_contours_output, [])
+        self.assertEqual(self.boat.filter_contours_output, [])
+
+    def test_no_horizon(self):
+        # without a horizon the whole height of the frame is searched
+        self.band.process(_scene(sky=False, hull=False, buoy=(300, 100)))
+        self.assertIsNone(self.band.horizon)
+        top, bottom, left, right = self.band.region
+        self.assertEqual((top, bottom), (0, 525))
+        self.assertEqual(len(self.buoy.filter_contours_output), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
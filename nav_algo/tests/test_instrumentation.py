@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import nav_algo.instrumentation as instrumentation
+
+
+class TestInstrumentationMethods(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.enable(False)
+        instrumentation.reset()
+
+    def test_disabled(self):
+        instrumentation.enable(False)
+
+        @instrumentation.timed('disabled')
+        def f(x):
+            return 2 * x
+
+        self.assertEqual(f(3), 6)
+        with instrumentation.timer('disabled.block'):
+            pass
+        self.assertEqual(instrumentation.summary(), {})
+
+    def test_timed(self):
+        instrumentation.enable()
+
+        @instrumentation.timed('sleep')
+        def f():
+            time.sleep(0.01)
+
+        f()
+        f()
+        with instrumentation.timer('block'):
+            time.sleep(0.005)
+        summary = instrumentation.summary()
+        self.assertEqual(list(summary), ['block', 'sleep'])
+        self.assertEqual(summary['sleep'].count, 2)
+        self.assertGreaterEqual(summary['sleep'].p50, 0.01)
+        self.assertGreaterEqual(summary['block'].max, 0.005)
+        self.assertIn('sleep: n=2', instrumentation.summaryText())
+
+    def test_timingRing(self):
+        r = instrumentation.TimingRing(100)
+        for i in range(1, 101):
+            r.add(i)
+        s = r.summary()
+        self.assertEqual((s.p50, s.p90, s.p99, s.max), (51, 91, 100, 100))
+        self.assertAlmostEqual(s.mean, 50.5)
+
+        # wraps around, keeping the most recent durations
+        for i in range(101, 151):
+            r.add(i)
+        self.assertEqual(r.values(), list(range(51, 151)))
+        self.assertEqual(r.summary().count, 150)
+        self.assertEqual(instrumentation.TimingRing(4).summary().max, 0.0)
+
+    def test_dump(self):
+        instrumentation.ring('a').add(0.5)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'timings.json')
+            instrumentation.dump(path)
+            with open(path) as f:
+                timings = json.load(f)
+        self.assertEqual(timings['a']['count'], 1)
+        self.assertEqual(timings['a']['p99'], 0.5)
+
+    def test_samplingProfiler(self):
+        done = threading.Event()
+
+        def busy():
+            while not done.is_set():
+                sum(range(1000))
+
+        worker = threading.Thread(target=busy, name='busy')
+        worker.start()
+        try:
+            profiler = instrumentation.SamplingProfiler(0.1, interval=0.001)
+            profiler.start()
+            profiler.join(2.0)
+        finally:
+            done.set()
+            worker.join()
+        self.assertGreater(profiler.samples, 0)
+        self.assertTrue(
+            any(
+                stack.startswith('busy;') and 'busy' in stack.split(';')[-1]
+                for stack in profiler.stacks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,254 @@
+import unittest
+import numpy as np
+import nav_algo.navigation_utilities as util
+
+
+class TestNavigationUtilitiesMethods(unittest.TestCase):
+    def setUp(self):
+        self.wind = 45.0
+
+    def test_optAngle(self):
+        # best angle is directly to target on the left side
+        angle, vmg = util.optAngleImpl(0.0, self.wind, False)
+        self.assertAlmostEqual(angle, 0.0)
+        self.assertAlmostEqual(vmg, 1.0)
+        angle, vmg = util.optAngleImpl(0.0, self.wind, True)
+        self.assertAlmostEqual(angle, 66.0)
+        self.assertAlmostEqual(vmg, np.cos(np.deg2rad(66.0)))
+
+        # target is directly upwind (get as close as possible)
+        angle, vmg = util.optAngleImpl(45.0, self.wind, True)
+        self.assertAlmostEqual(angle, 66.0)
+        self.assertAlmostEqual(vmg, np.cos(np.deg2rad(21.0)))
+        angle, vmg = util.optAngleImpl(45.0, self.wind, False)
+        self.assertAlmostEqual(angle, 24.0)
+        self.assertAlmostEqual(vmg, np.cos(np.deg2rad(21.0)))
+
+    def test_optAngles(self):
+        # both sides of the wind agree with the single sided sweep
+        for target in [0.0, 90.0, 180.0, 225.0, 300.0]:
+            right_angle, right_vmg, left_angle, left_vmg = util.optAnglesImpl(
+                target, self.wind)
+            self.assertEqual((right_angle, right_vmg),
+                             util.optAngleImpl(target, self.wind, True))
+            self.assertEqual((left_angle, left_vmg),
+                             util.optAngleImpl(target, self.wind, False))
+
+    def test_optAngles_legacy(self):
+        # the vectorized sweep agrees with the original one degree loop
+        rng = np.random.default_rng(1)
+        for target, wind in rng.uniform(0.0, 360.0, (300, 2)):
+            right_angle, right_vmg, left_angle, left_vmg = util.optAnglesImpl(
+                target, wind)
+            for right, angle, vmg in ((True, right_angle, right_vmg),
+                                      (False, left_angle, left_vmg)):
+                legacy_angle, legacy_vmg = _legacyOptAngle(target, wind, right)
+                self.assertAlmostEqual(vmg, legacy_vmg)
+                if vmg > 1e-9 and angle != legacy_angle:
+                    # a tie, both angles make the same progress
+                    self.assertAlmostEqual(
+                        _legacyVmg(angle - wind, wind, target), legacy_vmg)
+
+    def test_optAngle_resolution(self):
+        # a finer sweep can only improve the vmg
+        coarse_angle, coarse_vmg = util.optAngleImpl(30.0, self.wind, False)
+        fine_angle, fine_vmg = util.optAngleImpl(30.0,
+                                                 self.wind,
+                                                 False,
+                                                 delta_alpha=0.1)
+        self.assertGreaterEqual(fine_vmg, coarse_vmg)
+        self.assertAlmostEqual(fine_angle, 24.9, 5)
+        self.assertRaises(ValueError,
+                          lambda: util.optAngleImpl(0.0, self.wind, True, 0))
+
+    def test_polar(self):
+        # the default polar keeps the 20 degree no-go zones
+        self.assertEqual(util.polarImpl(0.0, self.wind), (0.0, 0.0))
+        self.assertEqual(util.polarImpl(180.0, self.wind), (0.0, 0.0))
+        self.assertEqual(util.polarImpl(20.0, self.wind), (0.0, 0.0))
+        x, y = util.polarImpl(270.0, self.wind)
+        self.assertAlmostEqual(x, np.cos(np.deg2rad(315.0)))
+        self.assertAlmostEqual(y, np.sin(np.deg2rad(315.0)))
+
+        # the zones are steps, even between whole degrees
+        for angle, speed in [(19.9, 0.0), (20.0, 0.0), (20.05, 1.0),
+                             (20.5, 1.0), (159.5, 1.0), (159.99, 1.0),
+                             (160.0, 0.0), (160.5, 0.0), (-20.5, 1.0),
+                             (339.9, 1.0), (340.0, 0.0)]:
+            self.assertEqual(util.DEFAULT_POLAR.speed(angle), speed)
+        np.testing.assert_array_equal(
+            util.DEFAULT_POLAR.speed(np.array([20.0, 20.3, 160.0])),
+            [0.0, 1.0, 0.0])
+
+    def test_polar_table(self):
+        table = util.PolarTable([0.0, 45.0, 90.0, 180.0],
+                                [[0.0, 1.0, 2.0, 1.0], [0.0, 2.0, 4.0, 2.0]],
+                                wind_speeds=[5.0, 10.0])
+
+        # symmetric about the wind, interpolated between angles
+        self.assertAlmostEqual(table.speed(45.0, 5.0), 1.0)
+        self.assertAlmostEqual(table.speed(-45.0, 5.0), 1.0)
+        self.assertAlmostEqual(table.speed(315.0, 5.0), 1.0)
+        self.assertAlmostEqual(table.speed(67.5, 5.0), 1.5)
+        np.testing.assert_allclose(table.speed(np.array([0.0, 135.0]), 5.0),
+                                   [0.0, 1.5])
+
+        # interpolated and clamped between wind speeds
+        self.assertAlmostEqual(table.speed(90.0, 7.5), 3.0)
+        self.assertAlmostEqual(table.speed(90.0, 0.0), 2.0)
+        self.assertAlmostEqual(table.speed(90.0, 20.0), 4.0)
+        self.assertRaises(ValueError, lambda: table.speed(90.0))
+
+        x, y = table.velocity(90.0, 90.0, 10.0)
+        self.assertAlmostEqual(x, -4.0)
+        self.assertAlmostEqual(y, 0.0)
+
+        # a resolution that does not divide 180 degrees
+        table = util.PolarTable([0.0, 180.0], [0.0, 1.0], resolution=7.0)
+        self.assertAlmostEqual(table.resolution, 180.0 / 26)
+        for angle in [0.0, 45.0, 90.0, 176.0, 179.0, 180.0]:
+            self.assertAlmostEqual(table.speed(angle), angle / 180.0)
+
+        # jumps in wind speed dependent polars
+        table = util.PolarTable([0.0, 30.0, 30.0, 180.0],
+                                [[0.0, 0.0, 1.0, 1.0], [0.0, 0.0, 3.0, 3.0]],
+                                wind_speeds=[5.0, 10.0])
+        self.assertEqual(table.speed(30.0, 7.5), 0.0)
+        self.assertAlmostEqual(table.speed(30.2, 7.5), 2.0)
+        np.testing.assert_allclose(
+            table.speeds(np.array([29.9, 30.0, 30.4]), [5.0, 10.0]),
+            [[0.0, 0.0, 1.0], [0.0, 0.0, 3.0]])
+
+        # one wind speed per angle
+        angles = np.array([29.9, 30.0, 30.4, -90.0, 200.0, 90.0])
+        wind_speeds = np.array([7.5, 7.5, 7.5, 2.0, 8.0, 12.0])
+        np.testing.assert_allclose(
+            table.speed(angles, wind_speeds),
+            [table.speed(a, w) for a, w in zip(angles, wind_speeds)])
+
+        self.assertRaises(ValueError,
+                          lambda: util.PolarTable([0.0, 180.0], [1.0]))
+        self.assertRaises(
+            ValueError,
+            lambda: util.PolarTable([0.0, 90.0, 45.0], [1.0, 1.0, 1.0]))
+        self.assertRaises(
+            ValueError,
+            lambda: util.PolarTable([0.0, 180.0], [[1.0, 1.0], [1.0, 1.0]]))
+
+    def test_newSailingAngle(self):
+        # reachable targets are sailed at directly, not away from
+        self.assertAlmostEqual(
+            util.newSailingAngleImpl((0.0, 0.0), (100.0, 0.0), 0.0,
+                                     self.wind), 0.0)
+        self.assertAlmostEqual(
+            util.newSailingAngleImpl((0.0, 0.0), (-100.0, 0.0), 180.0,
+                                     self.wind), 180.0)
+        self.assertAlmostEqual(
+            util.newSailingAngleImpl((50.0, 50.0), (50.0, -50.0), 270.0,
+                                     self.wind), 270.0)
+        angles = util.newSailingAnglesImpl([(0.0, 0.0), (0.0, 0.0)],
+                                           [(100.0, 0.0), (-100.0, 0.0)],
+                                           [0.0, 180.0], self.wind)
+        np.testing.assert_allclose(angles, [0.0, 180.0])
+
+    def test_getServoAngles(self):
+        # the tail follows the heading error and saturates the same way
+        self.assertAlmostEqual(util.getServoAnglesImpl(0.0, 0.0, 10.0)[1],
+                               10.0)
+        self.assertAlmostEqual(util.getServoAnglesImpl(0.0, 0.0, 90.0)[1],
+                               30.0)
+        self.assertAlmostEqual(util.getServoAnglesImpl(0.0, 0.0, -10.0)[1],
+                               -10.0)
+        self.assertAlmostEqual(util.getServoAnglesImpl(0.0, 0.0, 270.0)[1],
+                               -30.0)
+        # and turns the short way round through north
+        self.assertAlmostEqual(util.getServoAnglesImpl(0.0, 350.0, 10.0)[1],
+                               20.0)
+        self.assertAlmostEqual(util.getServoAnglesImpl(0.0, 10.0, 300.0)[1],
+                               -30.0)
+
+    def test_newSailingAngles(self):
+        # the batched path agrees exactly with the scalar path
+        rng = np.random.default_rng(0)
+        n = 2000
+        boats = rng.uniform(-100.0, 100.0, (n, 2))
+        targets = rng.uniform(-100.0, 100.0, (n, 2))
+        headings = rng.uniform(0.0, 360.0, n)
+        winds = rng.uniform(0.0, 360.0, n)
+        angles = util.newSailingAnglesImpl(boats, targets, headings, winds)
+        self.assertEqual(angles.shape, (n, ))
+        for i in range(n):
+            self.assertEqual(
+                angles[i],
+                util.newSailingAngleImpl(tuple(boats[i]), tuple(targets[i]),
+                                         headings[i], winds[i]))
+
+        # wind speed dependent polars and broadcast inputs
+        table = util.PolarTable([0.0, 30.0, 90.0, 180.0],
+                                [[0.0, 0.2, 1.0, 0.6], [0.0, 0.8, 2.0, 1.5]],
+                                wind_speeds=[3.0, 9.0])
+        wind_speeds = rng.uniform(0.0, 12.0, n)
+        angles = util.newSailingAnglesImpl(boats, (10.0, 20.0),
+                                           headings,
+                                           45.0,
+                                           delta_alpha=0.5,
+                                           polar_table=table,
+                                           wind_speeds=wind_speeds)
+        for i in range(0, n, 10):
+            self.assertEqual(
+                angles[i],
+                util.newSailingAngleImpl(tuple(boats[i]), (10.0, 20.0),
+                                         headings[i],
+                                         45.0,
+                                         delta_alpha=0.5,
+                                         polar_table=table,
+                                         wind_speed=wind_speeds[i]))
+
+        # the hysterisis distance
+        angles = util.newSailingAnglesImpl(boats, targets, headings, winds,
+                                           beating=30.0)
+        self.assertFalse(
+            np.array_equal(angles,
+                           util.newSailingAnglesImpl(boats, targets, headings,
+                                                     winds)))
+        for i in range(0, n, 10):
+            self.assertEqual(
+                angles[i],
+                util.newSailingAngleImpl(tuple(boats[i]),
+                                         tuple(targets[i]),
+                                         headings[i],
+                                         winds[i],
+                                         beating=30.0))
+
+def _legacyPolar(angle, abs_wind_dir):
+    # the polar before the PolarTable, kept as the reference
+    angle = angle % 360
+    if (angle > 20 and angle < 160) or (angle > 200 and angle < 340):
+        return (np.cos(np.deg2rad(angle + abs_wind_dir)),
+                np.sin(np.deg2rad(angle + abs_wind_dir)))
+    return 0, 0
+
+
+def _legacyVmg(alpha, abs_wind_dir, angle_boat_to_target):
+    vel = _legacyPolar(alpha, abs_wind_dir)
+    return (vel[0] * np.cos(np.deg2rad(angle_boat_to_target)) +
+            vel[1] * np.sin(np.deg2rad(angle_boat_to_target)))
+
+
+def _legacyOptAngle(angle_boat_to_target, abs_wind_dir, right):
+    # the original optAngleImpl loop, kept as the reference
+    alpha = 0.0
+    best_vmg = 0.0
+    best_angle = abs_wind_dir
+    while alpha < 180:
+        vmg = _legacyVmg(alpha if right else -1.0 * alpha, abs_wind_dir,
+                         angle_boat_to_target)
+        if vmg > best_vmg:
+            best_vmg = vmg
+            best_angle = abs_wind_dir + alpha if right else abs_wind_dir - alpha
+        alpha = alpha + 1.0
+    return best_angle % 360, best_vmg
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -81,5 +81,75 @@ class TestNmeaMethods(unittest.TestCase):
         self.assertFalse(n.status)
 
 
+class TestNmeaParserMethods(unittest.TestCase):
+    def setUp(self):
+        self.rmc = b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n'
+        self.gga = b'$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47\r\n'
+        self.vtg = b'$GPVTG,054.7,T,034.4,M,005.5,N,010.2,K*48\r\n'
+        self.gsa = b'$GPGSA,A,3,04,05,,09,12,,,24,,,,,2.5,1.3,2.1*39\r\n'
+
+    def test_checksum(self):
+        self.assertEqual(nmea.checksum(b''), 0)
+        self.assertEqual(nmea.checksum(b'GPVTG,054.7,T,034.4,M,005.5,N,010.2,K'),
+                         0x48)
+        body = bytes(range(1, 100))
+        expected = 0
+        for b in body:
+            expected ^= b
+        self.assertEqual(nmea.checksum(body), expected)
+
+    def test_parseLine(self):
+        parser = nmea.NMEAParser()
+        fix = parser.parseLine(self.rmc)
+        self.assertEqual(fix.time, 12 * 3600 + 35 * 60 + 19)
+        self.assertAlmostEqual(fix.latitude, 48.1173, 4)
+        self.assertAlmostEqual(fix.longitude, 11.51667, 5)
+        self.assertAlmostEqual(fix.speed, 22.4 * 1852 / 3600)
+        self.assertAlmostEqual(fix.course, 84.4)
+
+        # VTG and GSA update the velocity and HDOP of the next fix
+        self.assertIsNone(parser.parseLine(self.vtg))
+        self.assertIsNone(parser.parseLine(self.gsa))
+        fix = parser.parseLine(self.gga)
+        self.assertAlmostEqual(fix.course, 54.7)
+        self.assertAlmostEqual(fix.speed, 5.5 * 1852 / 3600)
+        self.assertEqual(fix.fix_quality, 1)
+        self.assertEqual(fix.satellites, 8)
+        self.assertAlmostEqual(fix.hdop, 0.9)
+
+        # southern and western hemispheres are negative
+        fix = parser.parseLine(
+            b'$GPGLL,4916.45,S,12311.12,W,225444,A,*00')
+        self.assertAlmostEqual(fix.latitude, -49.27417, 5)
+        self.assertAlmostEqual(fix.longitude, -123.1853, 4)
+
+    def test_invalid(self):
+        parser = nmea.NMEAParser()
+        # corrupted data fails the checksum
+        self.assertIsNone(parser.parseLine(self.rmc.replace(b'4807', b'4808')))
+        self.assertEqual(parser.checksum_errors, 1)
+        self.assertIsNone(parser.parseLine(self.rmc[:-5]))
+        self.assertEqual(parser.checksum_errors, 2)
+        self.assertIsNotNone(
+            nmea.NMEAParser(require_checksum=False).parseLine(self.rmc[:-5]))
+
+        # void fixes and unknown sentences don't produce fixes
+        self.assertIsNone(
+            parser.parseLine(
+                b'$GPGGA,123519,4807.038,N,01131.000,E,0,08,0.9,545.4,M,46.9,M,,*46'
+            ))
+        self.assertIsNone(parser.parseLine(b'$PMTK001,314,3*36'))
+        self.assertIsNone(parser.parseLine(b'garbage'))
+        self.assertEqual(parser.checksum_errors, 2)
+        self.assertEqual(parser.sentences, 5)
+
+    def test_parseStream(self):
+        log = (self.vtg + self.rmc + b'junk\n' + self.gsa + self.gga) * 3
+        fixes = list(nmea.parseStream(log))
+        self.assertEqual(len(fixes), 6)
+        self.assertEqual(list(nmea.parseStream(log.splitlines())), fixes)
+        self.assertTrue(all(isinstance(f, nmea.NMEAFix) for f in fixes))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
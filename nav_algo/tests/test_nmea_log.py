@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import nav_algo.coordinates as coord
+import nav_algo.nmea as nmea
+import nav_algo.nmea_log as nmea_log
+
+
+class TestNmeaLogMethods(unittest.TestCase):
+    def setUp(self):
+        self.sentences = [
+            b'$GPVTG,054.7,T,034.4,M,005.5,N,010.2,K*48',
+            b'$GPGGA,123519,4807.038,N,01131.000,E,1,08,0.9,545.4,M,46.9,M,,*47',
+            b'$GPGSV,2,1,08,01,40,083,46,02,17,308,41,12,07,344,39,14,22,228,45*75',
+            b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A',
+            b'$GPRMC,123519,A,4808.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A',
+            b'$GPGLL,4916.45,N,12311.12,W,225444,A,*1D',
+            b'$GPGLL,4916.45,N,12311.12,W,000010,A,*1D',
+            b'$GPGLL,4916.45,N,12311.12,W,000010,A,*',
+            b'noise',
+        ]
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'\r\n'.join(self.sentences))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_loadLog(self):
+        log = nmea_log.loadLog(self.path)
+        fixes = list(nmea.parseStream(self.path))
+        self.assertEqual(len(fixes), 4)
+        # the GGA and RMC fixes are one epoch
+        self.assertEqual(len(log.time), 3)
+        self.assertEqual(log.sentences, 8)
+        self.assertEqual(log.checksum_errors, 2)
+        epochs = [fixes[0], fixes[2], fixes[3]]
+        np.testing.assert_array_equal(log.latitude,
+                                      [f.latitude for f in epochs])
+        np.testing.assert_array_equal(log.longitude,
+                                      [f.longitude for f in epochs])
+        np.testing.assert_array_equal(log.fix_quality, [1, 1, 1])
+
+        # the RMC speed and course replace the VTG ones in the first epoch
+        self.assertAlmostEqual(log.speed[0], 22.4 * 1852 / 3600)
+        self.assertAlmostEqual(log.course[0], 84.4)
+        self.assertIsNone(log.x)
+
+        # the time keeps increasing past midnight
+        np.testing.assert_array_equal(log.time, [45319.0, 82484.0, 86410.0])
+
+    def test_loadLog_epochs(self):
+        bodies = []
+        for second in range(3):
+            utc = b'1235%02d' % second
+            bodies += [
+                b'GPRMC,' + utc + b',A,4807.038,N,01131.000,E,' +
+                b'%05.1f' % (10 + second) + b',084.4,230394,003.1,W',
+                b'GPVTG,090.0,T,070.0,M,' + b'%05.1f' % (20 + second) +
+                b',N,010.2,K',
+                b'GPGGA,' + utc + b',4807.100,N,01131.000,E,2,08,0.9,' +
+                b'545.4,M,46.9,M,,',
+                b'GPGLL,4807.200,N,01131.000,E,' + utc + b',A',
+            ]
+        with open(self.path, 'wb') as f:
+            f.write(b''.join(b'$%s*%02X\r\n' % (body, nmea.checksum(body))
+                             for body in bodies))
+
+        log = nmea_log.loadLog(self.path)
+        self.assertEqual(log.sentences, 12)
+        self.assertEqual(log.checksum_errors, 0)
+        np.testing.assert_array_equal(log.time, [45300.0, 45301.0, 45302.0])
+        # the position of the RMC sentence that starts each epoch
+        np.testing.assert_allclose(log.latitude, 48 + 7.038 / 60)
+        # the GGA quality, even in the first epoch, which starts before it
+        np.testing.assert_array_equal(log.fix_quality, [2, 2, 2])
+        # the VTG that follows the RMC of the epoch
+        np.testing.assert_allclose(log.speed,
+                                   np.array([20, 21, 22]) * 1852 / 3600)
+        np.testing.assert_allclose(log.course, 90.0)
+
+    def test_loadLog_projection(self):
+        coord_sys = coord.CoordinateSystem(48.1, 11.5)
+        log = nmea_log.loadLog(self.path, coord_sys)
+        x, y = coord_sys.project(log.latitude, log.longitude)
+        np.testing.assert_array_equal(log.x, x)
+        np.testing.assert_array_equal(log.y, y)
+
+    def test_loadLog_empty(self):
+        with open(self.path, 'wb'):
+            pass
+        log = nmea_log.loadLog(self.path)
+        self.assertEqual(len(log.time), 0)
+        self.assertEqual(log.sentences, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
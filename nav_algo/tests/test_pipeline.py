@@ -0,0 +1,122 @@
+import unittest
+import cv2
+import numpy as np
+import nav_algo.computer_vision.detectors.pipeline as pipeline
+from nav_algo.computer_vision.detectors.boatDetector import BoatDetector
+from nav_algo.computer_vision.detectors.buoyDetector import BuoyDetector
+from nav_algo.tests.helpers import buoyFrame
+
+
+class CountingDetector:
+    """A detector that counts the calls to each of its stage functions."""
+    def __init__(self, calls, radius):
+        self.calls = calls
+        self.radius = radius
+
+    def count(self, function):
+        def counted(input, *params, **kwargs):
+            self.calls[function.__name__] = self.calls.get(
+                function.__name__, 0) + 1
+            return function(input, *params, **kwargs)
+
+        return self.calls.setdefault(function, counted)
+
+    def stages(self):
+        return [
+            pipeline.Stage('threshold',
+                           self.count(pipeline.rgb_threshold),
+                           ((100, 255), (100, 200), (0, 100)),
+                           mask=True),
+            pipeline.Stage('blurred',
+                           self.count(pipeline.blur),
+                           (pipeline.BlurType.Box_Blur, self.radius),
+                           mask=True),
+            pipeline.Stage('contours', self.count(pipeline.find_contours),
+                           (False, )),
+        ]
+
+
+class TestPipelineMethods(unittest.TestCase):
+    def setUp(self):
+        self.frame = buoyFrame(120, 160, (80, 60))
+
+    def test_shared(self):
+        # the buoy and boat pipelines are the same, so they share every stage
+        buoy = BuoyDetector(120, 160)
+        boat = BoatDetector(120, 160)
+        graph = pipeline.DetectorGraph([buoy, boat], 120, 160)
+        self.assertEqual(len(buoy.stages()), 6)
+        self.assertEqual(graph.node_count, 6)
+
+        graph.process(self.frame)
+        self.assertIs(buoy.cv_dilate_output, boat.cv_dilate_output)
+        self.assertIs(buoy.filter_contours_output,
+                      boat.filter_contours_output)
+
+        # with the same results as running each detector on its own
+        alone = BuoyDetector(120, 160)
+        alone.process(self.frame)
+        np.testing.assert_array_equal(alone.cv_dilate_output,
+                                      buoy.cv_dilate_output)
+        self.assertEqual(len(alone.filter_contours_output), 1)
+        self.assertEqual(len(boat.filter_contours_output), 1)
+
+        # running a detector on its own does not overwrite the graph outputs
+        shared = buoy.cv_dilate_output.copy()
+        boat.process(np.zeros_like(self.frame))
+        np.testing.assert_array_equal(buoy.cv_dilate_output, shared)
+
+    def test_fork(self):
+        # the pipelines fork at the first stage whose parameters differ
+        calls = {}
+        a = CountingDetector(calls, 3)
+        b = CountingDetector(calls, 3)
+        c = CountingDetector(calls, 5)
+        graph = pipeline.DetectorGraph([a, b, c], 120, 160)
+        self.assertEqual(graph.node_count, 5)
+
+        for _ in range(2):
+            graph.process(self.frame)
+        self.assertEqual(calls['rgb_threshold'], 2)
+        self.assertEqual(calls['blur'], 4)
+        self.assertEqual(calls['find_contours'], 4)
+
+        self.assertIs(a.threshold, c.threshold)
+        self.assertIs(a.blurred, b.blurred)
+        self.assertIsNot(a.blurred, c.blurred)
+        np.testing.assert_array_equal(
+            c.blurred, cv2.blur(a.threshold, (11, 11)))
+
+        # the mask buffers are reused, and reallocated for a new frame size
+        buffer = a.blurred
+        graph.process(self.frame)
+        self.assertIs(a.blurred, buffer)
+        graph.process(cv2.resize(self.frame, (80, 60)))
+        self.assertEqual(a.blurred.shape, (60, 80))
+
+    def test_region(self):
+        # regions are processed in views of the buffers of the whole frame
+        calls = {}
+        a = CountingDetector(calls, 3)
+        graph = pipeline.DetectorGraph([a], 120, 160)
+        graph.process(self.frame)
+        buffer = a.blurred
+        graph.processRegion(self.frame[30:90, 40:120])
+        self.assertEqual(a.blurred.shape, (60, 80))
+        self.assertTrue(np.shares_memory(a.blurred, buffer))
+        b = CountingDetector(calls, 3)
+        pipeline.DetectorGraph([b], 60, 80).process(self.frame[30:90, 40:120])
+        np.testing.assert_array_equal(a.blurred, b.blurred)
+        self.assertEqual(len(a.contours), len(b.contours))
+
+        # the whole frame again uses the buffers themselves
+        graph.processRegion(self.frame)
+        self.assertIs(a.blurred, buffer)
+
+        # a larger region grows them
+        graph.processRegion(cv2.resize(self.frame, (200, 100)))
+        self.assertEqual(a.blurred.shape, (100, 200))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import queue
+import time
+import unittest
+import nav_algo.receiver as receiver
+
+
+class TestReceiverMethods(unittest.TestCase):
+    def test_parseCommand(self):
+        command = receiver.parseCommand('q\n', 1.5)
+        self.assertEqual(command.kind, receiver.QUIT)
+        self.assertEqual(command.timestamp, 1.5)
+        self.assertEqual(receiver.parseCommand('o', 0).kind, receiver.OVERRIDE)
+        self.assertEqual(
+            receiver.parseCommand('a\r\n', 0).kind, receiver.AUTOPILOT)
+        self.assertEqual(receiver.parseCommand('s', 0).kind, receiver.STATS)
+        self.assertEqual(receiver.parseCommand('p', 0).kind, receiver.PROFILE)
+
+        command = receiver.parseCommand('45 -12.5\n', 0)
+        self.assertEqual(command.kind, receiver.ANGLES)
+        self.assertEqual((command.sail, command.tail), (45.0, -12.5))
+
+        self.assertEqual(receiver.parseCommand('45\n', 0).kind,
+                         receiver.INVALID)
+        self.assertEqual(
+            receiver.parseCommand('up down\n', 0).kind, receiver.INVALID)
+        self.assertIsNone(receiver.parseCommand('\n', 0))
+
+    def test_commandReceiver(self):
+        lines = queue.Queue()
+
+        def readline():
+            # like a serial port with a timeout
+            try:
+                return lines.get(timeout=0.05)
+            except queue.Empty:
+                return ''
+
+        handled = []
+        overrides = []
+        rx = receiver.CommandReceiver(
+            readline, {
+                receiver.ANGLES: handled.append,
+                receiver.OVERRIDE: overrides.append,
+                receiver.QUIT: lambda command: 1 / 0,
+            })
+        rx.start()
+        try:
+            received = rx.waitForCommand(timeout=0)
+            self.assertEqual(received, 0)
+            start = time.monotonic()
+            lines.put(b'o\n')
+            received = rx.waitForCommand(received, timeout=1.0)
+            self.assertEqual(received, 1)
+            self.assertLess(time.monotonic() - start, 0.5)
+            self.assertEqual(len(overrides), 1)
+            self.assertGreaterEqual(overrides[0].timestamp, start)
+
+            lines.put('10 20\n')
+            lines.put('\n')
+            lines.put('q\n')  # the handler raises
+            while rx.received < 3:
+                rx.waitForCommand(timeout=1.0)
+            self.assertEqual([c.sail for c in handled], [10.0])
+            self.assertEqual([c.kind for c in rx.history],
+                             [receiver.OVERRIDE, receiver.ANGLES, receiver.QUIT])
+            self.assertEqual(rx.errors, 1)
+        finally:
+            rx.stop()
+        self.assertFalse(rx.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
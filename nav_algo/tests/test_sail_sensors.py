@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+import unittest
+from unittest import mock
+from nav_algo.tests.helpers import stubDrivers
+
+with stubDrivers():
+    import nav_algo.SailSensors as SailSensors
+
+
+class FakeBus:
+    """Stands in for SMBus, recording every transaction."""
+    def __init__(self, index):
+        self.transactions = []
+        self.frame = list(SailSensors.IMU_FRAME.pack(0.5, -1.0, math.pi))
+
+    def i2c_rdwr(self, *messages):
+        self.transactions.append(messages)
+
+    def read_i2c_block_data(self, address, offset, length):
+        return self.frame[:length]
+
+
+class FakeMessage:
+    @staticmethod
+    def write(address, data):
+        return ('write', address, tuple(data))
+
+
+class FakeIMU:
+    """Stands in for SailIMU, returning frames with increasing angles."""
+    def __init__(self, fail_every=0):
+        self.reads = 0
+        self.fail_every = fail_every
+        self._frame = bytearray(SailSensors.IMU_FRAME.size)
+
+    def readFrame(self):
+        self.reads += 1
+        if self.fail_every and self.reads % self.fail_every == 0:
+            raise OSError('I2C read failed')
+        SailSensors.IMU_FRAME.pack_into(self._frame, 0,
+                                        math.radians(self.reads), 0.0, 0.0)
+        return self._frame
+
+
+class TestSailSensorsMethods(unittest.TestCase):
+    def test_readIMU(self):
+        with mock.patch.object(SailSensors, 'SMBus', FakeBus), \
+                mock.patch.object(SailSensors, 'i2c_msg', FakeMessage):
+            imu = SailSensors.SailIMU()
+            angles = imu.readEulerAngles()
+        # the two commands are separate transactions
+        self.assertEqual(imu.i2cBus.transactions, [
+            (('write', SailSensors.IMU_ADDRESS, (0x42, 0x01)), ),
+            (('write', SailSensors.IMU_ADDRESS, (0x43, )), ),
+        ])
+        self.assertAlmostEqual(angles[0], 0.5)
+        self.assertAlmostEqual(angles[1], -1.0)
+        self.assertAlmostEqual(angles[2], math.pi, 5)
+        # the frame buffer is reused
+        self.assertIs(imu.readFrame(), imu.readFrame())
+
+    def test_ringBuffer(self):
+        self.assertRaises(ValueError, lambda: SailSensors.IMURingBuffer(1))
+        buffer = SailSensors.IMURingBuffer(4)
+        timestamps, angles = buffer.latest()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(angles.shape, (0, 3))
+
+        frame = bytearray(SailSensors.IMU_FRAME.size)
+        for i in range(6):
+            SailSensors.IMU_FRAME.pack_into(frame, 0, math.radians(i),
+                                            math.radians(-i), 0.0)
+            buffer.append(frame, float(i))
+        # one slot is kept free for the frame being written
+        self.assertEqual(buffer.count, 6)
+        self.assertEqual(len(buffer), 3)
+        timestamps, angles = buffer.latest()
+        self.assertEqual(list(timestamps), [3.0, 4.0, 5.0])
+        self.assertEqual(angles.shape, (3, 3))
+        for row, i in zip(angles, range(3, 6)):
+            self.assertAlmostEqual(row[0], i, 5)
+            self.assertAlmostEqual(row[1], -i, 5)
+        timestamps, angles = buffer.latest(2)
+        self.assertEqual(list(timestamps), [4.0, 5.0])
+        self.assertEqual(len(buffer.latest(10)[0]), 3)
+
+    def test_stream(self):
+        imu = FakeIMU(fail_every=5)
+        lock = threading.Lock()
+        stream = SailSensors.IMUStream(imu,
+                                       SailSensors.IMURingBuffer(64),
+                                       500.0,
+                                       bus_lock=lock)
+        start = time.monotonic()
+        stream.start()
+        time.sleep(0.1)
+        stream.stop()
+        self.assertFalse(stream.is_alive())
+
+        buffer = stream.buffer
+        self.assertGreater(buffer.count, 5)
+        self.assertEqual(buffer.count + stream.errors, imu.reads)
+        self.assertEqual(stream.errors, imu.reads // 5)
+        timestamps, angles = buffer.latest()
+        self.assertTrue((timestamps[1:] >= timestamps[:-1]).all())
+        self.assertGreaterEqual(timestamps[0], start)
+        # failed reads are skipped, the frames are in order
+        self.assertEqual(round(angles[-1][0]), imu.reads - (imu.reads % 5 == 0))
+        self.assertFalse(lock.locked())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import threading
+import unittest
+import nav_algo.sensor_scheduler as sched
+from nav_algo.tests.helpers import FakeClock
+
+
+class FakeSensors:
+    """Stands in for sensorData, with samples that take 'latency' seconds."""
+    def __init__(self, clock, latency=0.01):
+        self.clock = clock
+        self.latency = latency
+        self.gps_reader = None
+        self.samples = 0
+        self.imu = []
+        self.wind = []
+        self.gps = []
+
+    def _sample(self):
+        self.clock.sleep(self.latency)
+        self.samples += 1
+        return self.samples
+
+    def sampleIMU(self):
+        return self._sample()
+
+    def sampleWindDirection(self):
+        return self._sample()
+
+    def sampleGPS(self):
+        return self._sample()
+
+    def applyIMU(self, value):
+        self.imu.append(value)
+
+    def applyWindDirection(self, value):
+        self.wind.append(value)
+
+    def applyGPS(self, value):
+        self.gps.append(value)
+        return 0.0
+
+
+def runTask(task, reads):
+    """Runs a task on this thread until it has read 'reads' samples."""
+    sample = task.sample
+
+    def limited():
+        value = sample()
+        if task.reads + 1 >= reads:
+            task.stop()
+        return value
+
+    task.sample = limited
+    task.run()
+
+
+class TestSensorSchedulerMethods(unittest.TestCase):
+    def test_fixedRate(self):
+        clock = FakeClock()
+        times = []
+
+        def sample():
+            times.append(clock.monotonic())
+            clock.sleep(0.01)
+            return len(times)
+
+        task = sched.SensorTask('imu', sample, 20.0, clock=clock)
+        runTask(task, 5)
+        # the read time does not shift the schedule
+        self.assertEqual(len(times), 5)
+        for i, t in enumerate(times):
+            self.assertAlmostEqual(t, i * 0.05)
+        self.assertEqual(task.latest.value, 5)
+        self.assertAlmostEqual(task.latest.timestamp, 0.21)
+        self.assertAlmostEqual(task.latest.latency, 0.01)
+
+        # a slow read skips the missed periods instead of catching up
+        times.clear()
+        slow = sched.SensorTask('slow',
+                                lambda: (times.append(clock.monotonic()),
+                                         clock.sleep(0.12)),
+                                20.0,
+                                clock=clock)
+        start = clock.monotonic()
+        runTask(slow, 3)
+        self.assertAlmostEqual(times[1] - start, 0.12)
+        self.assertAlmostEqual(times[2] - times[1], 0.12)
+
+    def test_errors(self):
+        clock = FakeClock()
+        calls = []
+
+        def sample():
+            calls.append(1)
+            if len(calls) % 2 == 0:
+                raise OSError('I2C read failed')
+            return len(calls)
+
+        task = sched.SensorTask('wind', sample, 10.0, clock=clock)
+        runTask(task, 3)
+        self.assertEqual((task.reads, task.errors), (3, 2))
+        self.assertEqual(task.latest.value, 5)
+
+    def test_sharedLock(self):
+        lock = threading.Lock()
+        active = []
+        overlaps = []
+
+        def sample():
+            # the bus is held while sampling and never by two tasks at once
+            self.assertTrue(lock.locked())
+            active.append(1)
+            if len(active) > 1:
+                overlaps.append(1)
+            threading.Event().wait(0.001)
+            active.pop()
+
+        tasks = [
+            sched.SensorTask(name, sample, 500.0, bus_lock=lock)
+            for name in ('imu', 'wind')
+        ]
+        for task in tasks:
+            task.start()
+        threading.Event().wait(0.1)
+        for task in tasks:
+            task.stop()
+        self.assertEqual(overlaps, [])
+        for task in tasks:
+            self.assertGreater(task.reads, 0)
+            self.assertEqual(task.errors, 0)
+            self.assertFalse(task.is_alive())
+
+    def test_apply(self):
+        clock = FakeClock()
+        sensors = FakeSensors(clock)
+        scheduler = sched.SensorScheduler(sensors,
+                                          wind_rate=20.0,
+                                          clock=clock)
+        self.assertEqual(set(scheduler.tasks), {'imu', 'wind', 'gps'})
+        ages = scheduler.apply()
+        self.assertEqual(sensors.imu, [])
+        self.assertEqual(ages['imu'], None)
+
+        runTask(scheduler.tasks['imu'], 3)
+        runTask(scheduler.tasks['wind'], 4)
+        read_time = scheduler.tasks['wind'].latest.timestamp
+        clock.sleep(0.5)
+        ages = scheduler.apply()
+
+        # only the latest IMU sample, but every wind sample, in order
+        self.assertEqual(sensors.imu, [3])
+        self.assertEqual(sensors.wind, [4, 5, 6, 7])
+        self.assertEqual(sensors.gps, [None, None])  # no GPS samples yet
+        self.assertAlmostEqual(ages['wind'], clock.time - read_time)
+        self.assertGreaterEqual(ages['wind'], 0.5)
+        self.assertEqual(ages['gps'], 0.0)
+
+        # samples are only applied once
+        scheduler.apply()
+        self.assertEqual(sensors.imu, [3])
+        self.assertEqual(sensors.wind, [4, 5, 6, 7])
+
+    def test_stats(self):
+        clock = FakeClock()
+        sensors = FakeSensors(clock, latency=0.01)
+        scheduler = sched.SensorScheduler(sensors, imu_rate=20.0, clock=clock)
+        runTask(scheduler.tasks['imu'], 11)
+        stats = scheduler.stats()
+        imu = stats['imu']
+        self.assertAlmostEqual(imu.rate, 20.0)
+        self.assertEqual(imu.target_rate, 20.0)
+        self.assertAlmostEqual(imu.mean_latency, 0.01)
+        self.assertAlmostEqual(imu.max_latency, 0.01)
+        self.assertEqual((imu.reads, imu.errors), (11, 0))
+        self.assertEqual(stats['wind'].rate, 0.0)
+        self.assertEqual(stats['wind'].reads, 0)
+
+        text = sched.statsText(stats)
+        self.assertEqual(len(text.splitlines()), 3)
+        self.assertTrue(text.startswith('imu: 20.0/20.0 Hz'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import queue
+import time
+import unittest
+import nav_algo.nmea as nmea
+from nav_algo.tests.helpers import stubDrivers
+
+with stubDrivers():
+    import nav_algo.sensors as sensors
+
+
+def sentence(body):
+    return b'$%s*%02X\r\n' % (body, nmea.checksum(body))
+
+
+class FakePort:
+    """Stands in for the GPS serial port, returning queued lines."""
+    def __init__(self):
+        self.lines = queue.Queue()
+        self.is_open = False
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def reset_input_buffer(self):
+        pass
+
+    def readline(self):
+        # like a serial port with a timeout
+        try:
+            return self.lines.get(timeout=0.05)
+        except queue.Empty:
+            return b''
+
+
+class TestSensorsMethods(unittest.TestCase):
+    def test_epochInterval(self):
+        self.assertEqual(sensors.epochInterval(10.0, 11.0), 1.0)
+        self.assertEqual(sensors.epochInterval(86399.5, 0.5), 1.0)
+        self.assertEqual(sensors.epochInterval(10.0, 10.0), 0.0)
+
+    def test_gpsReader(self):
+        port = FakePort()
+        reader = sensors.GPSReader(port)
+        reader.start()
+        try:
+            self.assertIsNone(reader.waitForFix(timeout=0))
+
+            # every sentence of an epoch carries the same fix
+            port.lines.put(
+                sentence(b'GPRMC,123519,A,4807.038,N,01131.000,E,'
+                         b'022.4,084.4,230394,003.1,W'))
+            fix = reader.waitForFix(timeout=1.0)
+            self.assertEqual(fix.utc, 12 * 3600 + 35 * 60 + 19)
+            self.assertAlmostEqual(fix.latitude, 48.1173, 4)
+            port.lines.put(
+                sentence(b'GPGGA,123519,4807.038,N,01131.000,E,'
+                         b'1,08,0.9,545.4,M,46.9,M,,'))
+            port.lines.put(
+                sentence(b'GPGLL,4807.038,N,01131.000,E,123519,A'))
+            self.assertIs(reader.waitForFix(fix, timeout=0.3), fix)
+
+            # corrupted sentences are dropped
+            port.lines.put(b'$GPGLL,4807.038,N,01131.000,E,123520,A*00\r\n')
+            self.assertIs(reader.waitForFix(fix, timeout=0.3), fix)
+
+            # the next epoch is published
+            start = time.monotonic()
+            port.lines.put(
+                sentence(b'GPGLL,4807.040,N,01131.000,E,123520,A'))
+            new_fix = reader.waitForFix(fix, timeout=1.0)
+            self.assertIsNot(new_fix, fix)
+            self.assertEqual(new_fix.utc, fix.utc + 1)
+            self.assertGreaterEqual(new_fix.timestamp, start)
+            self.assertEqual(reader.sentences, 5)
+            self.assertEqual(reader.parser.checksum_errors, 1)
+        finally:
+            reader.stop()
+        self.assertFalse(reader.is_alive())
+        self.assertFalse(port.is_open)
+
+
+if __name__ == '__main__':
+    unittest.main()
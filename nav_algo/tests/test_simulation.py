@@ -0,0 +1,141 @@
+import math
+import unittest
+import nav_algo.coordinates as coord
+import nav_algo.navigation as nav
+import nav_algo.simulation as sim
+from nav_algo.events import Events
+
+
+class TestSimulationMethods(unittest.TestCase):
+    def setUp(self):
+        self.coordinate_system = coord.CoordinateSystem(42.444241, -76.481933)
+
+    def test_wind(self):
+        wind = sim.ConstantWind(90.0, 4.0)
+        self.assertEqual(wind.at(10.0, -3.0, 100.0), (90.0, 4.0))
+
+        wind = sim.ShiftingWind(350.0,
+                                speed=5.0,
+                                shift=20.0,
+                                shift_period=400.0,
+                                gust=2.0,
+                                gust_period=40.0)
+        self.assertAlmostEqual(wind.at(0, 0, 0.0)[0], 350.0)
+        direction, speed = wind.at(0, 0, 100.0)
+        self.assertAlmostEqual(direction, 10.0)  # wraps past north
+        self.assertAlmostEqual(speed, 5.0)
+        self.assertAlmostEqual(wind.at(0, 0, 10.0)[1], 7.0)
+
+    def test_dynamics(self):
+        # a beam reach with the tail centered sails straight at polar speed
+        s = sim.Simulation(wind=sim.ConstantWind(90.0))
+        s.sleep(30.0)
+        self.assertAlmostEqual(s.time, 30.0)
+        self.assertAlmostEqual(s.heading, 0.0)
+        self.assertAlmostEqual(s.speed, 1.0, places=3)
+        self.assertAlmostEqual(s.y, 0.0)
+        self.assertGreater(s.x, 25.0)
+        self.assertLess(s.x, 30.0)
+        self.assertEqual(len(s.track), 301)
+
+        # full tail turns at the turn rate
+        s.tail_angle = sim.SimulatedServo.TAIL_MAX_ANGLE
+        s.sleep(1.0)
+        self.assertAlmostEqual(s.heading, s.turn_rate)
+
+        # head to wind the boat stops
+        s = sim.Simulation(wind=sim.ConstantWind(0.0), record=False)
+        s.sleep(30.0)
+        self.assertAlmostEqual(s.speed, 0.0)
+        self.assertEqual(s.track, [])
+
+    def test_timeLimit(self):
+        s = sim.Simulation(time_limit=10.0)
+        s.sleep(10.0)
+        self.assertRaises(sim.SimulationTimeout, lambda: s.sleep(0.1))
+
+    def test_sensors(self):
+        s = sim.Simulation(wind=sim.ConstantWind(90.0), heading=30.0)
+        boat = s.boat(self.coordinate_system)
+        sensors = boat.sensors
+        boat.updateSensors()
+        self.assertAlmostEqual(sensors.yaw, 30.0)
+        self.assertAlmostEqual(sensors.wind_direction, 90.0)
+        self.assertEqual(sensors.gps_fix_age, 0.0)
+        self.assertAlmostEqual(sensors.position.x, 0.0)
+        self.assertIsNone(sensors.velocity)
+
+        # no new fix until the GPS period has passed
+        s.sleep(0.5)
+        self.assertEqual(sensors.readGPS(), 0.5)
+        self.assertIsNone(sensors.velocity)
+
+        # waiting for a fix advances the simulation
+        self.assertEqual(sensors.readGPS(timeout=5.0), 0.0)
+        self.assertAlmostEqual(s.time, 1.0)
+        self.assertAlmostEqual(sensors.velocity.angle(), 30.0, places=3)
+        self.assertAlmostEqual(sensors.position.x, s.x, places=3)
+        self.assertAlmostEqual(sensors.position.y, s.y, places=3)
+
+        # the servos are clamped and drive the model
+        boat.setAngles(120.0, -45.0)
+        self.assertEqual((s.sail_angle, s.tail_angle), (90.0, -30.0))
+        boat.setServos(40.0)
+        self.assertAlmostEqual(boat.tail_angle, 10.0)
+        self.assertAlmostEqual(s.tail_angle, 10.0)
+
+    def test_noise(self):
+        # the same seed gives the same readings
+        readings = []
+        for _ in range(2):
+            s = sim.Simulation(gps_noise=2.0, imu_noise=1.0, seed=3)
+            boat = s.boat(self.coordinate_system)
+            boat.updateSensors()
+            readings.append((boat.sensors.yaw, boat.sensors.position.x))
+        self.assertEqual(readings[0], readings[1])
+        self.assertNotEqual(readings[0], (0.0, 0.0))
+
+    def test_navigate(self):
+        # the real navigation loop sails to every waypoint
+        s = sim.Simulation(wind=sim.ShiftingWind(45.0),
+                           gps_noise=1.0,
+                           imu_noise=2.0,
+                           wind_noise=5.0,
+                           seed=1,
+                           time_limit=3600.0)
+        waypoints = [(42.444241, -76.481933), (42.445141, -76.481933),
+                     (42.445141, -76.480933)]
+        controller = nav.NavigationController(event=None,
+                                              waypoints=waypoints,
+                                              simulation=s)
+        self.assertIsNone(controller.current_waypoint)
+        self.assertEqual(len(controller.radio.hits), 3)
+        times = [t for t, _ in controller.radio.hits]
+        self.assertEqual(times, sorted(times))
+        last = controller.radio.hits[-1][1]
+        self.assertLess(math.hypot(s.x - last.x, s.y - last.y),
+                        controller.DETECTION_RADIUS + 2.0)
+        self.assertEqual(controller.loop_stats.deadline_misses, 0)
+        self.assertGreater(controller.loop_stats.ticks, 100)
+
+    def test_fleetRace(self):
+        # scripted commands set the angles, then the base station quits
+        s = sim.Simulation(commands=[(2.0, '10 -20'), (5.0, '15 25')])
+        self.assertRaises(
+            RuntimeError, lambda: nav.NavigationController(
+                event=Events.FLEET_RACE,
+                waypoints=[(42.444241, -76.481933)],
+                simulation=s))
+        self.assertEqual((s.sail_angle, s.tail_angle), (15.0, 25.0))
+        self.assertAlmostEqual(s.time, 5.0)
+
+        s = sim.Simulation(commands=[(3.0, 'q')])
+        self.assertRaises(
+            RuntimeError, lambda: nav.NavigationController(
+                event=Events.FLEET_RACE,
+                waypoints=[(42.444241, -76.481933)],
+                simulation=s))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import unittest
+import nav_algo.coordinates as coord
+import nav_algo.telemetry as telemetry
+import nav_algo.transmitter as transmitter
+
+
+class TestTelemetryMethods(unittest.TestCase):
+    def setUp(self):
+        self.encoder = telemetry.TelemetryEncoder(full_every=4)
+        self.decoder = telemetry.TelemetryDecoder()
+        self.route = [coord.Vector(x=i, y=-2.5 * i) for i in range(6)]
+
+    def test_navigation(self):
+        frame = self.encoder.navigation(42.444, -76.483, 1.5, -2.0, 90.0, 1.0,
+                                        2.0, 3.0, 45.0, -15.0, 270.0)
+        self.assertLess(len(frame), 100)
+        # text between frames is skipped
+        data = b'Waiting for GPS fix...\n' + frame
+        messages = self.decoder.feed(data)
+        self.assertEqual(len(messages), 1)
+        nav = messages[0]
+        self.assertIsInstance(nav, telemetry.NavigationTelemetry)
+        self.assertEqual(nav.seq, 0)
+        self.assertEqual(nav.origin_latitude, 42.444)
+        self.assertEqual(nav.origin_longitude, -76.483)
+        self.assertEqual((nav.x, nav.y), (1.5, -2.0))
+        self.assertEqual(nav.heading, 270.0)
+
+    def test_waypoints(self):
+        frames = [
+            self.encoder.waypoints(self.route),
+            self.encoder.waypoints(self.route),
+            self.encoder.waypoints(self.route[2:]),
+            self.encoder.hit(self.route[2]),
+            self.encoder.waypoints(self.route[3:]),
+        ]
+        # only the first frame contains the waypoints
+        self.assertGreater(len(frames[0]), 6 * 8)
+        self.assertLess(len(frames[1]), 16)
+        self.assertLess(len(frames[2]), 16)
+
+        # frames can be split anywhere
+        data = b''.join(frames)
+        messages = []
+        for i in range(0, len(data), 5):
+            messages += self.decoder.feed(data[i:i + 5])
+        self.assertEqual([m.seq for m in messages], [0, 1, 2, 3, 4])
+        route = tuple((w.x, w.y) for w in self.route)
+        self.assertEqual(messages[0].waypoints, route)
+        self.assertEqual(messages[1].waypoints, route)
+        self.assertEqual(messages[2].waypoints, route[2:])
+        self.assertEqual((messages[3].x, messages[3].y), route[2])
+        self.assertEqual(messages[4].waypoints, route[3:])
+        self.assertEqual(self.decoder.lost, 0)
+
+    def test_errors(self):
+        full = self.encoder.waypoints(self.route)
+        changed = self.encoder.waypoints(self.route[1:])
+        unchanged = self.encoder.waypoints(self.route[1:])
+
+        # a corrupted frame is dropped and the update after it is stale
+        corrupted = bytearray(changed)
+        corrupted[8] ^= 0xFF
+        messages = self.decoder.feed(full + bytes(corrupted) + unchanged)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(self.decoder.crc_errors, 1)
+        self.assertEqual(self.decoder.lost, 1)
+        self.assertEqual(self.decoder.stale, 1)
+
+        # the next full list catches up
+        self.encoder.waypoints(self.route[1:])
+        messages = self.decoder.feed(self.encoder.waypoints(self.route[1:]))
+        self.assertEqual(messages[0].waypoints,
+                         tuple((w.x, w.y) for w in self.route[1:]))
+
+    def test_corrupt(self):
+        # frames with a valid CRC but a payload of the wrong length
+        def frame(frame_type, seq, payload):
+            body = telemetry._HEADER.pack(telemetry.SYNC, frame_type, seq,
+                                          len(payload))[2:] + payload
+            return telemetry.SYNC + body + telemetry._CRC.pack(
+                telemetry._crc(body))
+
+        short_navigation = frame(telemetry.NAVIGATION, 0, b'\x00' * 10)
+        bad_count = frame(telemetry.WAYPOINTS, 1,
+                          telemetry._WAYPOINTS.pack(1, 3) + b'\x00' * 8)
+        valid = self.encoder.hit(self.route[1])
+        messages = self.decoder.feed(short_navigation + bad_count + valid)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual((messages[0].x, messages[0].y), (1.0, -2.5))
+        self.assertEqual(self.decoder.corrupt, 2)
+        self.assertEqual(self.decoder.crc_errors, 0)
+        self.assertIsNone(self.decoder.waypoints)
+        self.assertIsNone(self.decoder.revision)
+
+    def test_stamp(self):
+        encoder = telemetry.TelemetryEncoder(stamp_on_send=True)
+        written = []
+        tx = transmitter.RadioTransmitter(written.append,
+                                          1000000,
+                                          stamp=encoder.stamp)
+        # queue everything before the transmitter starts
+        for i in range(3):
+            tx.send(encoder.navigation(42.444, -76.483, i, 0.0, 90.0, 0.0,
+                                       0.0, 0.0, 0.0, 0.0, 0.0),
+                    transmitter.TELEMETRY,
+                    key='navigation')
+        tx.send(b'Waiting for GPS fix...\n')
+        tx.send(encoder.hit(self.route[1]), transmitter.URGENT)
+        self.assertEqual(encoder.seq, 0)
+        tx.start()
+        tx.stop(1.0)
+
+        # frames are numbered in the order they were sent
+        messages = self.decoder.feed(b''.join(written))
+        self.assertEqual([type(m) for m in messages],
+                         [telemetry.HitTelemetry, telemetry.NavigationTelemetry])
+        self.assertEqual([m.seq for m in messages], [0, 1])
+        self.assertEqual(messages[1].x, 2.0)
+        self.assertEqual(written[1], b'Waiting for GPS fix...\n')
+        self.assertEqual(tx.coalesced, 2)
+        self.assertEqual(self.decoder.lost, 0)
+        self.assertEqual(self.decoder.crc_errors, 0)
+
+    def test_text(self):
+        decoder = telemetry.TextTelemetryDecoder()
+        navigation = (b'----------NAVIGATION----------,Origin Latitude: 42.4,'
+                      b'Origin Longitude: -76.5,X position: 1.5,Y position: -2.0,'
+                      b'Wind Direction: 90.0,Pitch: 1.0,Roll: 2.0,Yaw: 3.0,'
+                      b'Sail Angle: 45.0,Tail Angle: -15.0,Heading: 270.0,'
+                      b'----------END----------\n')
+        data = (b'Waiting for GPS fix...\n' + navigation +
+                b'----------WAYPOINTS----------,X:1.0 Y:2.0,X:3.0 Y:4.0,'
+                b'----------END----------\n'
+                b'----------HIT----------,X:1.0 Y:2.0,----------END----------\n'
+                b'----------NAVIGATION----------,X position: 1,'
+                b'----------END----------\n')
+        # lines can be split anywhere
+        messages = decoder.feed(data[:50]) + decoder.feed(data[50:])
+        self.assertEqual(len(messages), 3)
+        nav = messages[0]
+        self.assertIsInstance(nav, telemetry.NavigationTelemetry)
+        self.assertIsNone(nav.seq)
+        self.assertEqual((nav.x, nav.y, nav.yaw), (1.5, -2.0, 3.0))
+        self.assertEqual((nav.sail_angle, nav.tail_angle), (45.0, -15.0))
+        self.assertEqual(messages[1].waypoints, ((1.0, 2.0), (3.0, 4.0)))
+        self.assertEqual(decoder.waypoints, ((1.0, 2.0), (3.0, 4.0)))
+        self.assertEqual((messages[2].x, messages[2].y), (1.0, 2.0))
+        self.assertEqual(decoder.errors, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import time
+import unittest
+import nav_algo.transmitter as transmitter
+
+
+class TestRadioTransmitterMethods(unittest.TestCase):
+    def setUp(self):
+        self.written = []
+        self.tx = transmitter.RadioTransmitter(self.written.append,
+                                               1000000,
+                                               max_messages=4)
+
+    def tearDown(self):
+        self.tx.stop(1.0)
+
+    def test_priority(self):
+        # queue everything before the transmitter starts
+        self.tx.send(b'status')
+        self.tx.send(b'nav 1', transmitter.TELEMETRY, key='navigation')
+        self.tx.send(b'hit', transmitter.URGENT)
+        self.tx.send(b'nav 2', transmitter.TELEMETRY, key='navigation')
+        self.tx.send(b'ack', transmitter.URGENT)
+        self.assertEqual(len(self.tx), 4)
+        self.assertEqual(self.tx.coalesced, 1)
+
+        self.tx.start()
+        self.assertTrue(self.tx.flush(1.0))
+        self.assertEqual(self.written, [b'hit', b'ack', b'status', b'nav 2'])
+        self.assertEqual(self.tx.sent, 4)
+        self.assertEqual(self.tx.sent_bytes, 17)
+
+    def test_dropped(self):
+        for i in range(4):
+            self.tx.send(b'%d' % i, transmitter.TELEMETRY)
+        # the oldest telemetry makes room for newer or more important messages
+        self.assertTrue(self.tx.send(b'ack', transmitter.URGENT))
+        self.assertTrue(self.tx.send(b'4', transmitter.TELEMETRY))
+        self.assertEqual(self.tx.dropped, 2)
+
+        self.tx.start()
+        self.tx.flush(1.0)
+        self.assertEqual(self.written, [b'ack', b'2', b'3', b'4'])
+
+        # less important messages never replace queued ones
+        tx = transmitter.RadioTransmitter(self.written.append,
+                                          9600,
+                                          max_messages=2)
+        tx.send(b'hit', transmitter.URGENT)
+        tx.send(b'ack', transmitter.URGENT)
+        self.assertFalse(tx.send(b'nav', transmitter.TELEMETRY))
+        self.assertEqual(tx.dropped, 1)
+
+    def test_budget(self):
+        # 80 kB/s with a one second bucket
+        self.assertAlmostEqual(self.tx.bytes_per_second, 80000)
+        self.tx.start()
+        start = time.monotonic()
+        for _ in range(3):
+            self.assertTrue(self.tx.send(bytes(40000)))
+        self.assertLess(time.monotonic() - start, 0.1)  # never blocks
+        self.assertTrue(self.tx.flush(2.0))
+        self.assertGreater(time.monotonic() - start, 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+import pygame
+import nav_algo.coordinates as coord
+import nav_algo.simulation as sim
+import nav_algo.telemetry as telemetry
+import nav_algo.visualizer as visualizer
+from nav_algo.tests.helpers import FakeClock
+
+
+def state(x=0.0, y=0.0, waypoints=((10.0, 10.0), )):
+    return visualizer.VisualState(x, y, 30.0, 20.0, -10.0, 45.0, waypoints)
+
+
+class TestVisualizerMethods(unittest.TestCase):
+    def setUp(self):
+        self.surface = pygame.Surface((400, 300))
+        self.view = visualizer.Visualizer(None,
+                                          scale=2.0,
+                                          surface=self.surface)
+        self.full = self.surface.get_rect()
+
+    def test_draw(self):
+        self.assertEqual(self.view.draw(None), [])
+        self.assertEqual(self.view.draw(state()), [self.full])
+        # nothing changed, nothing is drawn
+        self.assertEqual(self.view.draw(state()), [])
+        self.assertEqual(self.view.frames, 1)
+
+        # a move only updates the boat, the text and the new track segment
+        dirty = self.view.draw(state(1.0, 0.5))
+        self.assertNotIn(self.full, dirty)
+        area = sum(r.width * r.height for r in dirty)
+        self.assertLess(area, self.full.width * self.full.height / 4)
+        self.assertEqual(self.view._track_length, 2)
+        start = self.view.toScreen(0.0, 0.0)
+        self.assertEqual(self.view.layer.get_at((int(start[0]) + 1,
+                                                 int(start[1]))),
+                         visualizer.Visualizer.TRACK)
+
+        # the old boat is erased
+        boat = self.view._sprite_rects[0]
+        self.view.draw(state(30.0, 0.5))
+        self.assertFalse(boat.colliderect(self.view._sprite_rects[0]))
+        self.assertEqual(
+            pygame.image.tostring(self.surface.subsurface(boat), 'RGB'),
+            pygame.image.tostring(self.view.layer.subsurface(boat), 'RGB'))
+
+    def test_redraw(self):
+        self.view.draw(state())
+        # a waypoint was hit
+        self.assertEqual(self.view.draw(state(1.0, 0.0, ())), [self.full])
+        # the boat is near the edge, so the view follows it
+        self.assertEqual(self.view.draw(state(90.0, 0.0, ())), [self.full])
+        self.assertEqual(self.view.origin, (90.0, 0.0))
+        self.assertEqual(self.view.toScreen(90.0, 0.0), (200.0, 150.0))
+        self.assertEqual(self.view._track_length, 3)
+
+    def test_telemetrySource(self):
+        encoder = telemetry.TelemetryEncoder()
+        received = [
+            encoder.waypoints([coord.Vector(x=10.0, y=20.0)]) +
+            encoder.navigation(42.4, -76.5, 1.0, 2.0, 90.0, 0.0, 0.0, 45.0,
+                               30.0, -5.0, 45.0), b''
+        ]
+        source = visualizer.TelemetrySource(lambda: received.pop(0))
+        s = source.poll()
+        self.assertEqual((s.x, s.y, s.heading), (1.0, 2.0, 45.0))
+        self.assertEqual((s.sail_angle, s.tail_angle, s.wind_direction),
+                         (30.0, -5.0, 90.0))
+        self.assertEqual(s.waypoints, ((10.0, 20.0), ))
+        self.assertEqual(source.poll(), s)
+
+        text = visualizer.TelemetrySource(lambda: b'Waiting for GPS fix...\n',
+                                          binary=False)
+        self.assertIsNone(text.poll())
+
+    def test_logSource(self):
+        encoder = telemetry.TelemetryEncoder()
+        data = b''.join(
+            encoder.navigation(0.0, 0.0, float(i), 0.0, 0.0, 0.0, 0.0, 0.0,
+                               0.0, 0.0, 0.0) for i in range(5))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'telemetry.log')
+            with open(path, 'wb') as f:
+                f.write(data)
+            clock = FakeClock()
+            source = visualizer.LogSource(path, speed=2.0, clock=clock)
+        self.assertEqual(len(source.messages), 5)
+        self.assertEqual(source.poll().x, 0.0)
+        clock.time = 1.0
+        self.assertEqual(source.poll().x, 2.0)
+        self.assertFalse(source.finished())
+        clock.time = 10.0
+        self.assertEqual(source.poll().x, 4.0)
+        self.assertTrue(source.finished())
+
+    def test_simulationSource(self):
+        s = sim.Simulation(wind=sim.ConstantWind(90.0))
+        s.sail_angle, s.tail_angle = 10.0, 0.0
+        clock = FakeClock()
+        source = visualizer.SimulationSource(s, [(3.0, 0.0), (50.0, 0.0)],
+                                             detection_radius=1.0,
+                                             speed=2.0,
+                                             clock=clock)
+        first = source.poll()
+        self.assertEqual((first.x, first.heading, first.wind_direction),
+                         (0.0, 0.0, 90.0))
+        s.sleep(20.0)
+        clock.time = 5.0
+        # played up to simulation time 10 s
+        played = source.poll()
+        point = [p for p in s.track if p.time <= 10.0][-1]
+        self.assertEqual(played.x, point.x)
+        self.assertEqual(played.sail_angle, 10.0)
+        self.assertEqual(played.waypoints, ((50.0, 0.0), ))
+
+
+if __name__ == '__main__':
+    unittest.main()
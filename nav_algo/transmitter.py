@@ -0,0 +1,175 @@
+import heapq
+import threading
+import time
+
+# message priorities, lower is sent first
+URGENT = 0  # hit waypoints and command acknowledgements
+NORMAL = 1  # status messages
+TELEMETRY = 2  # periodic navigation data and waypoint lists
+
+
+class RadioTransmitter(threading.Thread):
+    """Sends radio messages in the background, within a byte rate budget.
+
+    Messages are queued by priority and sent in order of priority, then
+    age. Periodic telemetry can be sent with a key: a queued message with the
+    same key is replaced by the newer one (coalesced), so only the latest
+    navigation data is ever waiting. When the queue is full, the oldest
+    lowest priority message is dropped, unless the new message has an even
+    lower priority, in which case it is dropped instead.
+
+    The budget is a token bucket that refills at 'bytes_per_second' and
+    holds up to one second of data, so a slow link delays the transmitter
+    instead of the control loop.
+
+    Args:
+        write (callable): Sends bytes over the link (e.g. UARTDevice.sendUart).
+        baudrate (int): The baud rate of the link.
+        utilization (float): (Optional) The fraction of the link to use.
+        max_messages (int): (Optional) How many messages can be queued.
+        stamp (callable): (Optional) Called with every message just before it
+            is written and returns the bytes to write, e.g. to number frames
+            in the order they are actually sent (see TelemetryEncoder.stamp).
+
+    Attributes:
+        bytes_per_second (float): The byte rate budget (8N1 framing uses 10 bits per byte).
+        sent (int): The number of messages sent.
+        sent_bytes (int): The number of bytes sent.
+        dropped (int): The number of messages dropped because the queue was full.
+        coalesced (int): The number of messages replaced by a newer one.
+        errors (int): The number of writes that raised an exception.
+
+    """
+    def __init__(self,
+                 write,
+                 baudrate,
+                 utilization=0.8,
+                 max_messages=32,
+                 stamp=None):
+        super().__init__(name='RadioTransmitter', daemon=True)
+        self.write = write
+        self.stamp = stamp
+        self.bytes_per_second = baudrate / 10.0 * utilization
+        self.max_messages = max_messages
+        self.sent = 0
+        self.sent_bytes = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self._queue = []  # heap of [priority, order, key, data]
+        self._keyed = {}
+        self._order = 0
+        self._tokens = self.bytes_per_second
+        self._refill_time = time.monotonic()
+        self._busy = False
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+
+    def __len__(self):
+        return len(self._queue)
+
+    def send(self, data, priority=NORMAL, key=None):
+        """Queues a message without waiting for it to be sent.
+
+        Args:
+            data (bytes): The message.
+            priority (int): (Optional) URGENT, NORMAL or TELEMETRY.
+            key (str): (Optional) Replace any queued message with this key.
+
+        Returns:
+            bool: False if the message was dropped.
+
+        """
+        with self._condition:
+            if key is not None and key in self._keyed:
+                entry = self._keyed[key]
+                entry[3] = data
+                self.coalesced += 1
+                return True
+
+            if len(self._queue) >= self.max_messages:
+                lowest = max(self._queue, key=lambda e: (e[0], -e[1]))
+                if lowest[0] < priority:
+                    self.dropped += 1
+                    return False
+                self._queue.remove(lowest)
+                heapq.heapify(self._queue)
+                if lowest[2] is not None:
+                    del self._keyed[lowest[2]]
+                self.dropped += 1
+
+            entry = [priority, self._order, key, data]
+            self._order += 1
+            heapq.heappush(self._queue, entry)
+            if key is not None:
+                self._keyed[key] = entry
+            self._condition.notify()
+            return True
+
+    def run(self):
+        """Sends queued messages until stop() is called."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._queue) > 0 or self._stop_event.is_set())
+                if len(self._queue) == 0:
+                    break  # stopped and everything was sent
+                _, _, key, data = heapq.heappop(self._queue)
+                if key is not None:
+                    del self._keyed[key]
+                self._busy = True
+
+            if self.stamp is not None:
+                data = self.stamp(data)
+            self._waitForBudget(len(data))
+            try:
+                self.write(data)
+            except Exception:
+                self.errors += 1
+            else:
+                self.sent += 1
+                self.sent_bytes += len(data)
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def _waitForBudget(self, size):
+        """Waits until 'size' bytes can be sent within the byte rate budget."""
+        now = time.monotonic()
+        self._tokens = min(
+            self.bytes_per_second,
+            self._tokens + (now - self._refill_time) * self.bytes_per_second)
+        self._refill_time = now
+        # messages larger than the bucket wait for it to be full
+        needed = min(size, self.bytes_per_second)
+        if self._tokens < needed:
+            time.sleep((needed - self._tokens) / self.bytes_per_second)
+            self._tokens = needed
+            self._refill_time = time.monotonic()
+        self._tokens -= size
+
+    def flush(self, timeout=None):
+        """Waits until every queued message has been sent.
+
+        Args:
+            timeout (float): (Optional) The maximum time to wait (in seconds).
+
+        Returns:
+            bool: False if there were still messages queued on timeout.
+
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: len(self._queue) == 0 and not self._busy, timeout)
+
+    def stop(self, timeout=None):
+        """Sends the queued messages (within 'timeout' seconds) and stops."""
+        self.flush(timeout)
+        self._stop_event.set()
+        with self._condition:
+            self._queue.clear()
+            self._keyed.clear()
+            self._condition.notify_all()
+        if self.is_alive():
+            self.join()
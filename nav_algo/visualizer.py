@@ -0,0 +1,508 @@
+"""
+A real-time pygame view of the boat.
+
+The Visualizer draws the boat pose with its sail and tail, a wind arrow,
+the remaining waypoints and the track history. The boat state comes from a
+source with a poll() method:
+
+- TelemetrySource reads the live binary or text telemetry of the radio,
+- LogSource replays a recorded telemetry log,
+- SimulationSource plays back a Simulation as it runs.
+
+Only what changed is redrawn. The background, the waypoints and the track
+live on a cached layer: a new track point adds one segment to it, and the
+boat and the text are erased by copying their old rectangles back from the
+layer. Each frame updates the display once, with the dirty rectangles only,
+so the frame time does not grow with the length of the track.
+
+Run from the raspberrypi directory (requires pygame):
+
+    python3 -m nav_algo.visualizer                 # a simulated course
+    python3 -m nav_algo.visualizer --log PATH      # a recorded telemetry log
+    python3 -m nav_algo.visualizer --port /dev/ttyUSB0
+"""
+from collections import namedtuple
+import argparse
+import math
+import threading
+import time
+import numpy as np
+import pygame
+import nav_algo.telemetry as telemetry
+
+VisualState = namedtuple('VisualState', [
+    'x', 'y', 'heading', 'sail_angle', 'tail_angle', 'wind_direction',
+    'waypoints'
+])
+VisualState.__doc__ = """What the visualizer draws.
+
+Attributes:
+    x (float): The x position of the boat (in meters).
+    y (float): The y position of the boat (in meters).
+    heading (float): The direction the bow points in (in degrees).
+    sail_angle (float): The sail angle relative to the boat (in degrees).
+    tail_angle (float): The tail angle relative to the sail (in degrees).
+    wind_direction (float): The absolute wind direction (in degrees).
+    waypoints (tuple of (float, float)): The remaining waypoints, in order.
+"""
+
+
+class TelemetrySource:
+    """Turns the telemetry of the radio into visualizer states.
+
+    Args:
+        read (callable): Returns the bytes received since the last call (b''
+            if none), without blocking, e.g. lambda: port.read(port.in_waiting).
+        binary (bool): (Optional) If the telemetry is binary frames instead of text.
+
+    """
+    def __init__(self, read, binary=True):
+        self.read = read
+        self.decoder = (telemetry.TelemetryDecoder()
+                        if binary else telemetry.TextTelemetryDecoder())
+        self._navigation = None
+        self._waypoints = ()
+
+    def poll(self):
+        """Reads the received telemetry.
+
+        Returns:
+            VisualState: The latest state, or None before the first navigation data.
+
+        """
+        data = self.read()
+        if data:
+            self.apply(self.decoder.feed(data))
+        return self.state()
+
+    def apply(self, messages):
+        """Applies decoded telemetry messages to the state."""
+        for message in messages:
+            if isinstance(message, telemetry.NavigationTelemetry):
+                self._navigation = message
+            elif isinstance(message, telemetry.WaypointsTelemetry):
+                self._waypoints = message.waypoints or ()
+
+    def state(self):
+        """Returns the latest state, or None before the first navigation data."""
+        nav = self._navigation
+        if nav is None:
+            return None
+        return VisualState(nav.x, nav.y, nav.yaw, nav.sail_angle,
+                           nav.tail_angle, nav.wind_direction,
+                           self._waypoints)
+
+
+class LogSource(TelemetrySource):
+    """Replays a recorded telemetry log.
+
+    The radio sends the navigation data once a second, so the log is played
+    back at 'speed' navigation messages per second.
+
+    Args:
+        path (str): The log, the raw bytes received from the radio.
+        binary (bool): (Optional) If the telemetry is binary frames instead of text.
+        speed (float): (Optional) How many times faster than real time to play.
+        clock (object): (Optional) Provides monotonic(), the real clock if not given.
+
+    Attributes:
+        messages (list): Every decoded message in the log.
+
+    """
+    def __init__(self, path, binary=True, speed=1.0, clock=None):
+        super().__init__(lambda: b'', binary)
+        with open(path, 'rb') as f:
+            self.messages = self.decoder.feed(f.read())
+        self.speed = speed
+        self.clock = clock
+        self._navigation_index = [
+            i for i, m in enumerate(self.messages)
+            if isinstance(m, telemetry.NavigationTelemetry)
+        ]
+        self._played = 0
+        self._start = None
+
+    def poll(self):
+        """Plays the messages that are due.
+
+        Returns:
+            VisualState: The latest state, or None before the first navigation data.
+
+        """
+        now = self.clock.monotonic() if self.clock is not None else time.monotonic()
+        if self._start is None:
+            self._start = now
+        due = int((now - self._start) * self.speed) + 1
+        if due < len(self._navigation_index):
+            end = self._navigation_index[due]
+        else:
+            end = len(self.messages)
+        if end > self._played:
+            self.apply(self.messages[self._played:end])
+            self._played = end
+        return self.state()
+
+    def finished(self):
+        """Returns whether every message has been played."""
+        return self._played >= len(self.messages)
+
+
+class SimulationSource:
+    """Plays back the recorded track of a Simulation.
+
+    The simulation can run on another thread (e.g. a NavigationController
+    with simulation=...), much faster than real time: the track is played at
+    'speed' times real time as it is recorded. A waypoint is dropped from the
+    remaining ones once the boat gets within the detection radius.
+
+    Args:
+        simulation (Simulation): The simulation, with record=True.
+        waypoints (list of (float, float)): (Optional) The (x, y) waypoints, in order.
+        detection_radius (float): (Optional) How close the boat needs to get to a waypoint.
+        speed (float): (Optional) How many times faster than real time to play.
+        clock (object): (Optional) Provides monotonic(), the real clock if not given.
+
+    """
+    def __init__(self,
+                 simulation,
+                 waypoints=(),
+                 detection_radius=5.0,
+                 speed=1.0,
+                 clock=None):
+        self.simulation = simulation
+        self.waypoints = tuple(tuple(w) for w in waypoints)
+        self.detection_radius = detection_radius
+        self.speed = speed
+        self.clock = clock
+        self._index = 0
+        self._start = None
+
+    def poll(self):
+        """Plays the track up to the current time.
+
+        Returns:
+            VisualState: The latest state, or None before the first track point.
+
+        """
+        now = self.clock.monotonic() if self.clock is not None else time.monotonic()
+        if self._start is None:
+            self._start = now
+        until = (now - self._start) * self.speed
+        track = self.simulation.track
+        # the track is only appended to, so it can be read while it grows
+        end = len(track)
+        while self._index < end and track[self._index].time <= until:
+            self._hit(track[self._index])
+            self._index += 1
+        if self._index == 0:
+            return None
+        point = track[self._index - 1]
+        return VisualState(point.x, point.y, point.heading, point.sail_angle,
+                           point.tail_angle, point.wind_direction,
+                           self.waypoints)
+
+    def _hit(self, point):
+        if len(self.waypoints) > 0:
+            x, y = self.waypoints[0]
+            if math.hypot(point.x - x, point.y - y) < self.detection_radius:
+                self.waypoints = self.waypoints[1:]
+
+
+class Visualizer:
+    """Draws the boat from a source of VisualStates in a pygame window.
+
+    Args:
+        source (object): Provides poll() -> VisualState or None.
+        size ((int, int)): (Optional) The size of the window (in pixels).
+        scale (float): (Optional) The zoom (in pixels per meter).
+        fps (int): (Optional) The frame rate limit.
+        surface (pygame.Surface): (Optional) Draw on this surface instead of
+            opening a window, e.g. for tests.
+
+    Attributes:
+        track (numpy.ndarray): The track history, an (n, 2) array of positions.
+        frames (int): The number of frames drawn.
+
+    """
+    WATER = (24, 78, 119)
+    GRID = (36, 94, 138)
+    TRACK = (230, 230, 230)
+    WAYPOINT = (255, 196, 0)
+    NEXT_WAYPOINT = (255, 90, 60)
+    HULL = (250, 250, 250)
+    SAIL = (255, 120, 60)
+    TAIL = (120, 255, 120)
+    TEXT = (255, 255, 255)
+    WIND = (160, 220, 255)
+
+    GRID_SPACING = 10.0  # meters
+    MARGIN = 0.15  # recenter when the boat is this close to an edge
+    BOAT_LENGTH = 28  # pixels, the same at any zoom
+
+    def __init__(self, source, size=(960, 720), scale=4.0, fps=60,
+                 surface=None):
+        self.source = source
+        self.scale = scale
+        self.fps = fps
+        pygame.init()
+        if surface is None:
+            surface = pygame.display.set_mode(size)
+            pygame.display.set_caption('CUSail')
+            self._window = True
+        else:
+            self._window = False
+        self.screen = surface
+        self.width, self.height = self.screen.get_size()
+        self.font = pygame.font.Font(None, 22)
+        self.layer = pygame.Surface((self.width, self.height))
+
+        self.origin = (0.0, 0.0)
+        self.track = np.empty((1024, 2))
+        self._track_length = 0
+        self.frames = 0
+        self._state = None
+        self._waypoints = None
+        self._sprite_rects = []
+        self._text = None
+        self._text_surface = None
+        self._wind = None
+        self._wind_surface = None
+        self._full_redraw = True
+
+    def run(self):
+        """Draws frames until the window is closed."""
+        clock = pygame.time.Clock()
+        running = True
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    self._onKey(event.key)
+            self.draw(self.source.poll())
+            clock.tick(self.fps)
+        pygame.quit()
+
+    def draw(self, state):
+        """Draws a frame and updates the changed parts of the display.
+
+        Args:
+            state (VisualState): The state to draw, or None if there is none yet.
+
+        Returns:
+            list of pygame.Rect: The parts of the display that were updated,
+            the whole display for a full redraw.
+
+        """
+        if state is None or (state == self._state
+                             and not self._full_redraw):
+            return []
+        dirty = []
+        if self._state is None or (state.x, state.y) != (self._state.x,
+                                                         self._state.y):
+            dirty += self._addTrackPoint(state.x, state.y)
+        if state.waypoints != self._waypoints:
+            self._waypoints = state.waypoints
+            self._full_redraw = True
+        if not self._onScreen(state.x, state.y):
+            self.origin = (state.x, state.y)
+            self._full_redraw = True
+
+        full_redraw = self._full_redraw
+        if full_redraw:
+            self._drawLayer()
+            self.screen.blit(self.layer, (0, 0))
+        else:
+            # erase the boat and the text by restoring the layer under them
+            for rect in self._sprite_rects + dirty:
+                self.screen.blit(self.layer, rect, rect)
+            dirty += self._sprite_rects
+
+        self._sprite_rects = self._drawBoat(state) + self._drawText(
+            state) + self._drawWind(state)
+        dirty += self._sprite_rects
+        if full_redraw:
+            dirty = [self.screen.get_rect()]
+        self._state = state
+        self._full_redraw = False
+        self.frames += 1
+        if self._window:
+            pygame.display.update(dirty)
+        return dirty
+
+    def toScreen(self, x, y):
+        """Converts a position (in meters) to window coordinates (in pixels)."""
+        return (self.width / 2 + (x - self.origin[0]) * self.scale,
+                self.height / 2 - (y - self.origin[1]) * self.scale)
+
+    def _onScreen(self, x, y):
+        sx, sy = self.toScreen(x, y)
+        mx, my = self.width * self.MARGIN, self.height * self.MARGIN
+        return mx <= sx <= self.width - mx and my <= sy <= self.height - my
+
+    def _onKey(self, key):
+        if key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            self.scale *= 1.5
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            self.scale /= 1.5
+        elif key == pygame.K_c and self._state is not None:
+            self.origin = (self._state.x, self._state.y)
+        else:
+            return
+        self._full_redraw = True
+
+    def _addTrackPoint(self, x, y):
+        """Appends to the track and draws the new segment on the layer."""
+        n = self._track_length
+        if n == len(self.track):
+            self.track = np.concatenate((self.track, np.empty_like(self.track)))
+        self.track[n] = (x, y)
+        self._track_length = n + 1
+        if n == 0 or self._full_redraw:
+            return []
+        rect = pygame.draw.line(self.layer, self.TRACK,
+                                self.toScreen(*self.track[n - 1]),
+                                self.toScreen(x, y), 2)
+        return [rect]
+
+    def _drawLayer(self):
+        """Redraws the background, the waypoints and the whole track."""
+        self.layer.fill(self.WATER)
+        spacing = self.GRID_SPACING * self.scale
+        if spacing >= 8:
+            left, top = self.toScreen(0.0, 0.0)
+            for sx in np.arange(left % spacing, self.width, spacing):
+                pygame.draw.line(self.layer, self.GRID, (sx, 0),
+                                 (sx, self.height))
+            for sy in np.arange(top % spacing, self.height, spacing):
+                pygame.draw.line(self.layer, self.GRID, (0, sy),
+                                 (self.width, sy))
+
+        waypoints = [self.toScreen(x, y) for x, y in self._waypoints or ()]
+        if len(waypoints) > 1:
+            pygame.draw.lines(self.layer, self.WAYPOINT, False, waypoints)
+        for i, point in enumerate(waypoints):
+            color = self.NEXT_WAYPOINT if i == 0 else self.WAYPOINT
+            pygame.draw.circle(self.layer, color, point, 6, 2)
+
+        n = self._track_length
+        if n > 1:
+            track = self.track[:n]
+            points = np.column_stack(
+                (self.width / 2 + (track[:, 0] - self.origin[0]) * self.scale,
+                 self.height / 2 - (track[:, 1] - self.origin[1]) * self.scale))
+            pygame.draw.lines(self.layer, self.TRACK, False, points.tolist(),
+                              2)
+
+    def _drawBoat(self, state):
+        cx, cy = self.toScreen(state.x, state.y)
+        half = self.BOAT_LENGTH / 2
+
+        def point(angle, length, start=(cx, cy)):
+            rad = math.radians(angle)
+            return (start[0] + length * math.cos(rad),
+                    start[1] - length * math.sin(rad))
+
+        hull = [
+            point(state.heading, half),
+            point(state.heading + 150, half * 0.8),
+            point(state.heading + 180, half * 0.6),
+            point(state.heading - 150, half * 0.8)
+        ]
+        rects = [pygame.draw.polygon(self.screen, self.HULL, hull, 2)]
+        # the sail pivots at the mast and trails aft, the tail trails the sail
+        sail = state.heading + 180 + state.sail_angle
+        front = point(sail, -half * 0.3)
+        back = point(sail, half * 0.7)
+        rects.append(pygame.draw.line(self.screen, self.SAIL, front, back, 3))
+        tail_end = point(sail + state.tail_angle, half * 0.4, back)
+        rects.append(
+            pygame.draw.line(self.screen, self.TAIL, back, tail_end, 3))
+        return [rects[0].unionall(rects[1:])]
+
+    def _drawText(self, state):
+        text = ('x {:.1f} m  y {:.1f} m  heading {:.0f}  sail {:.0f}  '
+                'tail {:.0f}  wind {:.0f}  waypoints {}'.format(
+                    state.x, state.y, state.heading % 360, state.sail_angle,
+                    state.tail_angle, state.wind_direction % 360,
+                    len(state.waypoints)))
+        if text != self._text:
+            # rendering text is slow, so only when it changes
+            self._text = text
+            self._text_surface = self.font.render(text, True, self.TEXT)
+        return [self.screen.blit(self._text_surface, (10, 10))]
+
+    def _drawWind(self, state):
+        if state.wind_direction != self._wind:
+            self._wind = state.wind_direction
+            surface = pygame.Surface((64, 64), pygame.SRCALPHA)
+            # the arrow points downwind
+            rad = math.radians(state.wind_direction + 180)
+            dx, dy = math.cos(rad), -math.sin(rad)
+            tip = (32 + 26 * dx, 32 + 26 * dy)
+            tail = (32 - 26 * dx, 32 - 26 * dy)
+            pygame.draw.circle(surface, self.WIND, (32, 32), 30, 1)
+            pygame.draw.line(surface, self.WIND, tail, tip, 3)
+            pygame.draw.polygon(surface, self.WIND, [
+                tip, (tip[0] - 10 * dx + 6 * dy, tip[1] - 10 * dy - 6 * dx),
+                (tip[0] - 10 * dx - 6 * dy, tip[1] - 10 * dy + 6 * dx)
+            ])
+            self._wind_surface = surface
+        return [self.screen.blit(self._wind_surface, (self.width - 74, 10))]
+
+
+def _simulation():
+    """Sails a simulated course on a background thread."""
+    import nav_algo.coordinates as coord
+    import nav_algo.navigation as nav
+    import nav_algo.simulation as sim
+
+    latlon = [(42.444241, -76.481933), (42.445141, -76.481933),
+              (42.445141, -76.480933), (42.444241, -76.480933)]
+    simulation = sim.Simulation(wind=sim.ShiftingWind(45.0),
+                                gps_noise=1.0,
+                                seed=1,
+                                time_limit=3600.0)
+    coordinate_system = coord.CoordinateSystem(*latlon[0])
+    waypoints = [
+        coord.Vector.fromLatLon(coordinate_system, *w) for w in latlon
+    ]
+    threading.Thread(target=nav.NavigationController,
+                     kwargs={
+                         'event': None,
+                         'waypoints': latlon,
+                         'simulation': simulation
+                     },
+                     daemon=True).start()
+    return SimulationSource(simulation, [(w.x, w.y) for w in waypoints],
+                            speed=10.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shows the boat in real time.')
+    parser.add_argument('--log', help='replay a recorded telemetry log')
+    parser.add_argument('--port', help='read live telemetry from a serial port')
+    parser.add_argument('--text',
+                        action='store_true',
+                        help='the telemetry is text instead of binary frames')
+    parser.add_argument('--speed',
+                        type=float,
+                        default=10.0,
+                        help='the playback speed of logs and simulations')
+    args = parser.parse_args()
+
+    if args.log is not None:
+        source = LogSource(args.log, not args.text, args.speed)
+    elif args.port is not None:
+        import serial
+        port = serial.Serial(args.port, 9600, timeout=0)
+        source = TelemetrySource(lambda: port.read(port.in_waiting),
+                                 not args.text)
+    else:
+        source = _simulation()
+        source.speed = args.speed
+    Visualizer(source).run()
+
+
+if __name__ == "__main__":
+    main()